@@ -1,20 +1,46 @@
 from .heap import MinArrayHeap
 from .heap import MaxArrayHeap
+from .heap import KeyedMinHeap
+from .heap import KeyedMaxHeap
+from .heap import IndexedMinHeap
+from .heap import IndexedMaxHeap
+from .heap import DAryMinHeap
+from .heap import DAryMaxHeap
 from .heap import MinTreeHeap
 from .heap import MaxTreeHeap
+from .heap import MinPairingHeap
+from .heap import MaxPairingHeap
+from .heap import SharedMinArrayHeap
+from .heap import SharedMaxArrayHeap
+from .heap import TopK
+from .heap import merge_sorted
 from .binary_tree import BinaryTree
 from .binary_tree import RedBlackTree
-from .union_find import UnionFind
-from .bloom_filter import BloomFilter
-from .linked_list import SingleLinkedList, DoubleLinkedList
-from .hashmap import Hashmap
+from .binary_tree import SplayTree
+from .binary_tree import Treap
+from .binary_tree import OrderStatisticTree
+from .binary_tree import SortedDict
+from .binary_tree import ArrayRedBlackTree
+from .binary_tree import PersistentRedBlackTree
+from .b_tree import BPlusTree
+from .union_find import UnionFind, FrozenUnionFind
+from .bloom_filter import BloomFilter, FrozenBloomFilter
+from .linked_list import SingleLinkedList, DoubleLinkedList, Deque
+from .hashmap import Hashmap, FrozenHashmap
 from .stack import Stack
+from .async_queue import AsyncHeapQueue, AsyncStack
+from .timing_wheel import TimingWheel
+from .frozen import FrozenSortedKeys
 
 # remove module filenames from imported namespace
 del heap
 del binary_tree
+del b_tree
 del union_find
 del bloom_filter
 del linked_list
 del hashmap
-del stack
\ No newline at end of file
+del stack
+del async_queue
+del timing_wheel
+del frozen
@@ -0,0 +1,276 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import deque
+from .heap import MinArrayHeap, MaxArrayHeap, KeyedMinHeap, KeyedMaxHeap
+from .linked_list import Deque
+from .stack import Stack
+
+class EmptyError(Exception):
+    '''
+    Exception raised when get_nowait is called on an empty async container.
+    '''
+    pass
+
+class FullError(Exception):
+    '''
+    Exception raised when put_nowait is called on a full async container
+    with specified maxsize constructor argument.
+    '''
+    pass
+
+def _expire(waiters, waiter):
+    '''
+    Wakes <arg>:waiter after its timeout, removing it from the deque
+    <arg>:waiters, unless it was already woken.
+    '''
+    if not waiter.done():
+        waiters.remove(waiter)
+        waiter.set_result(None)
+
+class AsyncContainer(ABC):
+    '''
+    Base class of the asyncio containers, with the waiting logic of
+    asyncio.Queue around a container of the package. Coroutines blocked in
+    get or put wait on futures kept in FIFO order, and each put or get
+    wakes at most one of them, so a blocked coroutine is woken only when it
+    can make progress. Derived classes must implement the abstract _put,
+    _get and __len__ methods, or they cannot be instantiated. Not
+    thread-safe: all calls must be made from the event loop thread.
+    '''
+    def __init__(self, maxsize = None):
+        '''
+        Constructor Arguments
+        ---------------------
+        maxsize: int or None (default: None)
+            Maximum number of items in the container. put waits while the
+            container is full. Unbounded if None.
+        '''
+        if maxsize is not None and maxsize < 1:
+            raise ValueError('<arg>:maxsize must be positive or None')
+        self._maxsize = maxsize
+        self._getters = deque()
+        self._putters = deque()
+    
+    def __str__(self):
+        return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
+    
+    def __repr__(self):
+        return self.__str__()
+    
+    @abstractmethod
+    def __len__(self):
+        '''
+        Returns the number of items in the underlying container.
+        Implemented by derived classes.
+        '''
+    
+    @abstractmethod
+    def _put(self, item):
+        '''
+        Adds <arg>:item to the underlying container. Implemented by derived
+        classes.
+        '''
+    
+    @abstractmethod
+    def _get(self):
+        '''
+        Removes and returns the next item of the underlying container.
+        Implemented by derived classes.
+        '''
+    
+    def qsize(self):
+        '''
+        Returns the number of items in the container.
+        '''
+        return len(self)
+    
+    def maxsize(self):
+        '''
+        Returns the maximum number of items in the container, or None if it
+        is unbounded.
+        '''
+        return self._maxsize
+    
+    def empty(self):
+        '''
+        Returns True if the container is empty, False otherwise.
+        '''
+        return len(self) == 0
+    
+    def full(self):
+        '''
+        Returns True if the container holds maxsize items, False otherwise.
+        '''
+        return self._maxsize is not None and len(self) >= self._maxsize
+    
+    def _wakeup_next(self, waiters):
+        '''
+        Wakes the first coroutine waiting in the deque <arg>:waiters.
+        '''
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+    
+    async def _wait(self, waiters, blocked, timeout = None):
+        '''
+        Waits in the deque <arg>:waiters until <arg>:blocked() returns
+        False. Returns True once it does, or False if <arg>:timeout seconds
+        pass first (never if <arg>:timeout is None).
+        '''
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while blocked():
+            if deadline is not None and loop.time() >= deadline:
+                return False
+            waiter = loop.create_future()
+            waiters.append(waiter)
+            timer = None
+            if deadline is not None:
+                timer = loop.call_at(deadline, _expire, waiters, waiter)
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                try:
+                    waiters.remove(waiter)
+                except ValueError:
+                    pass
+                # pass on a wakeup that was meant for this coroutine
+                if not blocked() and not waiter.cancelled():
+                    self._wakeup_next(waiters)
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+        return True
+    
+    def put_nowait(self, item):
+        '''
+        Adds <arg>:item to the container without waiting. Raises a FullError
+        exception if the container is full.
+        '''
+        if self.full():
+            raise FullError('<method>:put_nowait called on full {:s}'.format(type(self).__name__))
+        self._put(item)
+        self._wakeup_next(self._getters)
+    
+    def get_nowait(self):
+        '''
+        Removes and returns the next item without waiting. Raises an
+        EmptyError exception if the container is empty.
+        '''
+        if self.empty():
+            raise EmptyError('<method>:get_nowait called on empty {:s}'.format(type(self).__name__))
+        item = self._get()
+        self._wakeup_next(self._putters)
+        return item
+    
+    async def put(self, item):
+        '''
+        Adds <arg>:item to the container, waiting for a free slot while the
+        container is full.
+        '''
+        await self._wait(self._putters, self.full)
+        self.put_nowait(item)
+    
+    async def get(self):
+        '''
+        Removes and returns the next item, waiting for one while the
+        container is empty.
+        '''
+        await self._wait(self._getters, self.empty)
+        return self.get_nowait()
+    
+    async def get_many(self, n, timeout = None):
+        '''
+        Removes and returns a list of up to <arg>:n items in the order get
+        would return them. Waits until at least one item is available, or
+        for at most <arg>:timeout seconds if <arg>:timeout is not None, and
+        then takes every available item up to <arg>:n without waiting
+        again, so a consumer handles a burst of items with a single wakeup.
+        Returns an empty list if the timeout passes with the container
+        empty.
+        '''
+        if n < 1:
+            raise ValueError('<arg>:n must be positive')
+        if not await self._wait(self._getters, self.empty, timeout):
+            return []
+        items = list()
+        while len(items) < n and len(self):
+            items.append(self._get())
+        for i in range(min(len(items), len(self._putters))):
+            self._wakeup_next(self._putters)
+        return items
+
+class AsyncHeapQueue(AsyncContainer):
+    '''
+    asyncio priority queue backed by the array heaps of the package. get
+    returns the smallest item, or the largest if <arg>:largest is True.
+    With a <arg>:key function the items are ordered by their key, computed
+    once per item, and items with equal keys are returned in insertion
+    order. Derived class of AsyncContainer.
+    '''
+    def __init__(self, maxsize = None, largest = False, key = None):
+        '''
+        Constructor Arguments
+        ---------------------
+        maxsize: int or None (default: None)
+            Maximum number of items in the queue. Unbounded if None.
+        
+        largest: bool (default: False)
+            Return the largest item first if True, the smallest otherwise.
+        
+        key: callable or None (default: None)
+            Function computing the priority of an item. Items are compared
+            directly if None.
+        '''
+        super().__init__(maxsize)
+        if key is not None:
+            heap_type = KeyedMaxHeap if largest else KeyedMinHeap
+            self._heap = heap_type(key, stable = True)
+        else:
+            self._heap = MaxArrayHeap() if largest else MinArrayHeap()
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def _put(self, item):
+        self._heap.push(item)
+    
+    def _get(self):
+        return self._heap.pop()
+    
+    def peek(self):
+        '''
+        Returns the next item without removing it. Raises an EmptyError
+        exception if the queue is empty.
+        '''
+        if self.empty():
+            raise EmptyError('<method>:peek called on empty {:s}'.format(type(self).__name__))
+        return self._heap.peek()
+
+class AsyncStack(AsyncContainer):
+    '''
+    asyncio stack backed by a Stack over a Deque: get returns the most
+    recently put item. Derived class of AsyncContainer.
+    '''
+    def __init__(self, maxsize = None):
+        '''
+        Constructor Arguments
+        ---------------------
+        maxsize: int or None (default: None)
+            Maximum number of items in the stack. Unbounded if None.
+        '''
+        super().__init__(maxsize)
+        self._stack = Stack(container = Deque)
+    
+    def __len__(self):
+        return len(self._stack)
+    
+    def _put(self, item):
+        self._stack.push(item)
+    
+    def _get(self):
+        return self._stack.pop()
@@ -0,0 +1,517 @@
+from bisect import bisect_left, bisect_right
+from .binary_tree import EmptyError
+from .frozen import FrozenSortedKeys
+
+class LeafNode(object):
+    '''
+    Leaf node of a BPlusTree. Holds a sorted list of keys and links to the
+    neighbouring leaves for range scans.
+    '''
+    __slots__ = ('keys', 'next', 'prev')
+    
+    def __init__(self, keys = None):
+        self.keys = list() if keys is None else keys
+        self.next = None
+        self.prev = None
+
+class InternalNode(object):
+    '''
+    Internal node of a BPlusTree. Child i holds the keys k with
+    keys[i - 1] <= k < keys[i].
+    '''
+    __slots__ = ('keys', 'children')
+    
+    def __init__(self, keys = None, children = None):
+        self.keys = list() if keys is None else keys
+        self.children = list() if children is None else children
+
+class BPlusTree(object):
+    '''
+    B+ tree storing keys. Keys must be comparable objects. Every node holds
+    up to <arg>:fanout keys or children in a Python list that is searched
+    with bisect, and all keys live in leaves chained in key order, so the
+    tree is a few levels deep and range scans walk leaf lists instead of
+    chasing a pointer per key. Provides the API of BinaryTree.
+    '''
+    def __init__(self, keys = None, fanout = 64):
+        '''
+        Constructor Arguments:
+            keys : array-like
+                List of keys to add to tree (optional)
+            
+            fanout : int (default: 64)
+                Maximum number of keys per leaf and children per internal
+                node. Must be at least 4.
+        '''
+        if fanout < 4:
+            raise ValueError('<arg>:fanout must be at least 4')
+        self._fanout = int(fanout)
+        self._min = self._fanout >> 1
+        self.clear()
+        if keys is not None:
+            self.insert_multiple(keys)
+    
+    @classmethod
+    def from_sorted(cls, keys, fanout = 64):
+        '''
+        Returns a new tree instance containing the keys in the iterable
+        <arg>:keys, which must be in non-decreasing order. The leaves and
+        internal levels are packed bottom-up in O(n) time. Repeated keys are
+        stored once. Raises a ValueError exception if <arg>:keys is not
+        sorted.
+        '''
+        tree = cls(fanout = fanout)
+        unique = list()
+        for key in keys:
+            if unique and not unique[-1] < key:
+                if key < unique[-1]:
+                    raise ValueError('<arg>:keys must be sorted in non-decreasing order')
+                continue
+            unique.append(key)
+        tree._load_sorted(unique)
+        return tree
+    
+    def _load_sorted(self, keys):
+        '''
+        Private method that replaces the contents of the tree by the list
+        <arg>:keys of strictly increasing keys, packing the leaves and
+        internal levels bottom-up.
+        '''
+        self.clear()
+        if not keys:
+            return
+        leaves = [LeafNode(chunk) for chunk in self._chunks(keys)]
+        for left, right in zip(leaves, leaves[1:]):
+            left.next = right
+            right.prev = left
+        level = leaves
+        lows = [leaf.keys[0] for leaf in leaves]
+        while len(level) > 1:
+            parents = list()
+            parent_lows = list()
+            start = 0
+            for chunk in self._chunks(level):
+                stop = start + len(chunk)
+                parents.append(InternalNode(lows[start + 1:stop], chunk))
+                parent_lows.append(lows[start])
+                start = stop
+            level = parents
+            lows = parent_lows
+        self._root = level[0]
+        self._head = leaves[0]
+        self.size = len(keys)
+    
+    def _chunks(self, values):
+        '''
+        Private method that splits the list <arg>:values into the fewest
+        consecutive chunks of at most fanout values, with sizes differing by
+        at most one.
+        '''
+        count = -(-len(values) // self._fanout)
+        size, extra = divmod(len(values), count)
+        chunks = list()
+        start = 0
+        for i in range(count):
+            stop = start + size + (1 if i < extra else 0)
+            chunks.append(values[start:stop])
+            start = stop
+        return chunks
+    
+    def __str__(self):
+        return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
+    
+    def __repr__(self):
+        return self.__str__()
+    
+    def __len__(self):
+        return self.size
+    
+    def __contains__(self, key):
+        return self.has_key(key)
+    
+    def __iter__(self):
+        leaf = self._head
+        while leaf is not None:
+            for key in leaf.keys:
+                yield key
+            leaf = leaf.next
+    
+    def __reversed__(self):
+        leaf = self._last_leaf()
+        while leaf is not None:
+            for key in reversed(leaf.keys):
+                yield key
+            leaf = leaf.prev
+    
+    def __list__(self):
+        return [value for value in self.__iter__()]
+    
+    def __getstate__(self):
+        return {'fanout' : self._fanout, 'keys' : list(self)}
+    
+    def __setstate__(self, state):
+        self.__init__(fanout = state['fanout'])
+        self._load_sorted(state['keys'])
+    
+    def freeze(self, typecode = 'q'):
+        '''
+        Returns a FrozenSortedKeys holding the keys of the tree in a typed
+        array of typecode <arg>:typecode. Only numeric keys can be frozen;
+        a TypeError exception is raised if the tree holds any other key.
+        '''
+        return FrozenSortedKeys(self, typecode)
+    
+    def _find_leaf(self, key):
+        '''
+        Private method that returns the leaf whose key range contains
+        <arg>:key.
+        '''
+        node = self._root
+        while type(node) is InternalNode:
+            node = node.children[bisect_right(node.keys, key)]
+        return node
+    
+    def _last_leaf(self):
+        '''
+        Private method that returns the rightmost leaf.
+        '''
+        node = self._root
+        while type(node) is InternalNode:
+            node = node.children[-1]
+        return node
+    
+    def clear(self):
+        '''
+        Removes all values from the tree.
+        '''
+        self._root = LeafNode()
+        self._head = self._root
+        self.size = 0
+    
+    def empty(self):
+        '''
+        Returns True if the tree is empty, False otherwise.
+        '''
+        return self.size == 0
+    
+    def has_key(self, key):
+        '''
+        Returns True if the tree has the key, False otherwise.
+        '''
+        keys = self._find_leaf(key).keys
+        index = bisect_left(keys, key)
+        return index < len(keys) and not key < keys[index]
+    
+    def height(self):
+        '''
+        Returns the number of levels of the tree. Returns 0 if the tree is
+        empty.
+        '''
+        if self.size == 0:
+            return 0
+        height = 1
+        node = self._root
+        while type(node) is InternalNode:
+            node = node.children[0]
+            height += 1
+        return height
+    
+    def minimum(self):
+        '''
+        Returns the minimum key in a tree instance.
+        '''
+        return self._head.keys[0] if self.size else None
+    
+    def maximum(self):
+        '''
+        Returns the maximum key in a tree instance.
+        '''
+        return self._last_leaf().keys[-1] if self.size else None
+    
+    def _position(self, key, inclusive, upper):
+        '''
+        Private method that returns the (leaf, index) position of the least
+        key greater than (or equal to, if <arg>:inclusive is True)
+        <arg>:key if <arg>:upper is True, or of the greatest key less than
+        (or equal to) <arg>:key otherwise. Returns (None, None) if there is
+        no such key.
+        '''
+        leaf = self._find_leaf(key)
+        if upper:
+            index = (bisect_left if inclusive else bisect_right)(leaf.keys, key)
+            if index == len(leaf.keys):
+                leaf = leaf.next
+                index = 0
+        else:
+            index = (bisect_right if inclusive else bisect_left)(leaf.keys, key) - 1
+            if index < 0:
+                leaf = leaf.prev
+                index = None if leaf is None else len(leaf.keys) - 1
+        if leaf is None:
+            return None, None
+        return leaf, index
+    
+    def _key_at(self, key, inclusive, upper):
+        leaf, index = self._position(key, inclusive, upper)
+        return None if leaf is None else leaf.keys[index]
+    
+    def floor(self, key):
+        '''
+        Returns the greatest key in the tree less than or equal to <arg>:key,
+        or None if there is no such key.
+        '''
+        return self._key_at(key, True, False)
+    
+    def ceiling(self, key):
+        '''
+        Returns the least key in the tree greater than or equal to
+        <arg>:key, or None if there is no such key.
+        '''
+        return self._key_at(key, True, True)
+    
+    def lower(self, key):
+        '''
+        Returns the greatest key in the tree strictly less than <arg>:key,
+        or None if there is no such key.
+        '''
+        return self._key_at(key, False, False)
+    
+    def higher(self, key):
+        '''
+        Returns the least key in the tree strictly greater than <arg>:key,
+        or None if there is no such key.
+        '''
+        return self._key_at(key, False, True)
+    
+    def successor(self, key):
+        '''
+        Returns the key following <arg>:key in the tree. If <arg>:key is not
+        in the tree or has no successor, then a KeyError is raised.
+        '''
+        if not self.has_key(key):
+            raise KeyError('BPlusTree object does not contain key:{:s}'.format(str(key)))
+        value = self.higher(key)
+        if value is None:
+            raise KeyError('BPlusTree object does not contain key:{:s}'.format(str(key)))
+        return value
+    
+    def predecessor(self, key):
+        '''
+        Returns the key preceding <arg>:key in the tree. If <arg>:key is not
+        in the tree or has no predecessor, then a KeyError is raised.
+        '''
+        if not self.has_key(key):
+            raise KeyError('BPlusTree object does not contain key:{:s}'.format(str(key)))
+        value = self.lower(key)
+        if value is None:
+            raise KeyError('BPlusTree object does not contain key:{:s}'.format(str(key)))
+        return value
+    
+    def lub_key(self, key):
+        '''
+        Returns the least key greater than or equal to <arg>:key. Raises an
+        EmptyError exception if the tree is empty and a ValueError exception
+        if <arg>:key is greater than the tree maximum.
+        '''
+        if self.size == 0:
+            raise EmptyError('tree is empty')
+        value = self.ceiling(key)
+        if value is None:
+            raise ValueError('<arg>:key is greater than the tree maximum value')
+        return value
+    
+    def glb_key(self, key):
+        '''
+        Returns the greatest key less than or equal to <arg>:key. Raises an
+        EmptyError exception if the tree is empty and a ValueError exception
+        if <arg>:key is less than the tree minimum.
+        '''
+        if self.size == 0:
+            raise EmptyError('tree is empty')
+        value = self.floor(key)
+        if value is None:
+            raise ValueError('<arg>:key is less than the tree minimum value')
+        return value
+    
+    def irange(self, lo = None, hi = None, inclusive = (True, True), reverse = False):
+        '''
+        Lazily yields the keys k of the tree with <arg>:lo <= k <= <arg>:hi
+        in sorted order, or in reverse order if <arg>:reverse is True, by
+        walking the leaf chain from the boundary leaf. None leaves a bound
+        open and <arg>:inclusive gives whether each bound is included.
+        '''
+        lo_inclusive, hi_inclusive = inclusive
+        if self.size == 0:
+            return
+        if lo is not None and hi is not None:
+            # an empty range would start past its stop position and never stop
+            if hi < lo or (hi == lo and not (lo_inclusive and hi_inclusive)):
+                return
+        if not reverse:
+            if lo is None:
+                leaf, index = self._head, 0
+            else:
+                leaf, index = self._position(lo, lo_inclusive, True)
+            if hi is not None:
+                stop_leaf, stop = self._position(hi, not hi_inclusive, True)
+            else:
+                stop_leaf, stop = None, None
+            while leaf is not None:
+                end = stop if leaf is stop_leaf else len(leaf.keys)
+                for key in leaf.keys[index:end]:
+                    yield key
+                if leaf is stop_leaf:
+                    return
+                leaf, index = leaf.next, 0
+        else:
+            if hi is None:
+                leaf = self._last_leaf()
+                index = len(leaf.keys) - 1
+            else:
+                leaf, index = self._position(hi, hi_inclusive, False)
+            if lo is not None:
+                stop_leaf, stop = self._position(lo, not lo_inclusive, False)
+            else:
+                stop_leaf, stop = None, None
+            while leaf is not None:
+                end = stop if leaf is stop_leaf else -1
+                for i in range(index, end, -1):
+                    yield leaf.keys[i]
+                if leaf is stop_leaf:
+                    return
+                leaf = leaf.prev
+                if leaf is not None:
+                    index = len(leaf.keys) - 1
+    
+    def insert(self, key):
+        '''
+        Inserts key into a tree instance. If the tree already contains key,
+        then nothing happens. Full nodes are split on the way back up.
+        '''
+        path = list()
+        node = self._root
+        while type(node) is InternalNode:
+            index = bisect_right(node.keys, key)
+            path.append((node, index))
+            node = node.children[index]
+        keys = node.keys
+        index = bisect_left(keys, key)
+        if index < len(keys) and not key < keys[index]:
+            return
+        keys.insert(index, key)
+        self.size += 1
+        if len(keys) <= self._fanout:
+            return
+        mid = len(keys) >> 1
+        right = LeafNode(keys[mid:])
+        del keys[mid:]
+        right.next = node.next
+        if right.next is not None:
+            right.next.prev = right
+        right.prev = node
+        node.next = right
+        separator = right.keys[0]
+        while path:
+            parent, index = path.pop()
+            parent.keys.insert(index, separator)
+            parent.children.insert(index + 1, right)
+            if len(parent.children) <= self._fanout:
+                return
+            mid = len(parent.keys) >> 1
+            separator = parent.keys[mid]
+            right = InternalNode(parent.keys[mid + 1:], parent.children[mid + 1:])
+            del parent.keys[mid:]
+            del parent.children[mid + 1:]
+        self._root = InternalNode([separator], [self._root, right])
+    
+    def insert_multiple(self, keylist):
+        '''
+        Inserts each value contained in the iterable argument keylist.
+        '''
+        for key in keylist:
+            self.insert(key)
+    
+    def delete(self, key):
+        '''
+        Deletes key from a tree instance. If the tree does not contain key,
+        then a KeyError is raised. Underfull nodes borrow from or merge with
+        a sibling on the way back up.
+        '''
+        path = list()
+        node = self._root
+        while type(node) is InternalNode:
+            index = bisect_right(node.keys, key)
+            path.append((node, index))
+            node = node.children[index]
+        keys = node.keys
+        index = bisect_left(keys, key)
+        if index == len(keys) or key < keys[index]:
+            raise KeyError('BPlusTree object does not contain key:{:s}'.format(str(key)))
+        del keys[index]
+        self.size -= 1
+        while path and len(node.keys if type(node) is LeafNode else node.children) < self._min:
+            parent, index = path.pop()
+            if type(node) is LeafNode:
+                self._rebalance_leaf(parent, index)
+            else:
+                self._rebalance_internal(parent, index)
+            node = parent
+        if type(self._root) is InternalNode and len(self._root.children) == 1:
+            self._root = self._root.children[0]
+    
+    def _rebalance_leaf(self, parent, index):
+        '''
+        Private method that refills the underfull leaf at child position
+        <arg>:index of <arg>:parent from a sibling, or merges the two.
+        '''
+        leaf = parent.children[index]
+        left = parent.children[index - 1] if index > 0 else None
+        right = parent.children[index + 1] if index + 1 < len(parent.children) else None
+        if left is not None and len(left.keys) > self._min:
+            leaf.keys.insert(0, left.keys.pop())
+            parent.keys[index - 1] = leaf.keys[0]
+        elif right is not None and len(right.keys) > self._min:
+            leaf.keys.append(right.keys.pop(0))
+            parent.keys[index] = right.keys[0]
+        else:
+            if left is None:
+                left, leaf, index = leaf, right, index + 1
+            left.keys.extend(leaf.keys)
+            left.next = leaf.next
+            if leaf.next is not None:
+                leaf.next.prev = left
+            del parent.keys[index - 1]
+            del parent.children[index]
+    
+    def _rebalance_internal(self, parent, index):
+        '''
+        Private method that refills the underfull internal node at child
+        position <arg>:index of <arg>:parent from a sibling, or merges the
+        two, rotating separator keys through <arg>:parent.
+        '''
+        node = parent.children[index]
+        left = parent.children[index - 1] if index > 0 else None
+        right = parent.children[index + 1] if index + 1 < len(parent.children) else None
+        if left is not None and len(left.children) > self._min:
+            node.keys.insert(0, parent.keys[index - 1])
+            parent.keys[index - 1] = left.keys.pop()
+            node.children.insert(0, left.children.pop())
+        elif right is not None and len(right.children) > self._min:
+            node.keys.append(parent.keys[index])
+            parent.keys[index] = right.keys.pop(0)
+            node.children.append(right.children.pop(0))
+        else:
+            if left is None:
+                left, node, index = node, right, index + 1
+            left.keys.append(parent.keys[index - 1])
+            left.keys.extend(node.keys)
+            left.children.extend(node.children)
+            del parent.keys[index - 1]
+            del parent.children[index]
+    
+    def delete_multiple(self, keylist):
+        '''
+        Deletes each value contained in the iterable argument keylist.
+        '''
+        for key in keylist:
+            self.delete(key)
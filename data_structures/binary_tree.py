@@ -1,9 +1,15 @@
 # work in progress
 
+import random
+from array import array
+from .frozen import FrozenSortedKeys
+
 class EmptyError(Exception):
     pass
 
 class TreeNode(object):
+    __slots__ = ('key', 'parent', 'left', 'right')
+    
     def __init__(self, key, parent = None, left = None, right = None):
         self.key = key
         self.parent = parent
@@ -27,9 +33,77 @@ class BinaryTree(object):
                 List of keys to add to tree (optional)
         '''
         self.root = None
-        keys = list() if keys is None else keys
         self.size = 0
-        self.insert_multiple(keys)
+        if keys is not None:
+            keys = list(keys)
+            if self._is_sorted(keys):
+                self._load_sorted(keys)
+            else:
+                self.insert_multiple(keys)
+                
+    @classmethod
+    def from_sorted(cls, keys):
+        '''
+        Returns a new tree instance containing the keys in the iterable
+        <arg>:keys, which must be in non-decreasing order. The tree is built
+        perfectly balanced in O(n) time without any key searches. Repeated
+        keys are stored once. Raises a ValueError exception if <arg>:keys
+        is not sorted.
+        '''
+        keys = list(keys)
+        if not cls._is_sorted(keys, strict = False):
+            raise ValueError('<arg>:keys must be sorted in non-decreasing order')
+        tree = cls()
+        tree._load_sorted(keys)
+        return tree
+        
+    @staticmethod
+    def _is_sorted(keys, strict = True):
+        '''
+        Returns True if the list <arg>:keys is in increasing order, strictly
+        increasing if <arg>:strict is True.
+        '''
+        for i in range(1, len(keys)):
+            if keys[i] < keys[i - 1] or (strict and not keys[i - 1] < keys[i]):
+                return False
+        return True
+        
+    def _load_sorted(self, keys):
+        '''
+        Private method that replaces the contents of an empty tree with the
+        sorted list <arg>:keys, skipping repeated keys.
+        '''
+        unique = keys[:1]
+        for key in keys[1:]:
+            if unique[-1] < key:
+                unique.append(key)
+        self._link_sorted([self._create_node(key) for key in unique])
+        
+    def _link_sorted(self, nodes):
+        '''
+        Private method that replaces the contents of the tree with the
+        nodes in the list <arg>:nodes, which must be in increasing key
+        order, linked into a balanced tree in O(n).
+        '''
+        self.root = self._build_balanced(nodes, 0, len(nodes), None, 0,
+                                         len(nodes).bit_length() - 1)
+        self.size = len(nodes)
+        
+    def _build_balanced(self, nodes, lo, hi, parent, depth, max_depth):
+        '''
+        Private method that links the nodes in <arg>:nodes[lo:hi] into a
+        balanced subtree below <arg>:parent and returns its root. The root
+        of the subtree lies at <arg>:depth, and no node is deeper than
+        <arg>:max_depth.
+        '''
+        if lo >= hi:
+            return None
+        mid = (lo + hi) >> 1
+        node = nodes[mid]
+        node.parent = parent
+        node.left = self._build_balanced(nodes, lo, mid, node, depth + 1, max_depth)
+        node.right = self._build_balanced(nodes, mid + 1, hi, node, depth + 1, max_depth)
+        return node
             
     def __str__(self):
         return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
@@ -41,28 +115,65 @@ class BinaryTree(object):
         return self.size
             
     def __iter__(self):
-        if self.root is None:
-            return
-            yield
-        else:
-            node = self._minimum(self.root)
-            last_key = node.key
+        '''
+        Yields the keys in sorted order by walking child and parent
+        pointers, without comparing keys. Each step is amortized O(1).
+        '''
+        node = self._minimum(self.root)
+        while node is not None:
             yield node.key
-            n = 1
-            while n < self.size:
-                if node.left and node.left.key > last_key:
+            if node.right is not None:
+                node = node.right
+                while node.left is not None:
                     node = node.left
-                elif node.key > last_key:
-                    n += 1
-                    last_key = node.key
-                    yield node.key
-                elif node.right and node.right.key > last_key:
+            else:
+                parent = node.parent
+                while parent is not None and node is parent.right:
+                    node = parent
+                    parent = node.parent
+                node = parent
+                
+    def __reversed__(self):
+        '''
+        Yields the keys in reverse sorted order by walking child and parent
+        pointers, without comparing keys.
+        '''
+        node = self._maximum(self.root)
+        while node is not None:
+            yield node.key
+            if node.left is not None:
+                node = node.left
+                while node.right is not None:
                     node = node.right
-                else:
-                    node = node.parent
+            else:
+                parent = node.parent
+                while parent is not None and node is parent.left:
+                    node = parent
+                    parent = node.parent
+                node = parent
             
     def __list__(self):
         return [value for value in self.__iter__()]
+        
+    def __getstate__(self):
+        '''
+        Returns the keys of the tree in sorted order for pickling, so that
+        pickling takes O(n) without recursing through the nodes. Unpickling
+        rebuilds a balanced tree in O(n).
+        '''
+        return {'keys' : list(self)}
+        
+    def __setstate__(self, state):
+        self.__init__()
+        self._link_sorted([self._create_node(key) for key in state['keys']])
+        
+    def freeze(self, typecode = 'q'):
+        '''
+        Returns a FrozenSortedKeys holding the keys of the tree in a typed
+        array of typecode <arg>:typecode. Only numeric keys can be frozen;
+        a TypeError exception is raised if the tree holds any other key.
+        '''
+        return FrozenSortedKeys(self, typecode)
             
     def _search(self, key):
         '''
@@ -85,11 +196,10 @@ class BinaryTree(object):
         
     def clear(self):
         '''
-        Removes all values from the tree.
+        Removes all values from the tree in O(1) by dropping the root.
         '''
-        values = list(self)
-        self.delete_multiple(values)
         self.root = None
+        self.size = 0
         
     def empty(self):
         '''
@@ -103,27 +213,123 @@ class BinaryTree(object):
         '''
         return self._search(key) is not None
         
+    def __contains__(self, key):
+        return self.has_key(key)
+        
     def height(self):
         '''
         Returns the height of a tree instance starting at the root of the
-        tree. Returns 0 if the tree is empty.
+        tree. Returns 0 if the tree is empty. Computed in a single walk in
+        O(n) time and O(1) memory.
         '''
-        if self.root is None:
-            return 0
-        else:
-            height = 0
-            node_list = [self.root]
-            while node_list:
-                height += 1
-                temp = list()
-                for node in node_list:
-                    if node.left:
-                        temp.append(node.left)
-                    if node.right:
-                        temp.append(node.right)
-                node_list = temp
+        height = 0
+        for node, depth, blacks in self._walk_depths():
+            if depth > height:
+                height = depth
         return height
         
+    @staticmethod
+    def _black_count(node):
+        '''
+        Returns 1 if <arg>:node counts towards the black height of the
+        tree, 0 otherwise. Only red-black trees have black nodes.
+        '''
+        return 0
+        
+    def _walk_depths(self):
+        '''
+        Private generator that yields a (node, depth, blacks) triple for
+        every node in key order, where depth is the number of nodes on the
+        path from the root to the node and blacks the number of black nodes
+        among them. Steps along child and parent links only, so it takes
+        O(1) memory.
+        '''
+        node = self.root
+        if node is None:
+            return
+        depth = 1
+        blacks = self._black_count(node)
+        while True:
+            while node.left is not None:
+                node = node.left
+                depth += 1
+                blacks += self._black_count(node)
+            yield node, depth, blacks
+            while node.right is None:
+                while True:
+                    parent = node.parent
+                    if parent is None:
+                        return
+                    from_left = node is parent.left
+                    depth -= 1
+                    blacks -= self._black_count(node)
+                    node = parent
+                    if from_left:
+                        break
+                yield node, depth, blacks
+            node = node.right
+            depth += 1
+            blacks += self._black_count(node)
+            
+    def stats(self):
+        '''
+        Returns a dictionary of statistics on the shape of the tree,
+        gathered in a single pass using O(1) memory besides the histogram:
+            size : number of nodes
+            height : number of nodes on the longest path from the root
+            black_height : number of black nodes on every path from the
+                root (None unless the tree is a red-black tree)
+            depths : list of the number of nodes at each depth, starting
+                with the root
+        '''
+        size = 0
+        depths = []
+        for node, depth, blacks in self._walk_depths():
+            size += 1
+            while len(depths) < depth:
+                depths.append(0)
+            depths[depth - 1] += 1
+        return {'size' : size, 'height' : len(depths),
+                'black_height' : None, 'depths' : depths}
+                
+    def _validate_node(self, node):
+        '''
+        Hook called by validate for every node. Raises a ValueError
+        exception if an invariant of the derived class does not hold at
+        <arg>:node. Does nothing by default.
+        '''
+        pass
+        
+    def validate(self):
+        '''
+        Checks the parent links, the key order and the size of the tree as
+        well as the invariants of derived classes, such as the colors of a
+        red-black tree, in O(n) time and O(1) memory. Raises a ValueError
+        exception describing the first violation found, else returns True.
+        '''
+        if self.root is not None and self.root.parent is not None:
+            raise ValueError('root node has a parent')
+        size = 0
+        previous = None
+        leaf_blacks = None
+        for node, depth, blacks in self._walk_depths():
+            size += 1
+            for child in (node.left, node.right):
+                if child is not None and child.parent is not node:
+                    raise ValueError('broken parent link below key:{:s}'.format(str(node.key)))
+            if previous is not None and not previous.key < node.key:
+                raise ValueError('keys out of order at key:{:s}'.format(str(node.key)))
+            if node.left is None or node.right is None:
+                if leaf_blacks is None:
+                    leaf_blacks = blacks
+                elif blacks != leaf_blacks:
+                    raise ValueError('unequal black heights at key:{:s}'.format(str(node.key)))
+            self._validate_node(node)
+            previous = node
+        if size != self.size:
+            raise ValueError('tree holds {:d} nodes but its size is {:d}'.format(size, self.size))
+        return True
+        
     def _minimum(self, node):
         '''
         Private method that returns the minimum node of the tree with
@@ -169,15 +375,7 @@ class BinaryTree(object):
         then None is returned.
         '''
         node = self._search(key)
-        if node is None:
-            return None
-        elif node.right is not None:
-            return self._minimum(node.right)
-        temp = node.parent
-        while temp is not None and node == temp.right:
-            node = temp
-            temp = node.parent
-        return temp
+        return None if node is None else self._next_node(node)
         
     def successor(self, key):
         '''
@@ -198,15 +396,7 @@ class BinaryTree(object):
         then None is returned.
         '''
         node = self._search(key)
-        if node is None:
-            return None
-        elif node.left is not None:
-            return self._maximum(node.left)
-        temp = node.parent
-        while temp is not None and node == temp.left:
-            node = temp
-            temp = node.parent
-        return temp
+        return None if node is None else self._prev_node(node)
                 
     def predecessor(self, key):
         '''
@@ -230,31 +420,40 @@ class BinaryTree(object):
         '''
         return TreeNode(key)
                         
-    def insert(self, key):
+    def _insert_node(self, key):
         '''
-        Inserts a node containing value key into a tree instance. If no
-        node containing key is located within the tree instance, then
-        nothing happens.
-        '''
-        new_node = self._create_node(key)
-        node1 = None
-        node2 = self.root
-        while node2 is not None:
-            node1 = node2
-            if key == node2.key:
-                return
-            elif key < node2.key:
-                node2 = node2.left
-            else:
-                node2 = node2.right
-        new_node.parent = node1
-        if node1 is None:
-            self.root = new_node
-        elif key < node1.key:
-            node1.left = new_node
+        Private method that returns the node containing <arg>:key, first
+        linking in a new leaf node if the key is not in the tree. The node
+        is only created once the descent has found no match.
+        '''
+        parent = None
+        node = self.root
+        while node is not None:
+            parent = node
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                return node
+        node = self._create_node(key)
+        node.parent = parent
+        if parent is None:
+            self.root = node
+        elif key < parent.key:
+            parent.left = node
         else:
-            node1.right = new_node
+            parent.right = node
         self.size += 1
+        return node
+        
+    def insert(self, key):
+        '''
+        Inserts a node containing value key into a tree instance. If a
+        node containing key is already located within the tree instance,
+        then nothing happens.
+        '''
+        self._insert_node(key)
                 
     def insert_multiple(self, keylist):
         '''
@@ -264,147 +463,20 @@ class BinaryTree(object):
         for key in keylist:
             self.insert(key)
         
-    def delete(self, key):
-        '''
-        Deletes a node containing value key into a tree instance. If no
-        node containing key is located within the tree instance, then
-        a KeyError is raised.
-        '''
-        node = self._search(key)
-        if node is None:
-            raise KeyError('BinaryTree object does not contain key:{:s}'.format(str(key)))
-        if node.right is None and node.left is None:
-            if node is self.root:
-                self.root = None
-            elif node.key < node.parent.key:
-                node.parent.left = None
-            else:
-                node.parent.right = None                
-        elif node.right is not None and node.left is None:
-            if node is self.root:
-                self.root = node.right
-            elif node.key < node.parent.key:
-                node.parent.left = node.right
-            else:
-                node.parent.right = node.right
-            node.right.parent = node.parent
-        elif node.right is None and node.left is not None:
-            if node is self.root:
-                self.root = node.left
-            elif node.key < node.parent.key:
-                node.parent.left = node.left
-            else:
-                node.parent.right = node.left
-            node.left.parent = node.parent
-        else:
-            successor = self._successor(key)
-            if node.right is not successor:
-                successor.parent.left = None
-                successor.right = node.right
-                node.right.parent = successor
-            successor.left = node.left
-            successor.parent = node.parent
-            if node is self.root:
-                self.root = successor
-        del node
-        self.size -= 1
-            
-    def delete_multiple(self, keylist):
+    def _transplant(self, node, child):
         '''
-        Deletes one node in a tree instance for each value contained in the
-        iterable argument keylist. Calls on member method 'delete'.
+        Replaces the subtree rooted at <arg>:node with the subtree rooted at
+        <arg>:child, which may be None.
         '''
-        try:
-            for key in keylist:
-                self.delete(key)
-        except:
-            raise
-            
-    def lub_key(self, key):
-        if self.root is None:
-            raise EmptyError('tree is empty')
+        if node.parent is None:
+            self.root = child
+        elif node is node.parent.left:
+            node.parent.left = child
         else:
-            node1 = None
-            node2 = self.root
-            while node2 is not None:
-                node1 = node2
-                if key == node2.key:
-                    return key
-                elif key < node2.key:
-                    node2 = node2.left
-                else:
-                    node2 = node2.right
-            if key > self.maximum():
-                raise ValueError('<arg>:key is greater than the tree maximum value')
-            elif key < node1.key:
-                lub_key = node1.key
-                while True:
-                    temp = self._predecessor(node1.key)
-                    if temp is None:
-                        return self.minimum()
-                    else:
-                        node1 = temp
-                        if key < node1.key:
-                            lub_key = node1.key
-                        else:
-                            break
-                return lub_key
-            else:
-                while True:
-                    node1 = self._successor(node1.key)
-                    if key < node1.key:
-                        return node1.key
+            node.parent.right = child
+        if child is not None:
+            child.parent = node.parent
         
-    def glb_key(self, key):
-        if self.root is None:
-            raise EmptyError('tree is empty')
-        else:
-            node1 = None
-            node2 = self.root
-            while node2 is not None:
-                node1 = node2
-                if key == node2.key:
-                    return key
-                elif key < node2.key:
-                    node2 = node2.left
-                else:
-                    node2 = node2.right
-            if key < self.minimum():
-                raise ValueError('<arg>:key is less than the tree minimum value')
-            elif key > node1.key:
-                glb_key = node1.key
-                while True:
-                    temp = self._successor(node1.key)
-                    if temp is None:
-                        return self.maximum()
-                    else:
-                        node1 = temp
-                        if key > node1.key:
-                            glb_key = node1.key
-                        else:
-                            break
-                return glb_key
-            else:
-                while True:
-                    node1 = self._predecessor(node1.key)
-                    if key > node1.key:
-                        return node1.key
-            
-class RedBlackNode(TreeNode):
-    def __init__(self, key, color, parent = None, left = None, right = None):
-        super().__init__(key, parent, left, right)
-        if color not in ['r', 'b']:
-            raise ValueError("arg color must be either 'r' or 'b'")
-        self.color = color
-    
-class RedBlackTree(BinaryTree):
-    def __init__(self, keys = None):
-        super().__init__(keys)
-        self.nil = RedBlackNode(None, 'b')
-                        
-    def _create_node(self, key):
-        return RedBlackNode(key, 'r')
-                
     def _left_rotate(self, node):
         y = node.right
         node.right = y.left
@@ -435,151 +507,2213 @@ class RedBlackTree(BinaryTree):
         y.right = node
         node.parent = y
         
-    def _rb_insert_fixup(self, node):
-        while node is not self.root and node.parent.color == 'r':
-            if node.parent is not self.root:
-                if node.parent is node.parent.parent.left:
-                    y = node.parent.parent.right
-                    if y is not None and y.color == 'r':
-                        node.parent.color = 'b'
-                        y.color = 'b'
-                        node.parent.parent.color = 'r'
-                        node = node.parent.parent
-                    else:
-                        if node is node.parent.right:
-                            node = node.parent
-                            self._left_rotate(node)
-                        node.parent.color = 'b'
-                        node.parent.parent.color = 'r'
-                        self._right_rotate(node.parent.parent)
-                else:
-                    y = node.parent.parent.left
-                    if y is not None and y.color == 'r':
-                        node.parent.color = 'b'
-                        y.color = 'b'
-                        node.parent.parent.color = 'r'
-                        node = node.parent.parent
-                    else:
-                        if node is node.parent.left:
-                            node = node.parent
-                            self._right_rotate(node)
-                        node.parent.color = 'b'
-                        node.parent.parent.color = 'r'
-                        self._left_rotate(node.parent.parent)
-        self.root.color = 'b'
-                        
-    
-    def insert(self, key):
-        node = self._create_node(key)
-        y = None
-        x = self.root
-        while x is not None:
-            y = x
-            if key == x.key:
-                return
-            elif key < x.key:
-                x = x.left
-            else:
-                x = x.right
-        node.parent = y
-        if y is None:
-            self.root = node
-        elif node.key < y.key:
-            y.left = node
+    @staticmethod
+    def _walk(node):
+        '''
+        Private generator that yields the nodes of the subtree <arg>:node in
+        no particular order.
+        '''
+        stack = [node] if node is not None else []
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.left is not None:
+                stack.append(node.left)
+            if node.right is not None:
+                stack.append(node.right)
+                
+    def _split_size(self, left, right, total):
+        '''
+        Private method that returns the number of nodes in the subtree
+        <arg>:left, given that <arg>:left and <arg>:right hold <arg>:total
+        nodes. The subtrees are walked in lockstep, so the cost is linear
+        in the smaller of the two.
+        '''
+        left_nodes, right_nodes = self._walk(left), self._walk(right)
+        count = 0
+        while True:
+            if next(left_nodes, None) is None:
+                return count
+            if next(right_nodes, None) is None:
+                return total - count
+            count += 1
+            
+    def delete(self, key):
+        '''
+        Deletes a node containing value key into a tree instance. If no
+        node containing key is located within the tree instance, then
+        a KeyError is raised.
+        '''
+        node = self._search(key)
+        if node is None:
+            raise KeyError('BinaryTree object does not contain key:{:s}'.format(str(key)))
+        if node.left is None:
+            self._transplant(node, node.right)
+        elif node.right is None:
+            self._transplant(node, node.left)
         else:
-            y.right = node
-        self._rb_insert_fixup(node)
-        self.size += 1
+            successor = self._minimum(node.right)
+            if successor.parent is not node:
+                self._transplant(successor, successor.right)
+                successor.right = node.right
+                successor.right.parent = successor
+            self._transplant(node, successor)
+            successor.left = node.left
+            successor.left.parent = successor
+        del node
+        self.size -= 1
+            
+    def delete_multiple(self, keylist):
+        '''
+        Deletes one node in a tree instance for each value contained in the
+        iterable argument keylist. Calls on member method 'delete'.
+        '''
+        for key in keylist:
+            self.delete(key)
+            
+    def _next_node(self, node):
+        '''
+        Private method that returns the node following <arg>:node in key
+        order, or None if <arg>:node is the maximum. Steps along child and
+        parent pointers only, without comparing keys.
+        '''
+        if node.right is not None:
+            return self._minimum(node.right)
+        parent = node.parent
+        while parent is not None and node is parent.right:
+            node = parent
+            parent = node.parent
+        return parent
         
-    def _rb_delete_fixup(self, node):
-        while node is not self.root and node.color == 'b':
-            if node is node.parent.left:
-                w = node.parent.right
-                if w is not None and w.color == 'r':
-                    w.color = 'b'
-                    node.parent.color = 'r'
-                    self._left_rotate(node.parent)
-                    w = node.parent.right
-                w_left_color = 'b' if w.left is None else w.left.color
-                w_right_color = 'b' if w.right is None else w.right.color
-                if w is not None and w_left_color == 'b' and w_right_color == 'b':
-                    w.color = 'r'
-                    node = node.parent
-                elif w is not None:
-                    if w_right_color == 'b':
-                        w.left.color = 'b'
-                        w.color = 'r'
-                        self._right_rotate(w)
-                        w = node.parent.right
-                    w.color = node.parent.color
-                    node.parent.color = 'b'
-                    w.right.color = 'b'
-                    self._left_rotate(node.parent)
-                    node = self.root
+    def _prev_node(self, node):
+        '''
+        Private method that returns the node preceding <arg>:node in key
+        order, or None if <arg>:node is the minimum. Steps along child and
+        parent pointers only, without comparing keys.
+        '''
+        if node.left is not None:
+            return self._maximum(node.left)
+        parent = node.parent
+        while parent is not None and node is parent.left:
+            node = parent
+            parent = node.parent
+        return parent
+        
+    def _floor_node(self, key, inclusive = True):
+        '''
+        Private method that returns the node with the greatest key less than
+        (or equal to, if <arg>:inclusive is True) <arg>:key in a single
+        descent from the root, or None if there is no such node.
+        '''
+        best = None
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                best = node
+                node = node.right
+            elif key < node.key or not inclusive:
+                node = node.left
             else:
-                w = node.parent.left
-                if w is not None and w.color == 'r':
-                    w.color = 'b'
-                    node.parent.color = 'r'
-                    self._right_rotate(node.parent)
-                    w = node.parent.left
-                w_left_color = 'b' if w.left is None else w.left.color
-                w_right_color = 'b' if w.right is None else w.right.color
-                if w is not None and w_left_color == 'b' and w_right_color == 'b':
-                    w.color = 'r'
-                    node = node.parent
-                elif w is not None:
-                    if w_left_color == 'b':
-                        w.right.color = 'b'
-                        w.color = 'r'
-                        self._left_rotate(w)
-                        w = node.parent.left
-                    w.color = node.parent.color
-                    node.parent.color = 'b'
-                    w.left.color = 'b'
-                    self._right_rotate(node.parent)
-                    node = self.root
-        node.color = 'b'
+                return node
+        return best
         
-    def delete(self, key):
-        z = self._search(key)
-        if z is None:
-            raise KeyError('BinaryTree object does not contain key:{:s}'.format(str(key)))
-        y = z
-        y_original_color = y.color
-        if z.left is None:
-            x = z.right
-            if z.parent is None:
-                self.root = z.right
-            elif z is z.parent.left:
-                z.parent.left = z.right
+    def _ceiling_node(self, key, inclusive = True):
+        '''
+        Private method that returns the node with the least key greater than
+        (or equal to, if <arg>:inclusive is True) <arg>:key in a single
+        descent from the root, or None if there is no such node.
+        '''
+        best = None
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                best = node
+                node = node.left
+            elif node.key < key or not inclusive:
+                node = node.right
             else:
-                z.parent.right = z.right
-            z.right.parent = z.parent
-        elif z.right is None:
-            x = z.left
-            if z.parent is None:
-                self.root = z.left
-            elif z is z.parent.left:
-                z.parent.left = z.left
+                return node
+        return best
+        
+    def floor(self, key):
+        '''
+        Returns the greatest key in the tree less than or equal to <arg>:key,
+        or None if there is no such key.
+        '''
+        node = self._floor_node(key)
+        return None if node is None else node.key
+        
+    def ceiling(self, key):
+        '''
+        Returns the least key in the tree greater than or equal to
+        <arg>:key, or None if there is no such key.
+        '''
+        node = self._ceiling_node(key)
+        return None if node is None else node.key
+        
+    def lower(self, key):
+        '''
+        Returns the greatest key in the tree strictly less than <arg>:key,
+        or None if there is no such key.
+        '''
+        node = self._floor_node(key, inclusive = False)
+        return None if node is None else node.key
+        
+    def higher(self, key):
+        '''
+        Returns the least key in the tree strictly greater than <arg>:key,
+        or None if there is no such key.
+        '''
+        node = self._ceiling_node(key, inclusive = False)
+        return None if node is None else node.key
+        
+    def _irange_nodes(self, lo, hi, inclusive, reverse):
+        '''
+        Private method that lazily yields the nodes of the range described in
+        <method>:irange.
+        '''
+        lo_inclusive, hi_inclusive = inclusive
+        if not reverse:
+            if lo is None:
+                node = self._minimum(self.root)
             else:
-                z.parent.right = z.left
-            z.left.parent = z.parent
+                node = self._ceiling_node(lo, lo_inclusive)
+            while node is not None:
+                if hi is not None and (hi < node.key or
+                                       (not hi_inclusive and not node.key < hi)):
+                    return
+                yield node
+                node = self._next_node(node)
         else:
-            y = self._minimum(z.right)
-            y_original_color = y.color
-            x = y.right
-            if y.parent is z:
-                x.parent = y
+            if hi is None:
+                node = self._maximum(self.root)
             else:
-                if y.parent is None:
-                    self.root = y.right
-                elif y is y.parent.left:
-                    y.parent.left = y.right
-                else:
-                    y.parent.right = y.right
-                y.right.parent = y.parent         
-        if y_original_color == 'b':
-            self._rb_delete_fixup(x)
-        del z
-        self.size -= 1
+                node = self._floor_node(hi, hi_inclusive)
+            while node is not None:
+                if lo is not None and (node.key < lo or
+                                       (not lo_inclusive and not lo < node.key)):
+                    return
+                yield node
+                node = self._prev_node(node)
+                
+    def irange(self, lo = None, hi = None, inclusive = (True, True), reverse = False):
+        '''
+        Lazily yields the keys k of the tree with <arg>:lo <= k <= <arg>:hi
+        in sorted order, or in reverse order if <arg>:reverse is True. The
+        iteration starts at the boundary node found in one descent and then
+        steps between neighbouring nodes.
+        
+        Arguments:
+            lo, hi : object or None
+                Bounds of the range. None leaves that side unbounded.
+                
+            inclusive : (bool, bool) (default: (True, True))
+                Whether each of <arg>:lo and <arg>:hi is included.
+        '''
+        for node in self._irange_nodes(lo, hi, inclusive, reverse):
+            yield node.key
+            
+    def islice(self, start = None, stop = None, reverse = False):
+        '''
+        Lazily yields the keys at positions <arg>:start to <arg>:stop
+        (exclusive) of the sorted order, or of the reverse order if
+        <arg>:reverse is True. Negative positions count from the end.
+        '''
+        start, stop, _ = slice(start, stop).indices(self.size)
+        if start >= stop:
+            return
+        if reverse:
+            node = self._maximum(self.root)
+            step = self._prev_node
+        else:
+            node = self._minimum(self.root)
+            step = self._next_node
+        for _ in range(start):
+            node = step(node)
+        for _ in range(stop - start):
+            yield node.key
+            node = step(node)
+            
+    def lub_key(self, key):
+        '''
+        Returns the least upper bound of <arg>:key in the tree, i.e. the
+        least key greater than or equal to <arg>:key. Raises an EmptyError
+        exception if the tree is empty and a ValueError exception if
+        <arg>:key is greater than the tree maximum.
+        '''
+        if self.root is None:
+            raise EmptyError('tree is empty')
+        node = self._ceiling_node(key)
+        if node is None:
+            raise ValueError('<arg>:key is greater than the tree maximum value')
+        return node.key
+        
+    def glb_key(self, key):
+        '''
+        Returns the greatest lower bound of <arg>:key in the tree, i.e. the
+        greatest key less than or equal to <arg>:key. Raises an EmptyError
+        exception if the tree is empty and a ValueError exception if
+        <arg>:key is less than the tree minimum.
+        '''
+        if self.root is None:
+            raise EmptyError('tree is empty')
+        node = self._floor_node(key)
+        if node is None:
+            raise ValueError('<arg>:key is less than the tree minimum value')
+        return node.key
+            
+class SplayTree(BinaryTree):
+    '''
+    Self-adjusting binary search tree. Every search, insertion and deletion
+    splays the node it reaches to the root with zig-zig and zig-zag
+    rotations, so operations take amortized O(log n) time and recently
+    accessed keys stay near the root, which makes repeated access to a
+    small set of hot keys fast. Since lookups restructure the tree, a
+    splay tree must not be read from several threads at once. Derived
+    class of BinaryTree.
+    '''
+    def _splay(self, node):
+        '''
+        Private method that rotates <arg>:node up to the root.
+        '''
+        while node.parent is not None:
+            parent = node.parent
+            grandparent = parent.parent
+            if grandparent is None:
+                if node is parent.left:
+                    self._right_rotate(parent)
+                else:
+                    self._left_rotate(parent)
+            elif node is parent.left and parent is grandparent.left:
+                self._right_rotate(grandparent)
+                self._right_rotate(parent)
+            elif node is parent.right and parent is grandparent.right:
+                self._left_rotate(grandparent)
+                self._left_rotate(parent)
+            elif node is parent.left:
+                self._right_rotate(parent)
+                self._left_rotate(grandparent)
+            else:
+                self._left_rotate(parent)
+                self._right_rotate(grandparent)
+                
+    def _search(self, key):
+        '''
+        Private method returns the node containing key if key is found,
+        else returns None. The last node visited is splayed to the root.
+        '''
+        last = None
+        node = self.root
+        while node is not None:
+            last = node
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                break
+        if last is not None:
+            self._splay(last)
+        return node
+        
+    def insert(self, key):
+        self._splay(self._insert_node(key))
+        
+class TreapNode(TreeNode):
+    __slots__ = ('priority',)
+    
+    def __init__(self, key, priority, parent = None, left = None, right = None):
+        super().__init__(key, parent, left, right)
+        self.priority = priority
+        
+class Treap(BinaryTree):
+    '''
+    Binary search tree whose nodes also carry random priorities kept in
+    max-heap order, which makes the shape of the tree that of a random
+    insertion order whatever the actual order: searches, insertions and
+    deletions take expected O(log n) time. A treap is split at a key or
+    two treaps are joined in expected O(log n). Derived class of
+    BinaryTree.
+    '''
+    def __init__(self, keys = None, seed = None):
+        '''
+        Constructor Arguments:
+            keys : array-like
+                List of keys to add to tree (optional)
+            seed : hashable
+                Seed of the random priorities (optional)
+        '''
+        self._random = random.Random(seed).random
+        super().__init__(keys)
+        
+    def _create_node(self, key):
+        return TreapNode(key, self._random())
+        
+    def _build_balanced(self, nodes, lo, hi, parent, depth, max_depth):
+        '''
+        Scales the random priority of each node into a band below those of
+        the shallower levels, so a balanced tree is also in heap order.
+        '''
+        node = super()._build_balanced(nodes, lo, hi, parent, depth, max_depth)
+        if node is not None:
+            node.priority = 1.0 - (depth + node.priority) / (max_depth + 1)
+        return node
+        
+    def insert(self, key):
+        node = self._insert_node(key)
+        while node.parent is not None and node.parent.priority < node.priority:
+            if node is node.parent.left:
+                self._right_rotate(node.parent)
+            else:
+                self._left_rotate(node.parent)
+                
+    def _merge(self, left, right):
+        '''
+        Private method that merges the detached subtrees <arg>:left and
+        <arg>:right, all of whose keys are in increasing order, and returns
+        the root of the result.
+        '''
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if right.priority < left.priority:
+            left.right = self._merge(left.right, right)
+            left.right.parent = left
+            return left
+        right.left = self._merge(left, right.left)
+        right.left.parent = right
+        return right
+        
+    def _split_nodes(self, node, key):
+        '''
+        Private method that splits the subtree <arg>:node into the subtrees
+        of keys less than <arg>:key and of the other keys and returns their
+        roots.
+        '''
+        if node is None:
+            return None, None
+        if node.key < key:
+            left, right = self._split_nodes(node.right, key)
+            node.right = left
+            if left is not None:
+                left.parent = node
+            if right is not None:
+                right.parent = None
+            return node, right
+        left, right = self._split_nodes(node.left, key)
+        node.left = right
+        if right is not None:
+            right.parent = node
+        if left is not None:
+            left.parent = None
+        return left, node
+        
+    def delete(self, key):
+        '''
+        Deletes the node containing <arg>:key, replacing it by the merge of
+        its subtrees. Raises a KeyError if the key is not in the tree.
+        '''
+        node = self._search(key)
+        if node is None:
+            raise KeyError('BinaryTree object does not contain key:{:s}'.format(str(key)))
+        self._transplant(node, self._merge(node.left, node.right))
+        self.size -= 1
+        
+    def _validate_node(self, node):
+        '''
+        Checks that the children of <arg>:node have lower priorities.
+        '''
+        for child in (node.left, node.right):
+            if child is not None and not child.priority < node.priority:
+                raise ValueError('heap order violated below key:{:s}'.format(str(node.key)))
+                
+    def split(self, key):
+        '''
+        Moves the keys of the treap into two new treaps and returns them as
+        a (lower, upper) pair, where lower holds the keys less than
+        <arg>:key and upper the others. Leaves the treap empty. The treaps
+        are built in expected O(log n); counting their sizes takes time
+        linear in the smaller one.
+        '''
+        left, right = self._split_nodes(self.root, key)
+        for root in (left, right):
+            if root is not None:
+                root.parent = None
+        lower, upper = type(self)(), type(self)()
+        lower.root, upper.root = left, right
+        lower.size = self._split_size(left, right, self.size)
+        upper.size = self.size - lower.size
+        self.clear()
+        return lower, upper
+        
+    @staticmethod
+    def join(left, right):
+        '''
+        Returns a new treap holding the keys of the treaps <arg>:left and
+        <arg>:right and empties both, in expected O(log n). Every key of
+        <arg>:left must be less than every key of <arg>:right; a ValueError
+        exception is raised otherwise.
+        '''
+        if type(left) is not type(right):
+            raise TypeError('cannot join {:s} and {:s}'.format(
+                type(left).__name__, type(right).__name__))
+        if left is right:
+            raise ValueError('cannot join a tree with itself')
+        if left.size and right.size and not left.maximum() < right.minimum():
+            raise ValueError('keys of <arg>:left must be less than keys of <arg>:right')
+        tree = type(left)()
+        tree.root = tree._merge(left.root, right.root)
+        if tree.root is not None:
+            tree.root.parent = None
+        tree.size = left.size + right.size
+        left.clear()
+        right.clear()
+        return tree
+        
+class RedBlackNode(TreeNode):
+    '''
+    Red-black tree node. The color is stored as the boolean attribute red;
+    the color property gives it as 'r' or 'b'.
+    '''
+    __slots__ = ('red',)
+    
+    def __init__(self, key, color, parent = None, left = None, right = None):
+        super().__init__(key, parent, left, right)
+        if color not in ['r', 'b']:
+            raise ValueError("arg color must be either 'r' or 'b'")
+        self.red = color == 'r'
+        
+    @property
+    def color(self):
+        return 'r' if self.red else 'b'
+    
+class RedBlackTree(BinaryTree):
+    def _create_node(self, key):
+        return RedBlackNode(key, 'r')
+        
+    def _build_balanced(self, nodes, lo, hi, parent, depth, max_depth):
+        '''
+        Colors the nodes on the deepest level of a balanced subtree red and
+        every other node black, so all paths share the same black height.
+        '''
+        node = super()._build_balanced(nodes, lo, hi, parent, depth, max_depth)
+        if node is not None:
+            node.red = depth == max_depth and depth > 0
+        return node
+                
+    def _rb_insert_fixup(self, node):
+        '''
+        Restores the red-black properties after the red node <arg>:node was
+        linked in. Returns True if the root had to be recolored black, i.e.
+        the black height of the tree grew.
+        '''
+        while node is not self.root and node.parent.red:
+            parent = node.parent
+            grandparent = parent.parent
+            if parent is grandparent.left:
+                y = grandparent.right
+                if y is not None and y.red:
+                    parent.red = False
+                    y.red = False
+                    grandparent.red = True
+                    node = grandparent
+                else:
+                    if node is parent.right:
+                        node = parent
+                        self._left_rotate(node)
+                        parent = node.parent
+                    parent.red = False
+                    grandparent.red = True
+                    self._right_rotate(grandparent)
+            else:
+                y = grandparent.left
+                if y is not None and y.red:
+                    parent.red = False
+                    y.red = False
+                    grandparent.red = True
+                    node = grandparent
+                else:
+                    if node is parent.left:
+                        node = parent
+                        self._right_rotate(node)
+                        parent = node.parent
+                    parent.red = False
+                    grandparent.red = True
+                    self._left_rotate(grandparent)
+        grew = self.root.red
+        self.root.red = False
+        return grew
+        
+    def _rb_insert(self, key):
+        '''
+        Private method that returns the node containing <arg>:key, first
+        linking in a new node and rebalancing if the key is not in the tree.
+        The node is only created once the descent has found no match.
+        '''
+        y = None
+        x = self.root
+        while x is not None:
+            y = x
+            if key < x.key:
+                x = x.left
+            elif x.key < key:
+                x = x.right
+            else:
+                return x
+        node = self._create_node(key)
+        node.parent = y
+        if y is None:
+            self.root = node
+        elif key < y.key:
+            y.left = node
+        else:
+            y.right = node
+        self._update_path(y)
+        self._rb_insert_fixup(node)
+        self.size += 1
+        return node
+        
+    def insert(self, key):
+        self._rb_insert(key)
+        
+    def _update_path(self, node):
+        '''
+        Hook called after a node is linked into or unlinked from the tree,
+        before rebalancing, with the lowest node whose subtree changed (None
+        if the tree became empty). Does nothing by default; derived classes
+        override it to maintain augmented node data up to the root.
+        '''
+        pass
+        
+    @staticmethod
+    def _black_count(node):
+        return 0 if node.red else 1
+        
+    def _validate_node(self, node):
+        '''
+        Checks that the root is black and that a red node has no red child.
+        '''
+        if node.red:
+            if node.parent is None:
+                raise ValueError('root node is red')
+            for child in (node.left, node.right):
+                if child is not None and child.red:
+                    raise ValueError('red node with red child at key:{:s}'.format(str(node.key)))
+                    
+    def stats(self):
+        stats = super().stats()
+        stats['black_height'] = self._black_height(self.root)
+        return stats
+        
+    def _rb_delete_fixup(self, node, parent):
+        '''
+        Restores the red-black properties after a black node was removed
+        above <arg>:node. <arg>:node may be None, in which case it is the
+        missing child of <arg>:parent.
+        '''
+        while node is not self.root and (node is None or not node.red):
+            if node is parent.left:
+                w = parent.right
+                if w.red:
+                    w.red = False
+                    parent.red = True
+                    self._left_rotate(parent)
+                    w = parent.right
+                left_red = w.left is not None and w.left.red
+                right_red = w.right is not None and w.right.red
+                if not left_red and not right_red:
+                    w.red = True
+                    node = parent
+                    parent = node.parent
+                else:
+                    if not right_red:
+                        w.left.red = False
+                        w.red = True
+                        self._right_rotate(w)
+                        w = parent.right
+                    w.red = parent.red
+                    parent.red = False
+                    w.right.red = False
+                    self._left_rotate(parent)
+                    node = self.root
+            else:
+                w = parent.left
+                if w.red:
+                    w.red = False
+                    parent.red = True
+                    self._right_rotate(parent)
+                    w = parent.left
+                left_red = w.left is not None and w.left.red
+                right_red = w.right is not None and w.right.red
+                if not left_red and not right_red:
+                    w.red = True
+                    node = parent
+                    parent = node.parent
+                else:
+                    if not left_red:
+                        w.right.red = False
+                        w.red = True
+                        self._left_rotate(w)
+                        w = parent.left
+                    w.red = parent.red
+                    parent.red = False
+                    w.left.red = False
+                    self._right_rotate(parent)
+                    node = self.root
+        if node is not None:
+            node.red = False
+        
+    def delete(self, key):
+        z = self._search(key)
+        if z is None:
+            raise KeyError('BinaryTree object does not contain key:{:s}'.format(str(key)))
+        self._rb_delete(z)
+        
+    def _rb_delete(self, z):
+        '''
+        Private method that unlinks the node <arg>:z from the tree and
+        rebalances. Other nodes keep their keys; the successor node is moved
+        into the place of <arg>:z when it has two children.
+        '''
+        y = z
+        y_original_red = y.red
+        if z.left is None:
+            x = z.right
+            x_parent = z.parent
+            self._transplant(z, z.right)
+        elif z.right is None:
+            x = z.left
+            x_parent = z.parent
+            self._transplant(z, z.left)
+        else:
+            y = self._minimum(z.right)
+            y_original_red = y.red
+            x = y.right
+            if y.parent is z:
+                x_parent = y
+            else:
+                x_parent = y.parent
+                self._transplant(y, y.right)
+                y.right = z.right
+                y.right.parent = y
+            self._transplant(z, y)
+            y.left = z.left
+            y.left.parent = y
+            y.red = z.red
+        self._update_path(x_parent)
+        if not y_original_red:
+            self._rb_delete_fixup(x, x_parent)
+        del z
+        self.size -= 1
+        
+    @staticmethod
+    def _black_height(node):
+        '''
+        Private method that returns the number of black nodes on a path
+        from <arg>:node down to a missing child, counting <arg>:node.
+        '''
+        height = 0
+        while node is not None:
+            height += not node.red
+            node = node.left
+        return height
+        
+    @staticmethod
+    def _detach(node):
+        '''
+        Private method that unlinks and returns the children of <arg>:node.
+        '''
+        left, right = node.left, node.right
+        if left is not None:
+            left.parent = None
+        if right is not None:
+            right.parent = None
+        return left, right
+        
+    def _join(self, left, lh, node, right, rh):
+        '''
+        Private method that links the detached subtrees <arg>:left and
+        <arg>:right, of black heights <arg>:lh and <arg>:rh, on either side
+        of <arg>:node and returns the root and black height of the result.
+        Keys in <arg>:left must be less than the key of <arg>:node and keys
+        in <arg>:right greater. <arg>:node is linked into the spine of the
+        taller subtree at the black height of the shorter one and the
+        insert fixup restores the colors, so the cost is O(|lh - rh| + 1).
+        '''
+        if left is not None and left.red:
+            left.red = False
+            lh += 1
+        if right is not None and right.red:
+            right.red = False
+            rh += 1
+        node.parent = None
+        if lh == rh:
+            node.left, node.right = left, right
+            node.red = False
+            if left is not None:
+                left.parent = node
+            if right is not None:
+                right.parent = node
+            self._update_path(node)
+            return node, lh + 1
+        parent = None
+        if lh > rh:
+            root, child, height = left, left, lh
+            while height > rh or (child is not None and child.red):
+                height -= not child.red
+                parent, child = child, child.right
+            parent.right = node
+            node.left, node.right = child, right
+        else:
+            root, child, height = right, right, rh
+            while height > lh or (child is not None and child.red):
+                height -= not child.red
+                parent, child = child, child.left
+            parent.left = node
+            node.left, node.right = left, child
+        node.parent = parent
+        node.red = True
+        if node.left is not None:
+            node.left.parent = node
+        if node.right is not None:
+            node.right.parent = node
+        self._update_path(node)
+        self.root = root
+        grew = self._rb_insert_fixup(node)
+        return self.root, max(lh, rh) + grew
+        
+    def _split(self, root, height, key):
+        '''
+        Private method that splits the detached subtree <arg>:root of black
+        height <arg>:height around <arg>:key. Returns the root and black
+        height of the subtree of smaller keys, the node containing
+        <arg>:key (None if there is none), and the root and black height of
+        the subtree of greater keys.
+        '''
+        if root is None:
+            return None, 0, None, None, 0
+        left, right = self._detach(root)
+        height -= not root.red
+        if key < root.key:
+            ll, llh, found, lr, lrh = self._split(left, height, key)
+            right, rh = self._join(lr, lrh, root, right, height)
+            return ll, llh, found, right, rh
+        elif root.key < key:
+            rl, rlh, found, rr, rrh = self._split(right, height, key)
+            left, lh = self._join(left, height, root, rl, rlh)
+            return left, lh, found, rr, rrh
+        return left, height, root, right, height
+        
+    def _split_last(self, root, height):
+        '''
+        Private method that unlinks the maximum node of the detached,
+        non-empty subtree <arg>:root. Returns the root and black height of
+        the remaining subtree and the unlinked node.
+        '''
+        left, right = self._detach(root)
+        height -= not root.red
+        if right is None:
+            return left, height, root
+        right, rh, last = self._split_last(right, height)
+        left, lh = self._join(left, height, root, right, rh)
+        return left, lh, last
+        
+    def _join2(self, left, lh, right, rh):
+        '''
+        Private method that concatenates the detached subtrees <arg>:left
+        and <arg>:right, all of whose keys are in increasing order.
+        '''
+        if left is None:
+            return right, rh
+        if right is None:
+            return left, lh
+        left, lh, last = self._split_last(left, lh)
+        return self._join(left, lh, last, right, rh)
+        
+    def _union(self, t1, h1, t2, h2, keep_first):
+        '''
+        Private method that returns the root, black height and number of
+        shared keys of the union of the detached subtrees <arg>:t1 and
+        <arg>:t2. <arg>:t1 is split at the keys of <arg>:t2, so <arg>:t2
+        should be the smaller. The node of a shared key is taken from
+        <arg>:t1 if <arg>:keep_first is True, else from <arg>:t2.
+        '''
+        if t1 is None:
+            return t2, h2, 0
+        if t2 is None:
+            return t1, h1, 0
+        l2, r2 = self._detach(t2)
+        h2 -= not t2.red
+        l1, lh1, found, r1, rh1 = self._split(t1, h1, t2.key)
+        left, lh, lcount = self._union(l1, lh1, l2, h2, keep_first)
+        right, rh, rcount = self._union(r1, rh1, r2, h2, keep_first)
+        node = found if found is not None and keep_first else t2
+        root, height = self._join(left, lh, node, right, rh)
+        return root, height, lcount + rcount + (found is not None)
+        
+    def _intersection(self, t1, h1, t2, h2, keep_first):
+        '''
+        Private method that returns the root, black height and size of the
+        intersection of the detached subtrees <arg>:t1 and <arg>:t2, taking
+        nodes as described in <method>:_union.
+        '''
+        if t1 is None or t2 is None:
+            return None, 0, 0
+        l2, r2 = self._detach(t2)
+        h2 -= not t2.red
+        l1, lh1, found, r1, rh1 = self._split(t1, h1, t2.key)
+        left, lh, lcount = self._intersection(l1, lh1, l2, h2, keep_first)
+        right, rh, rcount = self._intersection(r1, rh1, r2, h2, keep_first)
+        if found is None:
+            root, height = self._join2(left, lh, right, rh)
+            return root, height, lcount + rcount
+        root, height = self._join(left, lh, found if keep_first else t2, right, rh)
+        return root, height, lcount + rcount + 1
+        
+    def _difference(self, t1, h1, t2, h2):
+        '''
+        Private method that returns the root, black height and number of
+        removed keys of the detached subtree <arg>:t1 without the keys of
+        the detached subtree <arg>:t2.
+        '''
+        if t1 is None or t2 is None:
+            return t1, h1, 0
+        l2, r2 = self._detach(t2)
+        h2 -= not t2.red
+        l1, lh1, found, r1, rh1 = self._split(t1, h1, t2.key)
+        left, lh, lcount = self._difference(l1, lh1, l2, h2)
+        right, rh, rcount = self._difference(r1, rh1, r2, h2)
+        root, height = self._join2(left, lh, right, rh)
+        return root, height, lcount + rcount + (found is not None)
+        
+    def _set_root(self, root, size):
+        '''
+        Private method that makes the detached subtree <arg>:root, holding
+        <arg>:size keys, the tree of the instance.
+        '''
+        if root is not None:
+            root.red = False
+        self.root = root
+        self.size = size
+        
+    def _check_operand(self, other, method):
+        if type(other) is not type(self):
+            raise TypeError('cannot call method {:s}() of {:s} with {:s}'.format(
+                method, type(self).__name__, type(other).__name__))
+                
+    def _copy(self):
+        '''
+        Private method that returns a copy of the tree built from new nodes
+        in O(n), through the same state as pickling.
+        '''
+        tree = type(self).__new__(type(self))
+        tree.__setstate__(self.__getstate__())
+        return tree
+                
+    def _merge_linear(self, other, method):
+        '''
+        Private method that computes <arg>:method of the tree instance and
+        <arg>:other by merging their nodes in key order and relinking the
+        result into a balanced tree in O(n + m).
+        '''
+        first = list(self._irange_nodes(None, None, (True, True), False))
+        second = list(other._irange_nodes(None, None, (True, True), False))
+        nodes = []
+        i = j = 0
+        while i < len(first) and j < len(second):
+            if first[i].key < second[j].key:
+                if method != 'intersection':
+                    nodes.append(first[i])
+                i += 1
+            elif second[j].key < first[i].key:
+                if method == 'union':
+                    nodes.append(second[j])
+                j += 1
+            else:
+                if method == 'union':
+                    nodes.append(second[j])
+                elif method == 'intersection':
+                    nodes.append(first[i])
+                i += 1
+                j += 1
+        if method != 'intersection':
+            nodes.extend(first[i:])
+        if method == 'union':
+            nodes.extend(second[j:])
+        self._link_sorted(nodes)
+        
+    @staticmethod
+    def _prefer_linear(n, m):
+        '''
+        Returns True if merging trees of <arg>:n and <arg>:m keys in linear
+        time is cheaper than splitting the larger at the keys of the smaller.
+        '''
+        small, large = min(n, m), max(n, m)
+        return 2 * small * (large // max(small, 1)).bit_length() >= large + small
+        
+    def union(self, other):
+        '''
+        Adds every key of the tree <arg>:other to the tree instance. Where
+        both trees hold a key, the entry of <arg>:other is kept (for a
+        SortedDict, its value). <arg>:other is left unchanged: its nodes
+        are copied in O(m) and the copy is merged in. When one tree is much
+        smaller than the other, the larger is split at the keys of the
+        smaller and the pieces are joined back in O(m log(n / m + 1));
+        trees of similar size are merged in O(n + m). Raises a TypeError
+        exception if the trees are not of the same type.
+        '''
+        self._check_operand(other, 'union')
+        if other is self:
+            return
+        other = other._copy()
+        if self._prefer_linear(self.size, other.size):
+            self._merge_linear(other, 'union')
+        elif self.size >= other.size:
+            root, height, shared = self._union(
+                self.root, self._black_height(self.root),
+                other.root, self._black_height(other.root), False)
+            self._set_root(root, self.size + other.size - shared)
+        else:
+            root, height, shared = self._union(
+                other.root, self._black_height(other.root),
+                self.root, self._black_height(self.root), True)
+            self._set_root(root, self.size + other.size - shared)
+        
+    def intersection(self, other):
+        '''
+        Removes from the tree instance every key that is not in the tree
+        <arg>:other, with the costs described in <method>:union.
+        <arg>:other is left unchanged. Raises a TypeError exception if the
+        trees are not of the same type.
+        '''
+        self._check_operand(other, 'intersection')
+        if other is self:
+            return
+        other = other._copy()
+        if self._prefer_linear(self.size, other.size):
+            self._merge_linear(other, 'intersection')
+        elif self.size >= other.size:
+            root, height, size = self._intersection(
+                self.root, self._black_height(self.root),
+                other.root, self._black_height(other.root), True)
+            self._set_root(root, size)
+        else:
+            root, height, size = self._intersection(
+                other.root, self._black_height(other.root),
+                self.root, self._black_height(self.root), False)
+            self._set_root(root, size)
+        
+    def difference(self, other):
+        '''
+        Removes from the tree instance every key that is in the tree
+        <arg>:other, with the costs described in <method>:union when
+        <arg>:other is the smaller tree. <arg>:other is left unchanged.
+        Raises a TypeError exception if the trees are not of the same type.
+        '''
+        self._check_operand(other, 'difference')
+        if other is self:
+            self.clear()
+            return
+        other = other._copy()
+        if self._prefer_linear(self.size, other.size) or self.size < other.size:
+            self._merge_linear(other, 'difference')
+        else:
+            root, height, removed = self._difference(
+                self.root, self._black_height(self.root),
+                other.root, self._black_height(other.root))
+            self._set_root(root, self.size - removed)
+        
+    def split(self, key):
+        '''
+        Moves the keys of the tree instance into two new trees of the same
+        type and returns them as a (lower, upper) pair, where lower holds
+        the keys less than <arg>:key and upper the others. Leaves the tree
+        instance empty. The trees are built in O(log n); counting their
+        sizes takes time linear in the smaller one.
+        '''
+        left, lh, found, right, rh = self._split(
+            self.root, self._black_height(self.root), key)
+        if found is not None:
+            right, rh = self._join(None, 0, found, right, rh)
+        lower, upper = type(self)(), type(self)()
+        lower_size = self._split_size(left, right, self.size)
+        lower._set_root(left, lower_size)
+        upper._set_root(right, self.size - lower_size)
+        self.clear()
+        return lower, upper
+        
+    @staticmethod
+    def join(left, right):
+        '''
+        Returns a new tree holding the keys of the trees <arg>:left and
+        <arg>:right, which must be of the same type. Every key of
+        <arg>:left must be less than every key of <arg>:right; a ValueError
+        exception is raised otherwise. Takes O(log n) because the nodes of
+        both trees are relinked rather than copied, so <arg>:left and
+        <arg>:right are both left empty, as the tree instance is by
+        <method>:split.
+        '''
+        left._check_operand(right, 'join')
+        if left is right:
+            raise ValueError('cannot join a tree with itself')
+        if left.size and right.size and not left.maximum() < right.minimum():
+            raise ValueError('keys of <arg>:left must be less than keys of <arg>:right')
+        tree = type(left)()
+        root, height = tree._join2(left.root, left._black_height(left.root),
+                                   right.root, right._black_height(right.root))
+        tree._set_root(root, left.size + right.size)
+        left.clear()
+        right.clear()
+        return tree
+        
+class OrderStatisticNode(RedBlackNode):
+    __slots__ = ('count',)
+    
+    def __init__(self, key, color, parent = None, left = None, right = None):
+        super().__init__(key, color, parent, left, right)
+        self.count = 1
+        
+class OrderStatisticTree(RedBlackTree):
+    '''
+    Red-black tree whose nodes also store the number of keys in their
+    subtree. The counts are maintained through insert, delete and the
+    rotations, which allows O(log n) rank, select and range counting as
+    well as positional indexing. Derived class of RedBlackTree.
+    '''
+    def _create_node(self, key):
+        return OrderStatisticNode(key, 'r')
+        
+    @staticmethod
+    def _count(node):
+        return 0 if node is None else node.count
+        
+    def _build_balanced(self, nodes, lo, hi, parent, depth, max_depth):
+        node = super()._build_balanced(nodes, lo, hi, parent, depth, max_depth)
+        if node is not None:
+            node.count = hi - lo
+        return node
+        
+    def _update_path(self, node):
+        '''
+        Recomputes the subtree counts from <arg>:node up to the root.
+        '''
+        while node is not None:
+            node.count = 1 + self._count(node.left) + self._count(node.right)
+            node = node.parent
+            
+    def _left_rotate(self, node):
+        super()._left_rotate(node)
+        node.parent.count = node.count
+        node.count = 1 + self._count(node.left) + self._count(node.right)
+        
+    def _right_rotate(self, node):
+        super()._right_rotate(node)
+        node.parent.count = node.count
+        node.count = 1 + self._count(node.left) + self._count(node.right)
+        
+    def _split_size(self, left, right, total):
+        return self._count(left)
+        
+    def _validate_node(self, node):
+        '''
+        Also checks the subtree count of <arg>:node.
+        '''
+        super()._validate_node(node)
+        if node.count != 1 + self._count(node.left) + self._count(node.right):
+            raise ValueError('wrong subtree count at key:{:s}'.format(str(node.key)))
+            
+    def __getitem__(self, index):
+        '''
+        Returns the key at position <arg>:index in sorted order. Negative
+        indices count from the maximum. Raises an IndexError exception if
+        <arg>:index is out of range.
+        '''
+        if index < 0:
+            index += self.size
+        if index < 0 or index >= self.size:
+            raise IndexError('tree index out of range')
+        return self.select(index)
+        
+    def rank(self, key):
+        '''
+        Returns the number of keys in the tree that are less than <arg>:key.
+        <arg>:key need not be in the tree.
+        '''
+        rank = 0
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                rank += 1 + self._count(node.left)
+                node = node.right
+            else:
+                return rank + self._count(node.left)
+        return rank
+        
+    def select(self, k):
+        '''
+        Returns the key of rank <arg>:k, i.e. the k-th smallest key counting
+        from 0. Raises an IndexError exception if <arg>:k is out of range.
+        '''
+        if k < 0 or k >= self.size:
+            raise IndexError('rank {:s} out of range'.format(str(k)))
+        node = self.root
+        while True:
+            left = self._count(node.left)
+            if k < left:
+                node = node.left
+            elif k > left:
+                k -= left + 1
+                node = node.right
+            else:
+                return node.key
+                
+    def count_range(self, lo, hi):
+        '''
+        Returns the number of keys k in the tree with <arg>:lo <= k < <arg>:hi.
+        '''
+        if not lo < hi:
+            return 0
+        return self.rank(hi) - self.rank(lo)
+        
+class MapNode(RedBlackNode):
+    __slots__ = ('value',)
+    
+    def __init__(self, key, color, parent = None, left = None, right = None):
+        super().__init__(key, color, parent, left, right)
+        self.value = None
+        
+class SortedDict(RedBlackTree):
+    '''
+    Key/value map kept in key order, built on RedBlackTree with each value
+    stored on the node of its key. Lookups, upserts and deletions take a
+    single descent from the root. Iterating the map yields keys in sorted
+    order. Derived class of RedBlackTree.
+    '''
+    def __init__(self, items = None):
+        '''
+        Constructor Arguments:
+            items : mapping or iterable of (key, value) pairs
+                Items to add to the map (optional)
+        '''
+        super().__init__()
+        if items is not None:
+            self.update(items)
+            
+    def _create_node(self, key):
+        return MapNode(key, 'r')
+        
+    def __getstate__(self):
+        return {'items' : list(self.items())}
+        
+    def __setstate__(self, state):
+        self.__init__()
+        nodes = list()
+        for key, value in state['items']:
+            node = self._create_node(key)
+            node.value = value
+            nodes.append(node)
+        self._link_sorted(nodes)
+        
+    def __getitem__(self, key):
+        node = self._search(key)
+        if node is None:
+            raise KeyError(key)
+        return node.value
+        
+    def __setitem__(self, key, value):
+        self._rb_insert(key).value = value
+        
+    def __delitem__(self, key):
+        self.delete(key)
+        
+    def __contains__(self, key):
+        return self._search(key) is not None
+        
+    def get(self, key, default = None):
+        '''
+        Returns the value of <arg>:key if it is in the map, else
+        <arg>:default.
+        '''
+        node = self._search(key)
+        return default if node is None else node.value
+        
+    def setdefault(self, key, default = None):
+        '''
+        Returns the value of <arg>:key if it is in the map. Otherwise inserts
+        <arg>:key with value <arg>:default and returns <arg>:default. Uses a
+        single descent either way.
+        '''
+        size = self.size
+        node = self._rb_insert(key)
+        if self.size != size:
+            node.value = default
+        return node.value
+        
+    def update(self, items):
+        '''
+        Sets the (key, value) pairs of the mapping or iterable <arg>:items.
+        '''
+        if hasattr(items, 'items'):
+            items = items.items()
+        for key, value in items:
+            self._rb_insert(key).value = value
+            
+    def pop(self, key, *default):
+        '''
+        Removes <arg>:key and returns its value. If <arg>:key is not in the
+        map, returns the default value if one is given and raises a KeyError
+        exception otherwise.
+        '''
+        node = self._search(key)
+        if node is None:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        self._rb_delete(node)
+        return node.value
+        
+    def pop_min(self):
+        '''
+        Removes and returns the (key, value) pair with the smallest key.
+        Raises an EmptyError exception if the map is empty.
+        '''
+        if self.root is None:
+            raise EmptyError('cannot call method pop_min() on empty map')
+        node = self._minimum(self.root)
+        self._rb_delete(node)
+        return node.key, node.value
+        
+    def pop_max(self):
+        '''
+        Removes and returns the (key, value) pair with the largest key.
+        Raises an EmptyError exception if the map is empty.
+        '''
+        if self.root is None:
+            raise EmptyError('cannot call method pop_max() on empty map')
+        node = self._maximum(self.root)
+        self._rb_delete(node)
+        return node.key, node.value
+        
+    def keys(self):
+        '''
+        Yields the keys of the map in sorted order.
+        '''
+        for key in self:
+            yield key
+            
+    def values(self):
+        '''
+        Yields the values of the map in key order.
+        '''
+        for node in self._irange_nodes(None, None, (True, True), False):
+            yield node.value
+            
+    def items(self):
+        '''
+        Yields the (key, value) pairs of the map in key order.
+        '''
+        for node in self._irange_nodes(None, None, (True, True), False):
+            yield node.key, node.value
+            
+    def irange_items(self, lo = None, hi = None, inclusive = (True, True), reverse = False):
+        '''
+        Lazily yields the (key, value) pairs with keys in the range described
+        in <method>:irange.
+        '''
+        for node in self._irange_nodes(lo, hi, inclusive, reverse):
+            yield node.key, node.value
+            
+class ArrayRedBlackTree(object):
+    '''
+    Red-black tree storing keys, with its nodes kept as integer indices into
+    parallel arrays (left, right and parent links in typed arrays, colors in
+    a bytearray, keys in a list) instead of node objects. Index 0 is a
+    shared black NIL sentinel, so the rebalancing code needs no None checks.
+    Slots of deleted nodes are reused by later insertions. Provides the
+    search, insertion, deletion and ordered query methods of RedBlackTree.
+    '''
+    def __init__(self, keys = None):
+        '''
+        Constructor Arguments:
+            keys : array-like
+                List of keys to add to tree (optional)
+        '''
+        self.clear()
+        if keys is not None:
+            self.insert_multiple(keys)
+            
+    def __str__(self):
+        return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
+        
+    def __repr__(self):
+        return self.__str__()
+        
+    def __len__(self):
+        return self.size
+        
+    def __contains__(self, key):
+        return self._search(key) != 0
+        
+    def __iter__(self):
+        node = self._minimum(self.root)
+        while node:
+            yield self._keys[node]
+            node = self._next_node(node)
+            
+    def __reversed__(self):
+        node = self._maximum(self.root)
+        while node:
+            yield self._keys[node]
+            node = self._prev_node(node)
+            
+    def freeze(self, typecode = 'q'):
+        '''
+        Returns a FrozenSortedKeys holding the keys of the tree in a typed
+        array of typecode <arg>:typecode. Only numeric keys can be frozen;
+        a TypeError exception is raised if the tree holds any other key.
+        '''
+        return FrozenSortedKeys(self, typecode)
+        
+    def clear(self):
+        '''
+        Removes all keys from the tree and releases the node arrays.
+        '''
+        self._keys = [None]
+        self._left = array('q', [0])
+        self._right = array('q', [0])
+        self._parent = array('q', [0])
+        self._red = bytearray(1)
+        self._free = []
+        self.root = 0
+        self.size = 0
+        
+    def empty(self):
+        '''
+        Returns True if the tree is empty, False otherwise.
+        '''
+        return self.size == 0
+        
+    def _new_node(self, key):
+        '''
+        Private method that returns the index of a new red node containing
+        <arg>:key, reusing a free slot if there is one.
+        '''
+        if self._free:
+            node = self._free.pop()
+            self._keys[node] = key
+            self._left[node] = self._right[node] = self._parent[node] = 0
+            self._red[node] = 1
+        else:
+            node = len(self._keys)
+            self._keys.append(key)
+            self._left.append(0)
+            self._right.append(0)
+            self._parent.append(0)
+            self._red.append(1)
+        return node
+        
+    def _search(self, key):
+        '''
+        Private method that returns the index of the node containing
+        <arg>:key, or 0 if the key is not in the tree.
+        '''
+        keys = self._keys
+        node = self.root
+        while node:
+            if key < keys[node]:
+                node = self._left[node]
+            elif keys[node] < key:
+                node = self._right[node]
+            else:
+                return node
+        return 0
+        
+    def has_key(self, key):
+        '''
+        Returns True if the tree has the key, False otherwise.
+        '''
+        return self._search(key) != 0
+        
+    def height(self):
+        '''
+        Returns the height of the tree. Returns 0 if the tree is empty.
+        '''
+        height = 0
+        stack = [(self.root, 1)] if self.root else []
+        while stack:
+            node, depth = stack.pop()
+            height = max(height, depth)
+            if self._left[node]:
+                stack.append((self._left[node], depth + 1))
+            if self._right[node]:
+                stack.append((self._right[node], depth + 1))
+        return height
+        
+    def _minimum(self, node):
+        left = self._left
+        if node:
+            while left[node]:
+                node = left[node]
+        return node
+        
+    def _maximum(self, node):
+        right = self._right
+        if node:
+            while right[node]:
+                node = right[node]
+        return node
+        
+    def minimum(self):
+        '''
+        Returns the minimum key in the tree, or None if the tree is empty.
+        '''
+        return self._keys[self._minimum(self.root)]
+        
+    def maximum(self):
+        '''
+        Returns the maximum key in the tree, or None if the tree is empty.
+        '''
+        return self._keys[self._maximum(self.root)]
+        
+    def _next_node(self, node):
+        '''
+        Private method that returns the in-order successor of <arg>:node, or
+        0 if it is the last node.
+        '''
+        if self._right[node]:
+            return self._minimum(self._right[node])
+        parent = self._parent[node]
+        while parent and node == self._right[parent]:
+            node = parent
+            parent = self._parent[node]
+        return parent
+        
+    def _prev_node(self, node):
+        '''
+        Private method that returns the in-order predecessor of <arg>:node,
+        or 0 if it is the first node.
+        '''
+        if self._left[node]:
+            return self._maximum(self._left[node])
+        parent = self._parent[node]
+        while parent and node == self._left[parent]:
+            node = parent
+            parent = self._parent[node]
+        return parent
+        
+    def successor(self, key):
+        '''
+        Returns the key following <arg>:key in the tree, or None if
+        <arg>:key is the maximum. Raises a KeyError if <arg>:key is not in
+        the tree.
+        '''
+        node = self._search(key)
+        if node == 0:
+            raise KeyError('ArrayRedBlackTree object does not contain key:{:s}'.format(str(key)))
+        return self._keys[self._next_node(node)]
+        
+    def predecessor(self, key):
+        '''
+        Returns the key preceding <arg>:key in the tree, or None if
+        <arg>:key is the minimum. Raises a KeyError if <arg>:key is not in
+        the tree.
+        '''
+        node = self._search(key)
+        if node == 0:
+            raise KeyError('ArrayRedBlackTree object does not contain key:{:s}'.format(str(key)))
+        return self._keys[self._prev_node(node)]
+        
+    def floor(self, key):
+        '''
+        Returns the greatest key in the tree less than or equal to <arg>:key,
+        or None if there is no such key.
+        '''
+        keys = self._keys
+        best = 0
+        node = self.root
+        while node:
+            if keys[node] < key:
+                best = node
+                node = self._right[node]
+            elif key < keys[node]:
+                node = self._left[node]
+            else:
+                return keys[node]
+        return keys[best]
+        
+    def ceiling(self, key):
+        '''
+        Returns the least key in the tree greater than or equal to
+        <arg>:key, or None if there is no such key.
+        '''
+        keys = self._keys
+        best = 0
+        node = self.root
+        while node:
+            if key < keys[node]:
+                best = node
+                node = self._left[node]
+            elif keys[node] < key:
+                node = self._right[node]
+            else:
+                return keys[node]
+        return keys[best]
+        
+    def _left_rotate(self, x):
+        left, right, parent = self._left, self._right, self._parent
+        y = right[x]
+        right[x] = left[y]
+        if left[y]:
+            parent[left[y]] = x
+        p = parent[x]
+        parent[y] = p
+        if p == 0:
+            self.root = y
+        elif x == left[p]:
+            left[p] = y
+        else:
+            right[p] = y
+        left[y] = x
+        parent[x] = y
+        
+    def _right_rotate(self, x):
+        left, right, parent = self._left, self._right, self._parent
+        y = left[x]
+        left[x] = right[y]
+        if right[y]:
+            parent[right[y]] = x
+        p = parent[x]
+        parent[y] = p
+        if p == 0:
+            self.root = y
+        elif x == right[p]:
+            right[p] = y
+        else:
+            left[p] = y
+        right[y] = x
+        parent[x] = y
+        
+    def insert(self, key):
+        '''
+        Inserts <arg>:key into the tree. Nothing happens if the key is
+        already in the tree.
+        '''
+        keys = self._keys
+        y = 0
+        x = self.root
+        while x:
+            y = x
+            if key < keys[x]:
+                x = self._left[x]
+            elif keys[x] < key:
+                x = self._right[x]
+            else:
+                return
+        node = self._new_node(key)
+        self._parent[node] = y
+        if y == 0:
+            self.root = node
+        elif key < self._keys[y]:
+            self._left[y] = node
+        else:
+            self._right[y] = node
+        self._insert_fixup(node)
+        self.size += 1
+        
+    def _insert_fixup(self, node):
+        left, right, parent, red = self._left, self._right, self._parent, self._red
+        while red[parent[node]]:
+            p = parent[node]
+            g = parent[p]
+            if p == left[g]:
+                y = right[g]
+                if red[y]:
+                    red[p] = red[y] = 0
+                    red[g] = 1
+                    node = g
+                else:
+                    if node == right[p]:
+                        node = p
+                        self._left_rotate(node)
+                        p = parent[node]
+                    red[p] = 0
+                    red[g] = 1
+                    self._right_rotate(g)
+            else:
+                y = left[g]
+                if red[y]:
+                    red[p] = red[y] = 0
+                    red[g] = 1
+                    node = g
+                else:
+                    if node == left[p]:
+                        node = p
+                        self._right_rotate(node)
+                        p = parent[node]
+                    red[p] = 0
+                    red[g] = 1
+                    self._left_rotate(g)
+        red[self.root] = 0
+        
+    def insert_multiple(self, keylist):
+        '''
+        Inserts every key in the iterable <arg>:keylist into the tree.
+        '''
+        for key in keylist:
+            self.insert(key)
+            
+    def _transplant(self, u, v):
+        '''
+        Private method that replaces the subtree rooted at <arg>:u with the
+        subtree rooted at <arg>:v. The parent of <arg>:v is set even when it
+        is the sentinel, as the delete fixup starts from it.
+        '''
+        p = self._parent[u]
+        if p == 0:
+            self.root = v
+        elif u == self._left[p]:
+            self._left[p] = v
+        else:
+            self._right[p] = v
+        self._parent[v] = p
+        
+    def delete(self, key):
+        '''
+        Removes <arg>:key from the tree. Raises a KeyError if the key is not
+        in the tree.
+        '''
+        z = self._search(key)
+        if z == 0:
+            raise KeyError('ArrayRedBlackTree object does not contain key:{:s}'.format(str(key)))
+        left, right, parent, red = self._left, self._right, self._parent, self._red
+        y = z
+        y_original_red = red[y]
+        if left[z] == 0:
+            x = right[z]
+            self._transplant(z, x)
+        elif right[z] == 0:
+            x = left[z]
+            self._transplant(z, x)
+        else:
+            y = self._minimum(right[z])
+            y_original_red = red[y]
+            x = right[y]
+            if parent[y] == z:
+                parent[x] = y
+            else:
+                self._transplant(y, x)
+                right[y] = right[z]
+                parent[right[y]] = y
+            self._transplant(z, y)
+            left[y] = left[z]
+            parent[left[y]] = y
+            red[y] = red[z]
+        if not y_original_red:
+            self._delete_fixup(x)
+        parent[0] = 0
+        self._keys[z] = None
+        self._free.append(z)
+        self.size -= 1
+        
+    def _delete_fixup(self, x):
+        left, right, parent, red = self._left, self._right, self._parent, self._red
+        while x != self.root and not red[x]:
+            p = parent[x]
+            if x == left[p]:
+                w = right[p]
+                if red[w]:
+                    red[w] = 0
+                    red[p] = 1
+                    self._left_rotate(p)
+                    w = right[p]
+                if not red[left[w]] and not red[right[w]]:
+                    red[w] = 1
+                    x = p
+                else:
+                    if not red[right[w]]:
+                        red[left[w]] = 0
+                        red[w] = 1
+                        self._right_rotate(w)
+                        w = right[p]
+                    red[w] = red[p]
+                    red[p] = 0
+                    red[right[w]] = 0
+                    self._left_rotate(p)
+                    x = self.root
+            else:
+                w = left[p]
+                if red[w]:
+                    red[w] = 0
+                    red[p] = 1
+                    self._right_rotate(p)
+                    w = left[p]
+                if not red[left[w]] and not red[right[w]]:
+                    red[w] = 1
+                    x = p
+                else:
+                    if not red[left[w]]:
+                        red[right[w]] = 0
+                        red[w] = 1
+                        self._left_rotate(w)
+                        w = left[p]
+                    red[w] = red[p]
+                    red[p] = 0
+                    red[left[w]] = 0
+                    self._right_rotate(p)
+                    x = self.root
+        red[x] = 0
+        
+    def delete_multiple(self, keylist):
+        '''
+        Removes every key in the iterable <arg>:keylist from the tree.
+        '''
+        for key in keylist:
+            self.delete(key)
+            
+class PersistentNode(object):
+    '''
+    Node of a PersistentRedBlackTree. Nodes are never modified once a tree
+    version referring to them has been returned, so they have no parent
+    link and may be shared between versions.
+    '''
+    __slots__ = ('key', 'red', 'left', 'right')
+    
+    def __init__(self, key, red, left = None, right = None):
+        self.key = key
+        self.red = red
+        self.left = left
+        self.right = right
+        
+    def __str__(self):
+        return str(self.key)
+        
+    def __repr__(self):
+        return self.__str__()
+        
+class PersistentRedBlackTree(object):
+    '''
+    Immutable red-black tree storing keys. insert and delete leave the tree
+    instance unchanged and return a new version in O(log n) by copying the
+    nodes on the search path and sharing every other subtree. Since no
+    version is ever modified, snapshot is O(1) and any number of threads
+    may read or iterate a version without locking while a writer derives
+    new versions from it.
+    '''
+    def __init__(self, keys = None):
+        '''
+        Constructor Arguments:
+            keys : array-like
+                List of keys to add to tree (optional)
+        '''
+        self.root = None
+        self.size = 0
+        if keys is not None:
+            tree = self.insert_multiple(keys)
+            self.root, self.size = tree.root, tree.size
+            
+    def __getstate__(self):
+        '''
+        Returns the keys of the tree in sorted order for pickling.
+        '''
+        return {'keys' : list(self)}
+        
+    def __setstate__(self, state):
+        self.__init__()
+        keys = state['keys']
+        self.root = self._build(keys, 0, len(keys), 0, len(keys).bit_length() - 1)
+        self.size = len(keys)
+        
+    def _build(self, keys, lo, hi, depth, max_depth):
+        '''
+        Private method that returns the root of a balanced subtree holding
+        the sorted keys <arg>:keys[lo:hi], with the nodes on the deepest
+        level red.
+        '''
+        if lo >= hi:
+            return None
+        mid = (lo + hi) >> 1
+        return PersistentNode(keys[mid], depth == max_depth and depth > 0,
+                              self._build(keys, lo, mid, depth + 1, max_depth),
+                              self._build(keys, mid + 1, hi, depth + 1, max_depth))
+                              
+    def freeze(self, typecode = 'q'):
+        '''
+        Returns a FrozenSortedKeys holding the keys of the tree in a typed
+        array of typecode <arg>:typecode. Only numeric keys can be frozen;
+        a TypeError exception is raised if the tree holds any other key.
+        '''
+        return FrozenSortedKeys(self, typecode)
+        
+    def _version(self, root, size):
+        '''
+        Private method that returns a new tree of the same type with the
+        given <arg>:root and <arg>:size.
+        '''
+        tree = type(self)()
+        tree.root = root
+        tree.size = size
+        return tree
+        
+    def __str__(self):
+        return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
+        
+    def __repr__(self):
+        return self.__str__()
+        
+    def __len__(self):
+        return self.size
+        
+    def __contains__(self, key):
+        return self._search(key) is not None
+        
+    def __iter__(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield node.key
+                node = node.right
+                
+    def __reversed__(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.right
+            else:
+                node = stack.pop()
+                yield node.key
+                node = node.left
+                
+    def _search(self, key):
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                return node
+        return None
+        
+    def has_key(self, key):
+        '''
+        Returns True if the tree has the key, False otherwise.
+        '''
+        return self._search(key) is not None
+        
+    def empty(self):
+        '''
+        Returns True if the tree is empty, False otherwise.
+        '''
+        return self.size == 0
+        
+    def snapshot(self):
+        '''
+        Returns a version of the tree sharing all of its nodes in O(1).
+        '''
+        return self._version(self.root, self.size)
+        
+    def height(self):
+        '''
+        Returns the height of the tree. Returns 0 if the tree is empty.
+        '''
+        height = 0
+        stack = [(self.root, 1)] if self.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            height = max(height, depth)
+            for child in (node.left, node.right):
+                if child is not None:
+                    stack.append((child, depth + 1))
+        return height
+        
+    def minimum(self):
+        '''
+        Returns the minimum key in the tree, or None if the tree is empty.
+        '''
+        node = self.root
+        if node is None:
+            return None
+        while node.left is not None:
+            node = node.left
+        return node.key
+        
+    def maximum(self):
+        '''
+        Returns the maximum key in the tree, or None if the tree is empty.
+        '''
+        node = self.root
+        if node is None:
+            return None
+        while node.right is not None:
+            node = node.right
+        return node.key
+        
+    def floor(self, key):
+        '''
+        Returns the greatest key in the tree less than or equal to <arg>:key,
+        or None if there is no such key.
+        '''
+        best = None
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                best = node
+                node = node.right
+            elif key < node.key:
+                node = node.left
+            else:
+                return node.key
+        return None if best is None else best.key
+        
+    def ceiling(self, key):
+        '''
+        Returns the least key in the tree greater than or equal to
+        <arg>:key, or None if there is no such key.
+        '''
+        best = None
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                best = node
+                node = node.left
+            elif node.key < key:
+                node = node.right
+            else:
+                return node.key
+        return None if best is None else best.key
+        
+    @staticmethod
+    def _copy(node):
+        return PersistentNode(node.key, node.red, node.left, node.right)
+        
+    @staticmethod
+    def _relink(parent, old, new):
+        '''
+        Private method that replaces the child <arg>:old of the copied node
+        <arg>:parent with <arg>:new. Returns <arg>:new if <arg>:old was the
+        root, i.e. <arg>:parent is None, and None otherwise.
+        '''
+        if parent is None:
+            return new
+        if parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+        return None
+        
+    def _copy_path(self, key):
+        '''
+        Private method that copies the nodes on the search path of
+        <arg>:key and returns the list of copies from the root down, each
+        copy linked to the next. The copies are not shared with any version
+        and may be modified.
+        '''
+        path = []
+        node = self.root
+        parent = None
+        while node is not None:
+            node = self._copy(node)
+            if parent is not None:
+                if key < parent.key:
+                    parent.left = node
+                else:
+                    parent.right = node
+            path.append(node)
+            if key < node.key:
+                parent, node = node, node.left
+            elif node.key < key:
+                parent, node = node, node.right
+            else:
+                break
+        return path
+        
+    def insert(self, key):
+        '''
+        Returns a new version of the tree that also contains <arg>:key. If
+        the key is already in the tree, the tree instance itself is
+        returned.
+        '''
+        if self._search(key) is not None:
+            return self
+        path = self._copy_path(key)
+        node = PersistentNode(key, True)
+        if not path:
+            node.red = False
+            return self._version(node, 1)
+        if key < path[-1].key:
+            path[-1].left = node
+        else:
+            path[-1].right = node
+        path.append(node)
+        root = path[0]
+        i = len(path) - 1
+        while i >= 2 and path[i - 1].red:
+            node, parent, grandparent = path[i], path[i - 1], path[i - 2]
+            if parent is grandparent.left:
+                uncle = grandparent.right
+                if uncle is not None and uncle.red:
+                    grandparent.right = uncle = self._copy(uncle)
+                    uncle.red = parent.red = False
+                    grandparent.red = True
+                    i -= 2
+                    continue
+                if node is parent.right:
+                    parent.right = node.left
+                    node.left = parent
+                    grandparent.left = node
+                    node, parent = parent, node
+                grandparent.left = parent.right
+                parent.right = grandparent
+            else:
+                uncle = grandparent.left
+                if uncle is not None and uncle.red:
+                    grandparent.left = uncle = self._copy(uncle)
+                    uncle.red = parent.red = False
+                    grandparent.red = True
+                    i -= 2
+                    continue
+                if node is parent.left:
+                    parent.left = node.right
+                    node.right = parent
+                    grandparent.right = node
+                    node, parent = parent, node
+                grandparent.right = parent.left
+                parent.left = grandparent
+            parent.red = False
+            grandparent.red = True
+            root = self._relink(path[i - 3] if i >= 3 else None, grandparent, parent) or root
+            break
+        root.red = False
+        return self._version(root, self.size + 1)
+        
+    def delete(self, key):
+        '''
+        Returns a new version of the tree without <arg>:key. Raises a
+        KeyError if the key is not in the tree.
+        '''
+        path = self._copy_path(key)
+        if not path or path[-1].key != key:
+            raise KeyError('PersistentRedBlackTree object does not contain key:{:s}'.format(str(key)))
+        z = path[-1]
+        if z.left is not None and z.right is not None:
+            node = z.right = self._copy(z.right)
+            path.append(node)
+            while node.left is not None:
+                node.left = node = self._copy(node.left)
+                path.append(node)
+            z.key = node.key
+        y = path.pop()
+        x = y.left if y.left is not None else y.right
+        parent = path[-1] if path else None
+        root = path[0] if path else None
+        is_left = parent is not None and parent.left is y
+        root = self._relink(parent, y, x) or root
+        if y.red:
+            return self._version(root, self.size - 1)
+        if x is not None and x.red:
+            child = self._copy(x)
+            child.red = False
+            root = self._relink(parent, x, child) or root
+            return self._version(root, self.size - 1)
+        i = len(path) - 1
+        while i >= 0:
+            p = path[i]
+            if is_left:
+                w = p.right = self._copy(p.right)
+                if w.red:
+                    w.red = False
+                    p.red = True
+                    p.right = w.left
+                    w.left = p
+                    root = self._relink(path[i - 1] if i else None, p, w) or root
+                    path.insert(i, w)
+                    i += 1
+                    w = p.right = self._copy(p.right)
+                if not (w.left is not None and w.left.red) and not (w.right is not None and w.right.red):
+                    w.red = True
+                    if p.red:
+                        p.red = False
+                        break
+                    i -= 1
+                    is_left = i >= 0 and path[i].left is p
+                    continue
+                if not (w.right is not None and w.right.red):
+                    wl = self._copy(w.left)
+                    w.left = wl.right
+                    wl.right = w
+                    wl.red = False
+                    w.red = True
+                    p.right = w = wl
+                w.red = p.red
+                p.red = False
+                w.right = self._copy(w.right)
+                w.right.red = False
+                p.right = w.left
+                w.left = p
+            else:
+                w = p.left = self._copy(p.left)
+                if w.red:
+                    w.red = False
+                    p.red = True
+                    p.left = w.right
+                    w.right = p
+                    root = self._relink(path[i - 1] if i else None, p, w) or root
+                    path.insert(i, w)
+                    i += 1
+                    w = p.left = self._copy(p.left)
+                if not (w.left is not None and w.left.red) and not (w.right is not None and w.right.red):
+                    w.red = True
+                    if p.red:
+                        p.red = False
+                        break
+                    i -= 1
+                    is_left = i >= 0 and path[i].left is p
+                    continue
+                if not (w.left is not None and w.left.red):
+                    wr = self._copy(w.right)
+                    w.right = wr.left
+                    wr.left = w
+                    wr.red = False
+                    w.red = True
+                    p.left = w = wr
+                w.red = p.red
+                p.red = False
+                w.left = self._copy(w.left)
+                w.left.red = False
+                p.left = w.right
+                w.right = p
+            root = self._relink(path[i - 1] if i else None, p, w) or root
+            break
+        if root is not None:
+            root.red = False
+        return self._version(root, self.size - 1)
+        
+    def insert_multiple(self, keylist):
+        '''
+        Returns a new version of the tree that also contains every key in
+        the iterable <arg>:keylist.
+        '''
+        tree = self
+        for key in keylist:
+            tree = tree.insert(key)
+        return tree
+        
+    def delete_multiple(self, keylist):
+        '''
+        Returns a new version of the tree without the keys in the iterable
+        <arg>:keylist. Raises a KeyError if a key is not in the tree.
+        '''
+        tree = self
+        for key in keylist:
+            tree = tree.delete(key)
+        return tree
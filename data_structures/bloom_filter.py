@@ -1,4 +1,41 @@
 import random
+from array import array
+from itertools import chain, compress
+from .frozen import FrozenContainer
+
+# the eight booleans of each byte value, least significant bit first
+_BYTE_BITS = [tuple(bool(byte >> shift & 1) for shift in range(8)) for byte in range(256)]
+
+def _indices(multipliers, size, value):
+    '''
+    Yields the bit index of <arg>:value for each hash multiplier in
+    <arg>:multipliers, for a bit vector of <arg>:size bits.
+    '''
+    if not isinstance(value, int) and not isinstance(value, float):
+        value = hash(value)
+    for A in multipliers:
+        temp = A * value
+        temp -= int(temp)
+        yield int(size * temp)
+        
+def _pack_bits(bits):
+    '''
+    Returns the list of booleans <arg>:bits packed eight to a byte, least
+    significant bit first.
+    '''
+    packed = bytearray((len(bits) + 7) >> 3)
+    for index in compress(range(len(bits)), bits):
+        packed[index >> 3] |= 1 << (index & 7)
+    return packed
+    
+def _unpack_bits(packed, size):
+    '''
+    Returns the first <arg>:size bits of the bytes <arg>:packed as a list of
+    booleans, expanding a whole byte at a time through _BYTE_BITS.
+    '''
+    bits = list(chain.from_iterable(map(_BYTE_BITS.__getitem__, packed)))
+    del bits[size:]
+    return bits
 
 class BloomFilter(object):
     '''
@@ -28,17 +65,29 @@ class BloomFilter(object):
         self._A = [random.random() for i in range(hashvector_length)]
         self._num_inserts = 0
         
+    def __getstate__(self):
+        '''
+        Returns the state of the filter with the bit vector packed eight
+        bits to a byte for pickling. Values other than numbers are hashed
+        with hash(), so a filter of strings is only meaningful in processes
+        sharing the same PYTHONHASHSEED.
+        '''
+        return {'size' : self._size, 'A' : list(self._A),
+                'num_inserts' : self._num_inserts,
+                'bits' : bytes(_pack_bits(self._bit_array))}
+                
+    def __setstate__(self, state):
+        self._size = state['size']
+        self._A = state['A']
+        self._num_inserts = state['num_inserts']
+        self._bit_array = _unpack_bits(state['bits'], self._size)
+        
     def insert(self, value):
         '''
         Insert <arg>:value into the bloom filter. <arg>:value must be
         hashable.
         '''
-        if not isinstance(value, int) and not isinstance(value, float):
-            value = hash(value)
-        for A in self._A:
-            temp = A * value
-            temp -= int(temp)
-            index = int(self._size * temp)
+        for index in _indices(self._A, self._size, value):
             self._bit_array[index] = True
         self._num_inserts += 1
             
@@ -60,12 +109,64 @@ class BloomFilter(object):
         Returns True if the hashvector of <arg>:value is present in the
         instance bit vector. Otherwise, returns False.
         '''
-        if not isinstance(value, int) and not isinstance(value, float):
-            value = hash(value)
-        for A in self._A:
-            temp = A * value
-            temp -= int(temp)
-            index = int(self._size * temp)
+        for index in _indices(self._A, self._size, value):
             if not self._bit_array[index]:
                 return False
         return True
+        
+    def freeze(self):
+        '''
+        Returns a FrozenBloomFilter with the hash functions and bits of the
+        instance.
+        '''
+        return FrozenBloomFilter(self)
+        
+class FrozenBloomFilter(FrozenContainer):
+    '''
+    Read-only BloomFilter with its bit vector packed eight bits to a byte in
+    a flat buffer, which can be written to a file and mapped back into
+    memory. See FrozenContainer.
+    '''
+    _kind = b'BLOM'
+    
+    def __init__(self, bloom_filter):
+        '''
+        Constructor Arguments
+        ---------------------
+        bloom_filter: BloomFilter
+            Filter whose hash functions and bits are copied.
+        '''
+        self._attach([memoryview(array('q', [bloom_filter._size,
+                                              bloom_filter._num_inserts])),
+                      memoryview(array('d', bloom_filter._A)),
+                      memoryview(_pack_bits(bloom_filter._bit_array))])
+                      
+    def _sections(self):
+        return [self._header, self._A, self._bits]
+        
+    def _attach(self, sections):
+        self._header, self._A, self._bits = sections
+        self._size = self._header[0]
+        
+    def num_inserts(self):
+        '''
+        Returns the number of inserts that had been made into the filter.
+        '''
+        return self._header[1]
+        
+    def bit_density(self):
+        '''
+        Returns the percentage of bits in the bit vector that are set.
+        '''
+        return bin(int.from_bytes(self._bits, 'little')).count('1') / self._size
+        
+    def has_hashvector(self, value):
+        '''
+        Returns True if the hashvector of <arg>:value is present in the
+        bit vector. Otherwise, returns False.
+        '''
+        bits = self._bits
+        for index in _indices(self._A, self._size, value):
+            if not bits[index >> 3] >> (index & 7) & 1:
+                return False
+        return True
@@ -0,0 +1,399 @@
+import mmap
+from abc import ABC, abstractmethod
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+_MAGIC = b'DSFROZEN'
+_VERSION = 1
+_HEADER = struct.Struct('=8s4sccH')
+_SECTION = struct.Struct('=c7xQ')
+_BYTEORDER = b'<' if sys.byteorder == 'little' else b'>'
+_NUMERIC_TYPECODES = 'bBhHiIlLqQfd'
+
+def _pad(offset):
+    return (offset + 7) & ~7
+
+def _pack(kind, sections):
+    '''
+    Returns the bytes of a frozen buffer of kind <arg>:kind (4 bytes)
+    holding the typed arrays or memoryviews in <arg>:sections. The buffer
+    starts with a header and a table giving the typecode and length of each
+    section, followed by the raw section data, each aligned to 8 bytes.
+    '''
+    views = [memoryview(section) for section in sections]
+    table = bytearray(_HEADER.pack(_MAGIC, kind, _BYTEORDER,
+                                   bytes([_VERSION]), len(views)))
+    for view in views:
+        table += _SECTION.pack(view.format.encode('ascii'), len(view))
+    chunks = [bytes(table)]
+    offset = len(table)
+    for view in views:
+        padding = _pad(offset) - offset
+        if padding:
+            chunks.append(bytes(padding))
+        data = view.cast('B') if view.format != 'B' else view
+        chunks.append(bytes(data))
+        offset += padding + view.nbytes
+    return b''.join(chunks)
+
+def _unpack(buffer, kind):
+    '''
+    Returns the sections of the frozen buffer <arg>:buffer as memoryviews
+    of their typecodes, without copying any data. Raises a ValueError
+    exception if <arg>:buffer is not a frozen buffer of kind <arg>:kind
+    written on a machine of the same byte order.
+    '''
+    view = memoryview(buffer).cast('B')
+    if len(view) < _HEADER.size:
+        raise ValueError('buffer is too short to hold a frozen container')
+    magic, found, byteorder, version, count = _HEADER.unpack_from(view, 0)
+    if magic != _MAGIC or found != kind:
+        raise ValueError('buffer does not hold a frozen {:s}'.format(kind.decode('ascii')))
+    if byteorder != _BYTEORDER or version[0] != _VERSION:
+        raise ValueError('frozen buffer has an unsupported byte order or version')
+    offset = _HEADER.size
+    formats = list()
+    for i in range(count):
+        typecode, length = _SECTION.unpack_from(view, offset)
+        formats.append((typecode.decode('ascii'), length))
+        offset += _SECTION.size
+    sections = list()
+    for typecode, length in formats:
+        offset = _pad(offset)
+        nbytes = length * struct.calcsize(typecode)
+        if offset + nbytes > len(view):
+            raise ValueError('frozen buffer is truncated')
+        sections.append(view[offset:offset + nbytes].cast(typecode))
+        offset += nbytes
+    return sections
+
+def _create_block(data, name = None):
+    '''
+    Returns a new multiprocessing SharedMemory block holding the bytes
+    <arg>:data, named <arg>:name or given a unique name if <arg>:name is
+    None. Raises an ImportError exception if shared memory is not available
+    (Python 3.8 or later is required).
+    '''
+    if shared_memory is None:
+        raise ImportError('shared memory containers require multiprocessing.shared_memory')
+    block = shared_memory.SharedMemory(name = name, create = True, size = max(len(data), 1))
+    block.buf[:len(data)] = data
+    return block
+    
+def _attach_block(name):
+    '''
+    Returns the existing SharedMemory block named <arg>:name. Raises an
+    ImportError exception if shared memory is not available.
+    '''
+    if shared_memory is None:
+        raise ImportError('shared memory containers require multiprocessing.shared_memory')
+    try:
+        return shared_memory.SharedMemory(name = name, track = False)
+    except TypeError:
+        return shared_memory.SharedMemory(name = name)
+        
+def _close_block(views, block):
+    '''
+    Releases the memoryviews <arg>:views and then closes the SharedMemory
+    <arg>:block, which fails while any view of it is alive.
+    '''
+    for view in views:
+        view.release()
+    if block is not None:
+        block.close()
+        
+class FrozenContainer(ABC):
+    '''
+    Base class of the read-only frozen containers. A frozen container keeps
+    its contents in a few flat typed arrays, so it is written to a file with
+    dump and loaded back with load, which maps the file into memory instead
+    of reading it, or wrapped around any buffer with from_buffer. Loading
+    does no per-element work, and pickling a frozen container copies a
+    single buffer. A container placed in shared memory with share is
+    opened by name with attach, and pickles as its name alone, so the
+    workers of a multiprocessing pool all read one copy. Derived classes
+    must implement _sections and _attach, or they cannot be instantiated.
+    '''
+    _kind = None
+    _block = None
+    
+    def __str__(self):
+        return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
+    
+    def __repr__(self):
+        return self.__str__()
+    
+    @abstractmethod
+    def _sections(self):
+        '''
+        Returns the list of typed arrays holding the contents of the
+        container. Implemented by derived classes.
+        '''
+    
+    @abstractmethod
+    def _attach(self, sections):
+        '''
+        Sets up the container from the list of memoryviews <arg>:sections,
+        as returned by <method>:_sections. Implemented by derived classes.
+        '''
+    
+    @classmethod
+    def from_buffer(cls, buffer):
+        '''
+        Returns a frozen container reading its contents from the object
+        <arg>:buffer, which supports the buffer protocol and was filled by
+        <method>:to_bytes or <method>:dump. No data is copied, so the buffer
+        must stay unchanged while the container is in use.
+        '''
+        container = cls.__new__(cls)
+        container._buffer = buffer
+        container._views = _unpack(buffer, cls._kind)
+        container._attach(container._views)
+        return container
+    
+    @classmethod
+    def load(cls, path):
+        '''
+        Returns a frozen container mapping the file at <arg>:path, written
+        by <method>:dump, read-only into memory. Pages of the file are read
+        on first access and shared between processes mapping the same file.
+        '''
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        return cls.from_buffer(buffer)
+    
+    @classmethod
+    def attach(cls, name):
+        '''
+        Returns a frozen container reading the shared memory block named
+        <arg>:name, created by <method>:share in this or another process.
+        '''
+        block = _attach_block(name)
+        container = cls.from_buffer(block.buf)
+        container._block = block
+        return container
+        
+    def share(self, name = None):
+        '''
+        Returns a copy of the container stored in a new shared memory block
+        named <arg>:name, or given a unique name if <arg>:name is None.
+        Other processes open the block with <method>:attach. The block
+        lives until <method>:unlink is called on one of its containers.
+        '''
+        block = _create_block(self.to_bytes(), name)
+        container = type(self).from_buffer(block.buf)
+        container._block = block
+        return container
+        
+    @property
+    def name(self):
+        '''
+        Name of the shared memory block holding the container, or None if
+        the container is not shared.
+        '''
+        return self._block.name if self._block is not None else None
+        
+    def close(self):
+        '''
+        Detaches the container from its shared memory block. The container
+        cannot be used afterwards, but the block stays available to other
+        processes.
+        '''
+        if self._block is not None:
+            _close_block(self._views, self._block)
+            
+    def unlink(self):
+        '''
+        Requests that the shared memory block holding the container be
+        destroyed once every process has closed it. Raises a ValueError
+        exception if the container is not shared.
+        '''
+        if self._block is None:
+            raise ValueError('container is not in shared memory')
+        self._block.unlink()
+        
+    def to_bytes(self):
+        '''
+        Returns the contents of the container as a single bytes object.
+        '''
+        return _pack(self._kind, self._sections())
+    
+    def dump(self, file):
+        '''
+        Writes the contents of the container to <arg>:file, which is either
+        a path or a binary file object.
+        '''
+        if hasattr(file, 'write'):
+            file.write(self.to_bytes())
+        else:
+            with open(file, 'wb') as f:
+                f.write(self.to_bytes())
+    
+    def __reduce__(self):
+        if self._block is not None:
+            return type(self).attach, (self._block.name,)
+        return type(self).from_buffer, (self.to_bytes(),)
+
+class FrozenSortedKeys(FrozenContainer):
+    '''
+    Read-only sorted array of numeric keys providing the ordered queries of
+    the tree classes with binary search. The keys are stored in a typed
+    array of typecode <arg>:typecode ('q' for integers by default, 'd' for
+    floats), so they take a machine word each and can be mapped from a file
+    or shared memory. Only numbers can be stored: trees of strings, tuples
+    or other objects cannot be frozen. Returned by the freeze methods of the
+    trees.
+    '''
+    _kind = b'SKEY'
+    
+    def __init__(self, keys = (), typecode = 'q'):
+        '''
+        Constructor Arguments
+        ---------------------
+        keys: iterable (default: ())
+            Numeric keys to store. Sorted input, such as a tree, is stored
+            as is; other input is sorted and repeated keys dropped. Raises a
+            TypeError exception if a key is not a number of <arg>:typecode.
+            
+        typecode: str (default: 'q')
+            Numeric array typecode of the keys. Raises a ValueError
+            exception for any other typecode.
+        '''
+        if typecode not in _NUMERIC_TYPECODES:
+            raise ValueError('<arg>:typecode must be one of {:s}, got {:s}'.format(_NUMERIC_TYPECODES, repr(typecode)))
+        try:
+            keys = array(typecode, keys)
+        except TypeError as error:
+            raise TypeError('FrozenSortedKeys stores numeric keys only ({:s})'.format(str(error)))
+        for i in range(1, len(keys)):
+            if not keys[i - 1] < keys[i]:
+                keys = array(typecode, sorted(set(keys)))
+                break
+        self._attach([memoryview(keys)])
+    
+    def _sections(self):
+        return [self._keys]
+    
+    def _attach(self, sections):
+        self._keys, = sections
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def __iter__(self):
+        return iter(self._keys)
+    
+    def __reversed__(self):
+        keys = self._keys
+        for i in range(len(keys) - 1, -1, -1):
+            yield keys[i]
+    
+    def __getitem__(self, index):
+        return self._keys[index]
+    
+    def __contains__(self, key):
+        keys = self._keys
+        i = bisect_left(keys, key)
+        return i < len(keys) and keys[i] == key
+    
+    def has_key(self, key):
+        '''
+        Returns True if <arg>:key is stored, False otherwise.
+        '''
+        return key in self
+    
+    def empty(self):
+        '''
+        Returns True if no keys are stored, False otherwise.
+        '''
+        return len(self._keys) == 0
+    
+    def minimum(self):
+        '''
+        Returns the smallest key, or None if no keys are stored.
+        '''
+        return self._keys[0] if len(self._keys) else None
+    
+    def maximum(self):
+        '''
+        Returns the largest key, or None if no keys are stored.
+        '''
+        return self._keys[-1] if len(self._keys) else None
+    
+    def floor(self, key):
+        '''
+        Returns the greatest key less than or equal to <arg>:key, or None if
+        there is no such key.
+        '''
+        i = bisect_right(self._keys, key)
+        return self._keys[i - 1] if i else None
+    
+    def ceiling(self, key):
+        '''
+        Returns the least key greater than or equal to <arg>:key, or None if
+        there is no such key.
+        '''
+        i = bisect_left(self._keys, key)
+        return self._keys[i] if i < len(self._keys) else None
+    
+    def lower(self, key):
+        '''
+        Returns the greatest key strictly less than <arg>:key, or None if
+        there is no such key.
+        '''
+        i = bisect_left(self._keys, key)
+        return self._keys[i - 1] if i else None
+    
+    def higher(self, key):
+        '''
+        Returns the least key strictly greater than <arg>:key, or None if
+        there is no such key.
+        '''
+        i = bisect_right(self._keys, key)
+        return self._keys[i] if i < len(self._keys) else None
+    
+    def rank(self, key):
+        '''
+        Returns the number of stored keys less than <arg>:key.
+        '''
+        return bisect_left(self._keys, key)
+    
+    def count_range(self, lo, hi):
+        '''
+        Returns the number of stored keys k with <arg>:lo <= k < <arg>:hi.
+        '''
+        if not lo < hi:
+            return 0
+        return bisect_left(self._keys, hi) - bisect_left(self._keys, lo)
+    
+    def irange(self, lo = None, hi = None, inclusive = (True, True), reverse = False):
+        '''
+        Lazily yields the keys between <arg>:lo and <arg>:hi in sorted
+        order, or in reverse order if <arg>:reverse is True. A bound of None
+        is unbounded, and <arg>:inclusive gives whether each bound is
+        included.
+        '''
+        keys = self._keys
+        if lo is None:
+            start = 0
+        elif inclusive[0]:
+            start = bisect_left(keys, lo)
+        else:
+            start = bisect_right(keys, lo)
+        if hi is None:
+            stop = len(keys)
+        elif inclusive[1]:
+            stop = bisect_right(keys, hi)
+        else:
+            stop = bisect_left(keys, hi)
+        indices = range(start, stop)
+        if reverse:
+            indices = reversed(indices)
+        for i in indices:
+            yield keys[i]
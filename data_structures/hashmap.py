@@ -1,5 +1,32 @@
+import pickle
 import random
+import zlib
+from array import array
+from bisect import bisect_left
 from . import DoubleLinkedList
+from .frozen import FrozenContainer
+
+_MASK = (1 << 64) - 1
+
+def _stable_hash(key):
+    '''
+    Returns a 64-bit hash of <arg>:key that is the same in every process,
+    unlike hash() of strings, with equal keys hashing equal. Raises a
+    TypeError exception for keys other than numbers, strings, bytes and
+    tuples of them.
+    '''
+    if isinstance(key, (int, float, complex)):
+        return hash(key) & _MASK
+    if isinstance(key, str):
+        return zlib.crc32(key.encode('utf-8', 'surrogatepass'))
+    if isinstance(key, bytes):
+        return zlib.crc32(key)
+    if isinstance(key, tuple):
+        value = 0x345678 ^ len(key)
+        for item in key:
+            value = ((value * 1000003) ^ _stable_hash(item)) & _MASK
+        return value
+    raise TypeError('unsupported key type for FrozenHashmap: {:s}'.format(type(key).__name__))
 
 class Hashmap(object):
     '''
@@ -42,6 +69,24 @@ class Hashmap(object):
     def __len__(self):
         return self._size
         
+    def __getstate__(self):
+        '''
+        Returns the parameters and the (key, value) pairs of the instance
+        for pickling, instead of the bucket lists and their links.
+        '''
+        return {'buckets' : len(self._array), 'load_factor' : self._load_factor,
+                'resizing_factor' : self._resizing_factor, 'A' : self._A,
+                'items' : list(self)}
+                
+    def __setstate__(self, state):
+        self._array = [None] * state['buckets']
+        self._load_factor = state['load_factor']
+        self._resizing_factor = state['resizing_factor']
+        self._A = state['A']
+        self._size = 0
+        for key, value in state['items']:
+            self.__setitem__(key, value)
+            
     def __iter__(self):
         '''
         Yields items of a hashmap instance as tuple (key, value) pairs. This
@@ -153,3 +198,116 @@ class Hashmap(object):
             self._size -= 1
         else:
             raise KeyError("{:s}".format(str(key)))
+            
+    def freeze(self):
+        '''
+        Returns a FrozenHashmap of the (key, value) pairs of the instance.
+        '''
+        return FrozenHashmap(self)
+        
+class FrozenHashmap(FrozenContainer):
+    '''
+    Read-only hashmap kept in a flat buffer that can be written to a file
+    and mapped back into memory (see FrozenContainer). Pairs are pickled
+    into a blob, ordered by a hash of their key that does not depend on the
+    process, and found by binary search on the hashes, so lookups take
+    O(log n) and unpickle only the pairs whose hash matches. Keys must be
+    numbers, strings, bytes or tuples of them; values may be any picklable
+    object.
+    '''
+    _kind = b'HMAP'
+    
+    def __init__(self, items = ()):
+        '''
+        Constructor Arguments
+        ---------------------
+        items: Hashmap, mapping or iterable of (key, value) pairs
+            Pairs to store. For repeated keys the last value is kept.
+        '''
+        if hasattr(items, 'items'):
+            items = items.items()
+        records = sorted((_stable_hash(key), pickle.dumps((key, value), pickle.HIGHEST_PROTOCOL))
+                         for key, value in dict(items).items())
+        offsets = array('Q', [0])
+        blob = bytearray()
+        for hashed, record in records:
+            blob += record
+            offsets.append(len(blob))
+        self._attach([memoryview(array('Q', [hashed for hashed, record in records])),
+                      memoryview(offsets), memoryview(blob)])
+                      
+    def _sections(self):
+        return [self._hashes, self._offsets, self._blob]
+        
+    def _attach(self, sections):
+        self._hashes, self._offsets, self._blob = sections
+        
+    def __len__(self):
+        return len(self._hashes)
+        
+    def _record(self, index):
+        return pickle.loads(self._blob[self._offsets[index]:self._offsets[index + 1]])
+        
+    def _finditem(self, key):
+        '''
+        Returns a (bool, value) pair, where bool is True if <arg>:key is
+        found.
+        '''
+        hashed = _stable_hash(key)
+        hashes = self._hashes
+        index = bisect_left(hashes, hashed)
+        while index < len(hashes) and hashes[index] == hashed:
+            k, value = self._record(index)
+            if k == key:
+                return True, value
+            index += 1
+        return False, None
+        
+    def __iter__(self):
+        '''
+        Yields the (key, value) pairs of the map.
+        '''
+        for index in range(len(self._hashes)):
+            yield self._record(index)
+            
+    def iteritems(self):
+        '''
+        Yields items of the map as tuple (key, value) pairs.
+        '''
+        for value in self:
+            yield value
+            
+    def iterkeys(self):
+        '''
+        Yields keys of the map.
+        '''
+        for value in self:
+            yield value[0]
+            
+    def itervalues(self):
+        '''
+        Yields values of the map.
+        '''
+        for value in self:
+            yield value[1]
+            
+    def __getitem__(self, key):
+        '''
+        Returns the value corresponding to key. If no such key is found,
+        raises a KeyError exception.
+        '''
+        found, value = self._finditem(key)
+        if not found:
+            raise KeyError("{:s}".format(str(key)))
+        return value
+        
+    def get(self, key, default = None):
+        '''
+        Returns the value corresponding to key, or <arg>:default if no such
+        key is found.
+        '''
+        found, value = self._finditem(key)
+        return value if found else default
+        
+    def __contains__(self, key):
+        return self._finditem(key)[0]
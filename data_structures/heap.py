@@ -1,21 +1,1255 @@
+from array import array
+from .frozen import _pack, _unpack, _create_block, _attach_block, _close_block
+
 class EmptyError(Exception):
     '''
-    Exception raised when delete or peek operations are called on an
-    empty heap.
+    Exception raised when delete or peek operations are called on an
+    empty heap.
+    '''
+    pass
+
+class FullError(Exception):
+    '''
+    Exception raised when push operations are called on a shared heap that
+    holds as many keys as its capacity.
+    '''
+    pass
+
+class MinArrayHeap(object):
+    '''
+    Array-based minimum heap.
+    '''
+    def __init__(self):
+        '''
+        Private Instance Attributes:
+            _keylist : list
+                Stores keys currently in heap instance.
+        '''
+        self._keylist = list()
+        
+    @classmethod
+    def from_iterable(cls, keys):
+        '''
+        Returns a new heap instance containing the keys in the iterable
+        <arg>:keys. The heap is built bottom-up in O(n) time.
+        '''
+        heap = cls()
+        heap._keylist = list(keys)
+        heap._heapify()
+        return heap
+        
+    def __str__(self):
+        return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
+        
+    def __repr__(self):
+        return self.__str__()
+        
+    def __iter__(self):
+        for value in self._keylist:
+            yield value
+            
+    def __list__(self):
+        return list(self._keylist)
+        
+    def __len__(self):
+        return len(self._keylist)
+        
+    def __init_subclass__(cls, **kwargs):
+        '''
+        The ordering of an array heap is given by _compare together with
+        _float_up and _float_down, which inline the comparison for speed.
+        Raises a TypeError exception when a derived class would take these
+        methods from different classes, e.g. by overriding _compare alone,
+        since it would then silently keep the order of its base class.
+        '''
+        super().__init_subclass__(**kwargs)
+        owners = set()
+        for name in ('_compare', '_float_up', '_float_down'):
+            owners.add(next(base for base in cls.__mro__ if name in vars(base)))
+        if len(owners) > 1:
+            raise TypeError('{:s} must define _compare, _float_up and _float_down together'.format(cls.__name__))
+        
+    def _compare(self, key1, key2):
+        '''
+        Returns True if <arg>:key1 < <arg>:key2, False otherwise. A derived
+        class that changes the ordering overrides this method together with
+        _float_up and _float_down (see MaxArrayHeap).
+        '''
+        return key1 < key2
+        
+    def _float_up(self, index):
+        '''
+        Key value located in self._keylist at index <arg>:index is floated
+        towards the zero index as to maintain the heap invariant property.
+        Parents are shifted down into a moving hole and the key is written
+        once at its final position.
+        '''
+        keylist = self._keylist
+        key = keylist[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            parent_key = keylist[parent]
+            if key < parent_key:
+                keylist[index] = parent_key
+                index = parent
+            else:
+                break
+        keylist[index] = key
+            
+    def _float_down(self, index):
+        '''
+        Key value located in self._keylist at index <arg>:index is floated
+        towards the end of self._keylist as to maintain the heap invariant
+        property. Children are shifted up into a moving hole and the key is
+        written once at its final position.
+        '''
+        keylist = self._keylist
+        end = len(keylist)
+        key = keylist[index]
+        child = (index << 1) + 1
+        while child < end:
+            right = child + 1
+            if right < end and keylist[right] < keylist[child]:
+                child = right
+            child_key = keylist[child]
+            if child_key < key:
+                keylist[index] = child_key
+                index = child
+                child = (index << 1) + 1
+            else:
+                break
+        keylist[index] = key
+                
+    def peek(self):
+        '''
+        Returns the value of the head key in the heap without removing
+        the key. Raises and EmptyError exception if the heap is empty.
+        '''
+        if not self._keylist:
+            raise EmptyError('cannot call method peek() on empty heap instance')
+        return self._keylist[0]
+        
+    def push(self, key):
+        '''
+        Adds <arg>:key to the heap instance.
+        '''
+        self._keylist.append(key)
+        self._float_up(len(self._keylist) - 1)
+        
+    def _heapify(self):
+        '''
+        Restores the heap invariant over the whole of self._keylist by
+        floating down every parent index, starting from the last parent
+        (Floyd's bottom-up method). Runs in O(n) time.
+        '''
+        for index in range((len(self._keylist) >> 1) - 1, -1, -1):
+            self._float_down(index)
+        
+    def push_multiple(self, keys):
+        '''
+        Pushes the key values in the iterable <arg>:keys onto a heap
+        instance. When the batch is large relative to the heap, the keys are
+        appended and the whole heap is rebuilt with an O(n) heapify instead
+        of floating up each key individually.
+        '''
+        keys = list(keys)
+        total = len(self._keylist) + len(keys)
+        if len(keys) * total.bit_length() > total:
+            self._keylist.extend(keys)
+            self._heapify()
+        else:
+            for key in keys:
+                self.push(key)
+                
+    def merge(self, other_heap):
+        '''
+        Pushes every key in <arg>:other_heap onto the heap instance.
+        <arg>:other_heap may be any heap or iterable of keys and is left
+        unmodified.
+        '''
+        self.push_multiple(other_heap)
+        
+    def pop(self):
+        '''
+        Removes and returns the value at the head of the heap while
+        maintaining the heap invariant.
+        '''
+        if not self._keylist:
+            raise EmptyError('cannot call method pop() on empty heap instance')
+        value = self.peek()
+        self._delete(0)
+        return value
+        
+    def pushpop(self, key):
+        '''
+        Pushes <arg>:key onto the heap and then proceeds to pop and return
+        the key at the head of the heap. Performs at most a single sift: if
+        <arg>:key would be popped immediately it is returned without
+        touching the heap, otherwise it replaces the head key.
+        '''
+        keylist = self._keylist
+        if keylist and self._compare(keylist[0], key):
+            key, keylist[0] = keylist[0], key
+            self._float_down(0)
+        return key
+        
+    def replace(self, key):
+        '''
+        Pops and returns the key at the head of the heap and then pushes
+        <arg>:key, using a single sift. Unlike pushpop, the returned key
+        is always the previous head, even if <arg>:key would precede it.
+        Raises an EmptyError exception if the heap is empty.
+        '''
+        keylist = self._keylist
+        if not keylist:
+            raise EmptyError('cannot call method replace() on empty heap instance')
+        value = keylist[0]
+        keylist[0] = key
+        self._float_down(0)
+        return value
+        
+    def _delete(self, index):
+        '''
+        Private method to delete the key at index <arg>:index of self._keylist.
+        '''
+        last = self._keylist.pop()
+        if index < len(self._keylist):
+            self._keylist[index] = last
+            self._float_down(index)
+            self._float_up(index)
+        
+    def delete(self, key):
+        '''
+        Deletes <arg>:key from the heap instance. If the heap does not contain
+        <arg>:key, raises a KeyError exception.
+        '''
+        try:
+            index = self._keylist.index(key)
+        except ValueError:
+            raise KeyError(str(key))
+        self._delete(index)
+
+    def clear(self):
+        '''
+        Empties the heap instance.
+        '''
+        self._keylist.clear()
+    
+class MaxArrayHeap(MinArrayHeap):
+    '''
+    Array-based maximum heap. Derived class of MinArrayHeap.
+    '''
+    def _compare(self, key1, key2):
+        '''
+        Returns True if <arg>:key1 > <arg>:key2, False otherwise.
+        '''
+        return key1 > key2
+        
+    def _float_up(self, index):
+        '''
+        Maximum heap counterpart of MinArrayHeap._float_up.
+        '''
+        keylist = self._keylist
+        key = keylist[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            parent_key = keylist[parent]
+            if key > parent_key:
+                keylist[index] = parent_key
+                index = parent
+            else:
+                break
+        keylist[index] = key
+            
+    def _float_down(self, index):
+        '''
+        Maximum heap counterpart of MinArrayHeap._float_down.
+        '''
+        keylist = self._keylist
+        end = len(keylist)
+        key = keylist[index]
+        child = (index << 1) + 1
+        while child < end:
+            right = child + 1
+            if right < end and keylist[right] > keylist[child]:
+                child = right
+            child_key = keylist[child]
+            if child_key > key:
+                keylist[index] = child_key
+                index = child
+                child = (index << 1) + 1
+            else:
+                break
+        keylist[index] = key
+
+class KeyedMinHeap(MinArrayHeap):
+    '''
+    Array-based minimum heap ordered by a key function. The priority of each
+    item is computed once at push time and stored in a parallel array next
+    to _keylist, so the sifts compare priorities rather than the items
+    themselves. Derived class of MinArrayHeap.
+    '''
+    _tie_order = 1
+    
+    def __init__(self, key = None, stable = False):
+        '''
+        Constructor Arguments:
+            key : callable or None (default: None)
+                Function computing the priority of an item. If None, items
+                are their own priorities.
+                
+            stable : bool (default: False)
+                If True, items with equal priorities are popped in the order
+                they were pushed.
+                
+        Private Instance Attributes:
+            _keylist : list
+                Stores items currently in heap instance.
+                
+            _priorities : list
+                Stores the priority of each item at the same index. In stable
+                mode each priority is paired with a push counter.
+        '''
+        super().__init__()
+        self._key = key
+        self._stable = stable
+        self._priorities = list()
+        self._count = 0
+        
+    @classmethod
+    def from_iterable(cls, items, key = None, stable = False):
+        '''
+        Returns a new heap instance containing the items in the iterable
+        <arg>:items. The heap is built bottom-up in O(n) time.
+        '''
+        heap = cls(key, stable)
+        heap.push_multiple(items)
+        return heap
+        
+    def _compare(self, key1, key2):
+        '''
+        Returns True if <arg>:key1 < <arg>:key2, False otherwise.
+        '''
+        return key1 < key2
+        
+    def _priority(self, item):
+        '''
+        Returns the stored priority of <arg>:item.
+        '''
+        priority = item if self._key is None else self._key(item)
+        if self._stable:
+            self._count += 1
+            return priority, self._tie_order * self._count
+        return priority
+        
+    def _float_up(self, index):
+        '''
+        Item and priority located at index <arg>:index are floated towards
+        the zero index as to maintain the heap invariant property. Parents
+        are shifted down into a moving hole and the pair is written once at
+        its final position.
+        '''
+        keylist = self._keylist
+        priorities = self._priorities
+        item = keylist[index]
+        priority = priorities[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            parent_priority = priorities[parent]
+            if priority < parent_priority:
+                priorities[index] = parent_priority
+                keylist[index] = keylist[parent]
+                index = parent
+            else:
+                break
+        priorities[index] = priority
+        keylist[index] = item
+        
+    def _float_down(self, index):
+        '''
+        Item and priority located at index <arg>:index are floated towards
+        the end of the arrays as to maintain the heap invariant property.
+        Children are shifted up into a moving hole and the pair is written
+        once at its final position.
+        '''
+        keylist = self._keylist
+        priorities = self._priorities
+        end = len(keylist)
+        item = keylist[index]
+        priority = priorities[index]
+        child = (index << 1) + 1
+        while child < end:
+            right = child + 1
+            if right < end and priorities[right] < priorities[child]:
+                child = right
+            child_priority = priorities[child]
+            if child_priority < priority:
+                priorities[index] = child_priority
+                keylist[index] = keylist[child]
+                index = child
+                child = (index << 1) + 1
+            else:
+                break
+        priorities[index] = priority
+        keylist[index] = item
+        
+    def push(self, item):
+        '''
+        Adds <arg>:item to the heap instance.
+        '''
+        self._priorities.append(self._priority(item))
+        self._keylist.append(item)
+        self._float_up(len(self._keylist) - 1)
+        
+    def push_multiple(self, items):
+        '''
+        Pushes the items in the iterable <arg>:items onto a heap instance.
+        When the batch is large relative to the heap, the items are appended
+        and the whole heap is rebuilt with an O(n) heapify.
+        '''
+        items = list(items)
+        total = len(self._keylist) + len(items)
+        if len(items) * total.bit_length() > total:
+            self._priorities.extend([self._priority(item) for item in items])
+            self._keylist.extend(items)
+            self._heapify()
+        else:
+            for item in items:
+                self.push(item)
+                
+    def pushpop(self, item):
+        '''
+        Pushes <arg>:item onto the heap and then proceeds to pop and return
+        the item at the head of the heap, using at most a single sift.
+        '''
+        priority = self._priority(item)
+        if self._keylist and self._compare(self._priorities[0], priority):
+            item, self._keylist[0] = self._keylist[0], item
+            self._priorities[0] = priority
+            self._float_down(0)
+        return item
+        
+    def replace(self, item):
+        '''
+        Pops and returns the item at the head of the heap and then pushes
+        <arg>:item, using a single sift. Raises an EmptyError exception if
+        the heap is empty.
+        '''
+        if not self._keylist:
+            raise EmptyError('cannot call method replace() on empty heap instance')
+        value = self._keylist[0]
+        self._keylist[0] = item
+        self._priorities[0] = self._priority(item)
+        self._float_down(0)
+        return value
+        
+    def _delete(self, index):
+        '''
+        Private method to delete the item at index <arg>:index of
+        self._keylist together with its priority.
+        '''
+        last_item = self._keylist.pop()
+        last_priority = self._priorities.pop()
+        if index < len(self._keylist):
+            self._keylist[index] = last_item
+            self._priorities[index] = last_priority
+            self._float_down(index)
+            self._float_up(index)
+            
+    def clear(self):
+        '''
+        Empties the heap instance.
+        '''
+        self._keylist.clear()
+        self._priorities.clear()
+        
+class KeyedMaxHeap(KeyedMinHeap):
+    '''
+    Array-based maximum heap ordered by a key function. Derived class of
+    KeyedMinHeap.
+    '''
+    _tie_order = -1
+    
+    def _compare(self, key1, key2):
+        '''
+        Returns True if <arg>:key1 > <arg>:key2, False otherwise.
+        '''
+        return key1 > key2
+        
+    def _float_up(self, index):
+        '''
+        Maximum heap counterpart of KeyedMinHeap._float_up.
+        '''
+        keylist = self._keylist
+        priorities = self._priorities
+        item = keylist[index]
+        priority = priorities[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            parent_priority = priorities[parent]
+            if priority > parent_priority:
+                priorities[index] = parent_priority
+                keylist[index] = keylist[parent]
+                index = parent
+            else:
+                break
+        priorities[index] = priority
+        keylist[index] = item
+        
+    def _float_down(self, index):
+        '''
+        Maximum heap counterpart of KeyedMinHeap._float_down.
+        '''
+        keylist = self._keylist
+        priorities = self._priorities
+        end = len(keylist)
+        item = keylist[index]
+        priority = priorities[index]
+        child = (index << 1) + 1
+        while child < end:
+            right = child + 1
+            if right < end and priorities[right] > priorities[child]:
+                child = right
+            child_priority = priorities[child]
+            if child_priority > priority:
+                priorities[index] = child_priority
+                keylist[index] = keylist[child]
+                index = child
+                child = (index << 1) + 1
+            else:
+                break
+        priorities[index] = priority
+        keylist[index] = item
+
+class IndexedMinHeap(MinArrayHeap):
+    '''
+    Array-based addressable minimum heap of (item, priority) pairs. A map
+    from each item to its slot in the underlying arrays is maintained on
+    every move, so membership tests are O(1) and priority updates and
+    deletions by item are O(log n). Items must be hashable and unique.
+    Derived class of MinArrayHeap.
+    '''
+    def __init__(self):
+        '''
+        Private Instance Attributes:
+            _keylist : list
+                Stores priorities currently in heap instance.
+                
+            _items : list
+                Stores the item of each priority at the same index.
+                
+            _position : dict
+                Maps each item to its index in _keylist and _items.
+        '''
+        super().__init__()
+        self._items = list()
+        self._position = dict()
+        
+    @classmethod
+    def from_iterable(cls, pairs):
+        '''
+        Returns a new heap instance containing the (item, priority) pairs in
+        the iterable <arg>:pairs. The heap is built bottom-up in O(n) time.
+        '''
+        heap = cls()
+        heap.push_multiple(pairs)
+        return heap
+        
+    def __iter__(self):
+        for pair in zip(self._items, self._keylist):
+            yield pair
+            
+    def __list__(self):
+        return list(self)
+            
+    def __contains__(self, item):
+        return item in self._position
+        
+    def _compare(self, key1, key2):
+        '''
+        Returns True if <arg>:key1 < <arg>:key2, False otherwise.
+        '''
+        return key1 < key2
+        
+    def _float_up(self, index):
+        '''
+        Pair located at index <arg>:index is floated towards the zero index
+        as to maintain the heap invariant property. Every pair shifted down
+        has its entry in self._position updated, and the moving pair is
+        written once at its final position.
+        '''
+        keylist = self._keylist
+        items = self._items
+        position = self._position
+        key = keylist[index]
+        item = items[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            parent_key = keylist[parent]
+            if key < parent_key:
+                keylist[index] = parent_key
+                parent_item = items[parent]
+                items[index] = parent_item
+                position[parent_item] = index
+                index = parent
+            else:
+                break
+        keylist[index] = key
+        items[index] = item
+        position[item] = index
+        
+    def _float_down(self, index):
+        '''
+        Pair located at index <arg>:index is floated towards the end of the
+        arrays as to maintain the heap invariant property. Every pair
+        shifted up has its entry in self._position updated, and the moving
+        pair is written once at its final position.
+        '''
+        keylist = self._keylist
+        items = self._items
+        position = self._position
+        end = len(keylist)
+        key = keylist[index]
+        item = items[index]
+        child = (index << 1) + 1
+        while child < end:
+            right = child + 1
+            if right < end and keylist[right] < keylist[child]:
+                child = right
+            child_key = keylist[child]
+            if child_key < key:
+                keylist[index] = child_key
+                child_item = items[child]
+                items[index] = child_item
+                position[child_item] = index
+                index = child
+                child = (index << 1) + 1
+            else:
+                break
+        keylist[index] = key
+        items[index] = item
+        position[item] = index
+        
+    def peek(self):
+        '''
+        Returns the (item, priority) pair at the head of the heap without
+        removing it. Raises an EmptyError exception if the heap is empty.
+        '''
+        if not self._keylist:
+            raise EmptyError('cannot call method peek() on empty heap instance')
+        return self._items[0], self._keylist[0]
+        
+    def priority(self, item):
+        '''
+        Returns the priority of <arg>:item. If the heap does not contain
+        <arg>:item, raises a KeyError exception.
+        '''
+        return self._keylist[self._position[item]]
+        
+    def push(self, item, priority):
+        '''
+        Adds <arg>:item with priority <arg>:priority to the heap instance.
+        If the heap already contains <arg>:item, raises a ValueError
+        exception; use update_priority to change its priority.
+        '''
+        if item in self._position:
+            raise ValueError('heap already contains item:{:s}'.format(str(item)))
+        self._keylist.append(priority)
+        self._items.append(item)
+        self._float_up(len(self._keylist) - 1)
+        
+    def push_multiple(self, pairs):
+        '''
+        Pushes the (item, priority) pairs in the iterable <arg>:pairs onto a
+        heap instance. When the batch is large relative to the heap, the
+        pairs are appended and the whole heap is rebuilt with an O(n)
+        heapify. The whole batch is checked first, so if an item is already
+        in the heap or repeated in <arg>:pairs, a ValueError exception is
+        raised and the heap is left unchanged.
+        '''
+        pairs = list(pairs)
+        position = self._position
+        seen = set()
+        for item, priority in pairs:
+            if item in position or item in seen:
+                raise ValueError('heap already contains item:{:s}'.format(str(item)))
+            seen.add(item)
+        total = len(self._keylist) + len(pairs)
+        if len(pairs) * total.bit_length() > total:
+            for item, priority in pairs:
+                position[item] = len(self._items)
+                self._items.append(item)
+                self._keylist.append(priority)
+            self._heapify()
+        else:
+            for item, priority in pairs:
+                self.push(item, priority)
+                
+    def pop(self):
+        '''
+        Removes and returns the (item, priority) pair at the head of the
+        heap while maintaining the heap invariant.
+        '''
+        if not self._keylist:
+            raise EmptyError('cannot call method pop() on empty heap instance')
+        pair = self._items[0], self._keylist[0]
+        self._delete(0)
+        return pair
+        
+    def pushpop(self, item, priority):
+        '''
+        Pushes <arg>:item with priority <arg>:priority onto the heap and then
+        proceeds to pop and return the (item, priority) pair at the head of
+        the heap, using at most a single sift.
+        '''
+        if item in self._position:
+            raise ValueError('heap already contains item:{:s}'.format(str(item)))
+        if self._keylist and self._compare(self._keylist[0], priority):
+            pair = self._items[0], self._keylist[0]
+            del self._position[pair[0]]
+            self._keylist[0] = priority
+            self._items[0] = item
+            self._float_down(0)
+            return pair
+        return item, priority
+        
+    def replace(self, item, priority):
+        '''
+        Pops and returns the (item, priority) pair at the head of the heap and
+        then pushes <arg>:item with priority <arg>:priority, using a single
+        sift. Raises an EmptyError exception if the heap is empty.
+        '''
+        if not self._keylist:
+            raise EmptyError('cannot call method replace() on empty heap instance')
+        pair = self._items[0], self._keylist[0]
+        if item in self._position and item != pair[0]:
+            raise ValueError('heap already contains item:{:s}'.format(str(item)))
+        del self._position[pair[0]]
+        self._keylist[0] = priority
+        self._items[0] = item
+        self._float_down(0)
+        return pair
+        
+    def update_priority(self, item, priority):
+        '''
+        Changes the priority of <arg>:item to <arg>:priority in O(log n),
+        floating it in whichever direction the change requires. Serves as
+        both decrease-key and increase-key. If the heap does not contain
+        <arg>:item, raises a KeyError exception.
+        '''
+        index = self._position[item]
+        self._keylist[index] = priority
+        self._float_up(index)
+        self._float_down(self._position[item])
+        
+    def _delete(self, index):
+        '''
+        Private method to delete the pair at index <arg>:index of the
+        underlying arrays.
+        '''
+        del self._position[self._items[index]]
+        last_key = self._keylist.pop()
+        last_item = self._items.pop()
+        if index < len(self._keylist):
+            self._keylist[index] = last_key
+            self._items[index] = last_item
+            self._float_down(index)
+            self._float_up(self._position[last_item])
+        
+    def delete(self, item):
+        '''
+        Deletes <arg>:item from the heap instance in O(log n). If the heap
+        does not contain <arg>:item, raises a KeyError exception.
+        '''
+        if item not in self._position:
+            raise KeyError(str(item))
+        self._delete(self._position[item])
+        
+    def clear(self):
+        '''
+        Empties the heap instance.
+        '''
+        self._keylist.clear()
+        self._items.clear()
+        self._position.clear()
+        
+class IndexedMaxHeap(IndexedMinHeap):
+    '''
+    Array-based addressable maximum heap. Derived class of IndexedMinHeap.
+    '''
+    def _compare(self, key1, key2):
+        '''
+        Returns True if <arg>:key1 > <arg>:key2, False otherwise.
+        '''
+        return key1 > key2
+        
+    def _float_up(self, index):
+        '''
+        Maximum heap counterpart of IndexedMinHeap._float_up.
+        '''
+        keylist = self._keylist
+        items = self._items
+        position = self._position
+        key = keylist[index]
+        item = items[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            parent_key = keylist[parent]
+            if key > parent_key:
+                keylist[index] = parent_key
+                parent_item = items[parent]
+                items[index] = parent_item
+                position[parent_item] = index
+                index = parent
+            else:
+                break
+        keylist[index] = key
+        items[index] = item
+        position[item] = index
+        
+    def _float_down(self, index):
+        '''
+        Maximum heap counterpart of IndexedMinHeap._float_down.
+        '''
+        keylist = self._keylist
+        items = self._items
+        position = self._position
+        end = len(keylist)
+        key = keylist[index]
+        item = items[index]
+        child = (index << 1) + 1
+        while child < end:
+            right = child + 1
+            if right < end and keylist[right] > keylist[child]:
+                child = right
+            child_key = keylist[child]
+            if child_key > key:
+                keylist[index] = child_key
+                child_item = items[child]
+                items[index] = child_item
+                position[child_item] = index
+                index = child
+                child = (index << 1) + 1
+            else:
+                break
+        keylist[index] = key
+        items[index] = item
+        position[item] = index
+
+class DAryMinHeap(MinArrayHeap):
+    '''
+    Array-based minimum heap in which every node has <arg>:arity children.
+    A wider node gives a tree of depth log_d(n), so pushes take fewer
+    iterations than in a binary heap while pops compare more children per
+    level. Derived class of MinArrayHeap.
+    '''
+    def __init__(self, arity = 4):
+        '''
+        Constructor Arguments:
+            arity : int (default: 4)
+                Number of children of each node. Must be at least 2.
+                
+        Private Instance Attributes:
+            _keylist : list
+                Stores keys currently in heap instance.
+                
+            _arity : int
+                Number of children of each node.
+        '''
+        super().__init__()
+        if arity < 2:
+            raise ValueError('<arg>:arity must be at least 2')
+        self._arity = int(arity)
+        
+    @classmethod
+    def from_iterable(cls, keys, arity = 4):
+        '''
+        Returns a new heap instance with arity <arg>:arity containing the keys
+        in the iterable <arg>:keys. The heap is built bottom-up in O(n) time.
+        '''
+        heap = cls(arity)
+        heap._keylist = list(keys)
+        heap._heapify()
+        return heap
+        
+    def arity(self):
+        '''
+        Returns the number of children of each node.
+        '''
+        return self._arity
+        
+    def _compare(self, key1, key2):
+        '''
+        Returns True if <arg>:key1 < <arg>:key2, False otherwise.
+        '''
+        return key1 < key2
+        
+    def _float_up(self, index):
+        '''
+        Key value located in self._keylist at index <arg>:index is floated
+        towards the zero index as to maintain the heap invariant property.
+        '''
+        keylist = self._keylist
+        arity = self._arity
+        key = keylist[index]
+        while index > 0:
+            parent = (index - 1) // arity
+            parent_key = keylist[parent]
+            if key < parent_key:
+                keylist[index] = parent_key
+                index = parent
+            else:
+                break
+        keylist[index] = key
+        
+    def _float_down(self, index):
+        '''
+        Key value located in self._keylist at index <arg>:index is floated
+        towards the end of self._keylist as to maintain the heap invariant
+        property. Only the last parent can have fewer than arity children,
+        so the bound of the child scan is a full block everywhere else and
+        no range object is built per level.
+        '''
+        keylist = self._keylist
+        arity = self._arity
+        end = len(keylist)
+        last_full = end - arity
+        key = keylist[index]
+        first = index * arity + 1
+        while first < end:
+            stop = first + arity if first <= last_full else end
+            child = first
+            child_key = keylist[first]
+            i = first + 1
+            while i < stop:
+                sibling_key = keylist[i]
+                if sibling_key < child_key:
+                    child = i
+                    child_key = sibling_key
+                i += 1
+            if child_key < key:
+                keylist[index] = child_key
+                index = child
+                first = index * arity + 1
+            else:
+                break
+        keylist[index] = key
+        
+    def _heapify(self):
+        for index in range((len(self._keylist) - 2) // self._arity, -1, -1):
+            self._float_down(index)
+            
+class DAryMaxHeap(DAryMinHeap):
+    '''
+    Array-based maximum heap with configurable arity. Derived class of
+    DAryMinHeap.
+    '''
+    def _compare(self, key1, key2):
+        '''
+        Returns True if <arg>:key1 > <arg>:key2, False otherwise.
+        '''
+        return key1 > key2
+        
+    def _float_up(self, index):
+        '''
+        Maximum heap counterpart of DAryMinHeap._float_up.
+        '''
+        keylist = self._keylist
+        arity = self._arity
+        key = keylist[index]
+        while index > 0:
+            parent = (index - 1) // arity
+            parent_key = keylist[parent]
+            if key > parent_key:
+                keylist[index] = parent_key
+                index = parent
+            else:
+                break
+        keylist[index] = key
+        
+    def _float_down(self, index):
+        '''
+        Maximum heap counterpart of DAryMinHeap._float_down.
+        '''
+        keylist = self._keylist
+        arity = self._arity
+        end = len(keylist)
+        last_full = end - arity
+        key = keylist[index]
+        first = index * arity + 1
+        while first < end:
+            stop = first + arity if first <= last_full else end
+            child = first
+            child_key = keylist[first]
+            i = first + 1
+            while i < stop:
+                sibling_key = keylist[i]
+                if sibling_key > child_key:
+                    child = i
+                    child_key = sibling_key
+                i += 1
+            if child_key > key:
+                keylist[index] = child_key
+                index = child
+                first = index * arity + 1
+            else:
+                break
+        keylist[index] = key
+
+class SharedMinArrayHeap(MinArrayHeap):
+    '''
+    Array-based minimum heap of numbers kept in a multiprocessing
+    SharedMemory block, so every process attached to the block by name
+    works on one heap without copying it. The keys live in a typed array of
+    typecode <arg>:typecode ('q' for integers by default, 'd' for floats)
+    with room for <arg>:capacity keys. Operations are not synchronized:
+    processes that modify a heap shared with others must hold a common
+    lock, such as a multiprocessing.Lock, around every call. A shared heap
+    pickles as the name of its block. Derived class of MinArrayHeap.
+    '''
+    def __init__(self, capacity, typecode = 'q', name = None):
+        '''
+        Constructor Arguments:
+            capacity : int
+                Maximum number of keys in the heap.
+                
+            typecode : str (default: 'q')
+                array typecode of the keys.
+                
+            name : str (optional)
+                Name of the new shared memory block. A unique name is
+                generated if None.
+                
+        Private Instance Attributes:
+            _keylist : memoryview
+                View of the keys currently in the heap, refreshed from the
+                shared length before every operation.
+        '''
+        if capacity < 1:
+            raise ValueError('<arg>:capacity must be positive')
+        data = _pack(b'HEAP', [array('q', [0]), array(typecode, [0]) * int(capacity)])
+        self._open(_create_block(data, name))
+        
+    @classmethod
+    def attach(cls, name):
+        '''
+        Returns a heap instance working on the shared memory block named
+        <arg>:name, created by another heap instance in this or another
+        process.
+        '''
+        heap = cls.__new__(cls)
+        heap._open(_attach_block(name))
+        return heap
+        
+    @classmethod
+    def from_iterable(cls, keys, typecode = 'q', capacity = None, name = None):
+        '''
+        Returns a new shared heap containing the keys in the iterable
+        <arg>:keys, with room for <arg>:capacity keys (the number of keys
+        if None). The heap is built bottom-up in O(n) time.
+        '''
+        keys = array(typecode, keys)
+        heap = cls(max(capacity or len(keys), 1), typecode, name)
+        heap.push_multiple(keys)
+        return heap
+        
+    def _open(self, block):
+        '''
+        Private method that sets up the instance on the SharedMemory
+        <arg>:block.
+        '''
+        self._length, self._keys = _unpack(block.buf, b'HEAP')
+        self._sync()
+        self._block = block
+        
+    def _sync(self):
+        '''
+        Private method that points self._keylist at the keys currently in
+        the heap, whose number may have been changed by another process.
+        '''
+        self._keylist = self._keys[:self._length[0]]
+        return self._keylist
+        
+    def _resize(self, length):
+        '''
+        Private method that sets the number of keys in the heap to
+        <arg>:length.
+        '''
+        self._length[0] = length
+        self._keylist = self._keys[:length]
+        
+    def __reduce__(self):
+        return type(self).attach, (self._block.name,)
+        
+    def __iter__(self):
+        for value in self._sync().tolist():
+            yield value
+            
+    def __list__(self):
+        return self._sync().tolist()
+        
+    def __len__(self):
+        return self._length[0]
+        
+    @property
+    def name(self):
+        '''
+        Name of the shared memory block holding the heap.
+        '''
+        return self._block.name
+        
+    def capacity(self):
+        '''
+        Returns the maximum number of keys in the heap.
+        '''
+        return len(self._keys)
+        
+    def peek(self):
+        self._sync()
+        return super().peek()
+        
+    def push(self, key):
+        '''
+        Adds <arg>:key to the heap instance. Raises a FullError exception if
+        the heap is full.
+        '''
+        length = self._length[0]
+        if length == len(self._keys):
+            raise FullError('cannot call method push() on full heap instance')
+        self._keys[length] = key
+        self._resize(length + 1)
+        self._float_up(length)
+        
+    def push_multiple(self, keys):
+        '''
+        Pushes the key values in the iterable <arg>:keys onto the heap
+        instance, as MinArrayHeap.push_multiple. Raises a FullError
+        exception, leaving the heap unchanged, if the keys do not fit.
+        '''
+        keys = array(self._keys.format, keys)
+        length = self._length[0]
+        total = length + len(keys)
+        if total > len(self._keys):
+            raise FullError('cannot call method push_multiple() with more keys than the heap has room for')
+        self._keys[length:total] = memoryview(keys)
+        self._resize(total)
+        if len(keys) * total.bit_length() > total:
+            self._heapify()
+        else:
+            for index in range(length, total):
+                self._float_up(index)
+                
+    def pop(self):
+        self._sync()
+        return super().pop()
+        
+    def pushpop(self, key):
+        self._sync()
+        return super().pushpop(key)
+        
+    def replace(self, key):
+        self._sync()
+        return super().replace(key)
+        
+    def _delete(self, index):
+        length = self._length[0] - 1
+        last = self._keys[length]
+        self._resize(length)
+        if index < length:
+            self._keylist[index] = last
+            self._float_down(index)
+            self._float_up(index)
+            
+    def delete(self, key):
+        '''
+        Deletes <arg>:key from the heap instance. If the heap does not contain
+        <arg>:key, raises a KeyError exception.
+        '''
+        for index, value in enumerate(self._sync()):
+            if value == key:
+                self._delete(index)
+                return
+        raise KeyError(str(key))
+        
+    def clear(self):
+        '''
+        Empties the heap instance.
+        '''
+        self._resize(0)
+        
+    def close(self):
+        '''
+        Detaches the instance from its shared memory block. The instance
+        cannot be used afterwards, but the block stays available to other
+        processes.
+        '''
+        self._keylist = None
+        _close_block([self._length, self._keys], self._block)
+        
+    def unlink(self):
+        '''
+        Requests that the shared memory block holding the heap be destroyed
+        once every process has closed it.
+        '''
+        self._block.unlink()
+        
+class SharedMaxArrayHeap(SharedMinArrayHeap, MaxArrayHeap):
+    '''
+    Array-based maximum heap of numbers kept in shared memory. Derived class
+    of SharedMinArrayHeap taking its ordering from MaxArrayHeap, which
+    SharedMinArrayHeap does not override.
     '''
     pass
 
-class MinArrayHeap(object):
+class HeapNode(object):
     '''
-    Array-based minimum heap.
+    Node object for tree-based heap implementation. Nodes keep their key for
+    their whole lifetime and are moved within the tree instead, so the node
+    returned by push can be used as a handle for delete.
+    '''
+    __slots__ = ('key', 'parent', 'left', 'right')
+    
+    def __init__(self, key, parent = None):
+        self.key = key
+        self.parent = parent
+        self.left = None
+        self.right = None
+        
+class MinTreeHeap(object):
+    '''
+    Tree-based minimum heap.
     '''
     def __init__(self):
         '''
         Private Instance Attributes:
-            _keylist : list
-                Stores keys currently in heap instance.
+            _root : HeapNode
+                Root node of heap instance
+                
+            _size : int
+                Current size of the heap instance
         '''
-        self._keylist = list()
+        self._root = None
+        self._size = 0
+        
+    def __getstate__(self):
+        '''
+        Returns the keys of the heap in level order for pickling, which
+        fixes the shape of the heap without recursing through the nodes.
+        '''
+        return {'keys' : list(self)}
+        
+    def __setstate__(self, state):
+        self.__init__()
+        nodes = [HeapNode(key) for key in state['keys']]
+        for index in range(1, len(nodes)):
+            parent = nodes[(index - 1) >> 1]
+            nodes[index].parent = parent
+            if index & 1:
+                parent.left = nodes[index]
+            else:
+                parent.right = nodes[index]
+        self._root = nodes[0] if nodes else None
+        self._size = len(nodes)
         
     def __str__(self):
         return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
@@ -24,48 +1258,100 @@ class MinArrayHeap(object):
         return self.__str__()
         
     def __iter__(self):
-        for value in self._keylist:
-            yield value
+        for node in self._nodes():
+            yield node.key
             
     def __list__(self):
-        return list(self._keylist)
+        return [value for value in self.__iter__()]
         
     def __len__(self):
-        return len(self._keylist)
+        return self._size
         
     def _compare(self, key1, key2):
         '''
-        Returns True if <arg>:key1 < <arg>:key2, False otherwise.
+        Returns True is <arg>:key1 < <arg>:key2, False otherwise.
         '''
         return key1 < key2
         
-    def _float_up(self, index):
+    def _nodes(self):
         '''
-        Key value located in self._keylist at index <arg>:index is floated
-        towards the zero index as to maintain the heap invariant property.
+        Yields the nodes of the heap tree in level order.
+        '''
+        if self._root is None:
+            return
+        nodes = [self._root]
+        for node in nodes:
+            yield node
+            if node.left is not None:
+                nodes.append(node.left)
+                if node.right is not None:
+                    nodes.append(node.right)
+        
+    def _node_at(self, position):
+        '''
+        Returns the node at level-order <arg>:position (1 for the root),
+        found by following the binary digits of <arg>:position below its
+        leading one from the root. The position is assumed to be in range.
+        '''
+        node = self._root
+        for bit in bin(position)[3:]:
+            node = node.right if bit == '1' else node.left
+        return node
+        
+    def _swap_with_parent(self, node):
         '''
-        while index > 0 and self._compare(self._keylist[index], self._keylist[(index - 1) >> 1]):
-            i = (index - 1) >> 1
-            self._keylist[index], self._keylist[i] = self._keylist[i], self._keylist[index]
-            index = i
+        Exchanges the tree positions of <arg>:node and its parent.
+        '''
+        parent = node.parent
+        grandparent = parent.parent
+        left, right = node.left, node.right
+        if parent.left is node:
+            node.left = parent
+            node.right = parent.right
+            if node.right is not None:
+                node.right.parent = node
+        else:
+            node.right = parent
+            node.left = parent.left
+            node.left.parent = node
+        parent.left = left
+        parent.right = right
+        if left is not None:
+            left.parent = parent
+        if right is not None:
+            right.parent = parent
+        parent.parent = node
+        node.parent = grandparent
+        if grandparent is None:
+            self._root = node
+        elif grandparent.left is parent:
+            grandparent.left = node
+        else:
+            grandparent.right = node
+        
+    def _float_up(self, node):
+        '''
+        <arg>:node is floated towards the root of the tree as to maintain the
+        heap invariant property.
+        '''
+        compare = self._compare
+        key = node.key
+        while node.parent is not None and compare(key, node.parent.key):
+            self._swap_with_parent(node)
             
-    def _float_down(self, index):
+    def _float_down(self, node):
         '''
-        Key value located in self._keylist at index <arg>:index is floated
-        towards the end of self._keylist as to maintain the heap invariant
-        property.
-        '''
-        while len(self._keylist) > (index << 1) + 1:
-            i = (index << 1) + 1
-            if len(self._keylist) > i + 1 and self._compare(self._keylist[i + 1], self._keylist[i]):
-                if self._compare(self._keylist[i + 1], self._keylist[index]):
-                    self._keylist[index], self._keylist[i + 1] = self._keylist[i + 1], self._keylist[index]
-                    index = i + 1
-                else:
-                    break
-            elif self._compare(self._keylist[i], self._keylist[index]):
-                self._keylist[index], self._keylist[i] = self._keylist[i], self._keylist[index]
-                index = i
+        <arg>:node is floated towards the leaves of the tree as to maintain
+        the heap invariant property.
+        '''
+        compare = self._compare
+        key = node.key
+        while node.left is not None:
+            child = node.left
+            if node.right is not None and compare(node.right.key, child.key):
+                child = node.right
+            if compare(child.key, key):
+                self._swap_with_parent(child)
             else:
                 break
                 
@@ -74,16 +1360,28 @@ class MinArrayHeap(object):
         Returns the value of the head key in the heap without removing
         the key. Raises and EmptyError exception if the heap is empty.
         '''
-        if not self._keylist:
+        if self._root is None:
             raise EmptyError('cannot call method peek() on empty heap instance')
-        return self._keylist[0]
+        return self._root.key
         
     def push(self, key):
         '''
-        Adds <arg>:key to the heap instance.
+        Adds <arg>:key to the heap instance and returns the new HeapNode
+        handle for use with delete.
         '''
-        self._keylist.append(key)
-        self._float_up(len(self._keylist) - 1)
+        self._size += 1
+        if self._root is None:
+            node = HeapNode(key)
+            self._root = node
+        else:
+            parent = self._node_at(self._size >> 1)
+            node = HeapNode(key, parent)
+            if self._size & 1:
+                parent.right = node
+            else:
+                parent.left = node
+            self._float_up(node)
+        return node
         
     def push_multiple(self, keys):
         '''
@@ -98,10 +1396,10 @@ class MinArrayHeap(object):
         Removes and returns the value at the head of the heap while
         maintaining the heap invariant.
         '''
-        if not self._keylist:
+        if self._root is None:
             raise EmptyError('cannot call method pop() on empty heap instance')
-        value = self.peek()
-        self._delete(0)
+        value = self._root.key
+        self._delete(self._root)
         return value
         
     def pushpop(self, key):
@@ -109,86 +1407,133 @@ class MinArrayHeap(object):
         Pushes <arg>:key onto the heap and then proceeds to pop and return
         the key at the head of the heap.
         '''
+        if self._root is None or not self._compare(self._root.key, key):
+            return key
+        value = self.pop()
         self.push(key)
-        return self.pop()
+        return value
         
-    def _delete(self, index):
+    def _delete(self, node):
         '''
-        Private method to delete the key at index <arg>:index of self._keylist.
+        Private method to delete <arg>:node from the heap tree instance. The
+        last node in level order takes its place and is then floated in
+        whichever direction restores the heap invariant.
         '''
-        if index == 0 and len(self._keylist) == 1:
-            self._keylist.pop()
+        last = self._node_at(self._size)
+        self._size -= 1
+        if last is self._root:
+            self._root = None
+            return
+        if last.parent.right is last:
+            last.parent.right = None
         else:
-            i = len(self._keylist) - 1
-            self._keylist[index], self._keylist[i] = self._keylist[i], self._keylist[index]
-            self._keylist.pop()
-            self._float_down(index)
+            last.parent.left = None
+        if last is not node:
+            last.parent = node.parent
+            last.left = node.left
+            last.right = node.right
+            if last.left is not None:
+                last.left.parent = last
+            if last.right is not None:
+                last.right.parent = last
+            if node.parent is None:
+                self._root = last
+            elif node.parent.left is node:
+                node.parent.left = last
+            else:
+                node.parent.right = last
+            self._float_down(last)
+            self._float_up(last)
+        node.parent = node.left = node.right = None
         
-    def delete(self, key):
+    def delete(self, node):
         '''
-        Deletes <arg>:key from the heap instance. If the heap does not contain
-        <arg>:key, raises a KeyError exception.
+        Deletes the HeapNode handle <arg>:node, as returned by push, from the
+        heap instance in O(log n). Raises a TypeError exception if
+        <arg>:node is not a HeapNode; use delete_key to delete by key. If
+        the heap does not contain <arg>:node, raises a KeyError exception.
         '''
-        try:
-            index = self._keylist.index(key)
-            self._delete(index)
-            return
-        except:
-            pass
+        if not isinstance(node, HeapNode):
+            raise TypeError('<method>:delete expects a HeapNode, not {:s}'.format(type(node).__name__))
+        root = node
+        while root.parent is not None:
+            root = root.parent
+        if root is not self._root:
+            raise KeyError(str(node.key))
+        self._delete(node)
+        
+    def delete_key(self, key):
+        '''
+        Deletes a node holding <arg>:key from the heap instance. The heap is
+        scanned for the key, so this takes O(n); keep the handle returned by
+        push and call delete to remove a key in O(log n). If the heap does
+        not contain <arg>:key, raises a KeyError exception.
+        '''
+        for node in self._nodes():
+            if node.key == key:
+                self._delete(node)
+                return
         raise KeyError(str(key))
 
     def clear(self):
         '''
         Empties the heap instance.
         '''
-        self._keylist.clear()
-    
-class MaxArrayHeap(MinArrayHeap):
+        self._root = None
+        self._size = 0
+                
+class MaxTreeHeap(MinTreeHeap):
     '''
-    Array-based maximum heap. Derived class of MinArrayHeap.
+    Tree-based maximum heap. Derived class of MinTreeHeap.
     '''
     def _compare(self, key1, key2):
         '''
         Returns True if <arg>:key1 > <arg>:key2, False otherwise.
         '''
-        return key1 > key2 
+        return key1 > key2
 
-class HeapNode(object):
+class PairingNode(object):
     '''
-    Node object for tree-based heap implementation.
+    Node object for pairing heap implementation. Instances are returned by
+    push as handles for decrease_key and delete.
     '''
-    def __init__(self, key, parent = None, previous = None):
+    __slots__ = ('key', 'child', 'sibling', 'prev')
+    
+    def __init__(self, key):
         self.key = key
-        self.parent = parent
-        self.left = None
-        self.right = None
-        self.p = previous
-        self.n = None
+        self.child = None
+        self.sibling = None
+        self.prev = None
         
-class MinTreeHeap(object):
+class MinPairingHeap(object):
     '''
-    Tree-based minimum heap.
+    Pairing-based minimum heap. Supports O(1) push and meld, amortized
+    O(log n) pop and delete, and a cheap amortized decrease_key (a single
+    cut and link) through node handles returned by push.
     '''
     def __init__(self):
         '''
         Private Instance Attributes:
-            _root : HeapNode
+            _root : PairingNode
                 Root node of heap instance
                 
-            _insert_parent : HeapNode
-                Parent of next inserted HeapNode
-                
-            _back : HeapNode
-                Last inserted HeapNode of the heap instance
-                
             _size : int
                 Current size of the heap instance
         '''
         self._root = None
-        self._insert_parent = None
-        self._back = None
         self._size = 0
         
+    def __getstate__(self):
+        '''
+        Returns the keys of the heap for pickling, so that pickling does not
+        recurse through the nodes. Unpickling pushes them back in O(n).
+        '''
+        return {'keys' : list(self)}
+        
+    def __setstate__(self, state):
+        self.__init__()
+        self.push_multiple(state['keys'])
+        
     def __str__(self):
         return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
         
@@ -196,11 +1541,17 @@ class MinTreeHeap(object):
         return self.__str__()
         
     def __iter__(self):
-        node = self._root
-        while node is not None:
+        if self._root is None:
+            return
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
             yield node.key
-            node = node.n
-            
+            if node.sibling is not None and node is not self._root:
+                stack.append(node.sibling)
+            if node.child is not None:
+                stack.append(node.child)
+                
     def __list__(self):
         return [value for value in self.__iter__()]
         
@@ -209,37 +1560,72 @@ class MinTreeHeap(object):
         
     def _compare(self, key1, key2):
         '''
-        Returns True is <arg>:key1 < <arg>:key2, False otherwise.
+        Returns True if <arg>:key1 < <arg>:key2, False otherwise.
         '''
         return key1 < key2
         
-    def _float_up(self, node):
+    def _link(self, node1, node2):
         '''
-        Key value located in <arg>:node is floated towards the root of the
-        tree as to maintain the heap invariant property.
+        Links the two detached subtree roots <arg>:node1 and <arg>:node2 by
+        making the root with the larger key the leftmost child of the other.
+        Returns the new subtree root.
         '''
-        while node.parent is not None and self._compare(node.key, node.parent.key):
-            node.key, node.parent.key = node.parent.key, node.key
-            node = node.parent
-            
-    def _float_down(self, node):
+        if self._compare(node2.key, node1.key):
+            node1, node2 = node2, node1
+        child = node1.child
+        node2.sibling = child
+        if child is not None:
+            child.prev = node2
+        node2.prev = node1
+        node1.child = node2
+        return node1
+        
+    def _merge_pairs(self, node):
         '''
-        Key value located in <arg>:node is floated towards the leaves of the
-        tree as to maintain the heap invariant property.
+        Melds the sibling list starting at <arg>:node into a single subtree
+        using the two-pass pairing method and returns its root.
         '''
-        while node.left is not None:
-            if node.right is not None and self._compare(node.right.key, node.left.key):
-                if self._compare(node.right.key, node.key):
-                    node.key, node.right.key = node.right.key, node.key
-                    node = node.right
-                else:
-                    break
-            elif self._compare(node.left.key, node.key):
-                node.key, node.left.key = node.left.key, node.key
-                node = node.left
-            else:
-                break    
-                
+        pairs = list()
+        while node is not None:
+            node1 = node
+            node2 = node1.sibling
+            node1.prev = None
+            if node2 is None:
+                pairs.append(node1)
+                break
+            node = node2.sibling
+            node1.sibling = node2.sibling = node2.prev = None
+            pairs.append(self._link(node1, node2))
+        if not pairs:
+            return None
+        root = pairs.pop()
+        while pairs:
+            root = self._link(pairs.pop(), root)
+        return root
+        
+    def _cut(self, node):
+        '''
+        Detaches the subtree rooted at <arg>:node from its parent and
+        siblings. <arg>:node must not be the heap root.
+        '''
+        if node.prev.child is node:
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = node.prev
+        node.prev = None
+        node.sibling = None
+        
+    def _check_handle(self, node):
+        '''
+        Raises a KeyError exception if <arg>:node is not in a heap, as is
+        the case for a handle that has been popped or deleted. Every node
+        but the root has a prev link, so the check is O(1).
+        '''
+        if node.prev is None and node is not self._root:
+            raise KeyError(str(node.key))
+            
     def peek(self):
         '''
         Returns the value of the head key in the heap without removing
@@ -251,25 +1637,13 @@ class MinTreeHeap(object):
         
     def push(self, key):
         '''
-        Adds <arg>:key to the heap instance.
+        Adds <arg>:key to the heap instance in O(1) and returns the new
+        PairingNode handle for use with decrease_key and delete.
         '''
-        node = HeapNode(key, previous = self._back)
-        if self._root is None:
-            self._root = node
-            self._insert_parent = node
-            self._back = node
-        else:
-            node.parent = self._insert_parent
-            if self._insert_parent.left is None:
-                self._insert_parent.left = node
-            else:
-                self._insert_parent.right = node
-                self._insert_parent = self._insert_parent.n
-            self._back.n = node
-            node.p = self._back
-            self._back = node
-            self._float_up(node)
+        node = PairingNode(key)
+        self._root = node if self._root is None else self._link(self._root, node)
         self._size += 1
+        return node
         
     def push_multiple(self, keys):
         '''
@@ -278,77 +1652,94 @@ class MinTreeHeap(object):
         '''
         for key in keys:
             self.push(key)
-        
+            
     def pop(self):
         '''
         Removes and returns the value at the head of the heap while
         maintaining the heap invariant.
         '''
-        try:
-            value = self.peek()
-            self._delete(self._root)
-            return value
-        except:
-            pass
-        raise EmptyError('cannot call method pop() on empty heap instance')
+        root = self._root
+        if root is None:
+            raise EmptyError('cannot call method pop() on empty heap instance')
+        self._root = self._merge_pairs(root.child)
+        root.child = None
+        self._size -= 1
+        return root.key
         
     def pushpop(self, key):
         '''
         Pushes <arg>:key onto the heap and then proceeds to pop and return
         the key at the head of the heap.
         '''
+        if self._root is None or not self._compare(self._root.key, key):
+            return key
+        value = self.pop()
         self.push(key)
-        return self.pop()
+        return value
         
-    def _delete(self, node):
+    def decrease_key(self, node, key):
         '''
-        Private method to delete the key in <arg>:node from the heap tree
-        instance.
+        Moves the key of the handle <arg>:node towards the head of the heap
+        by setting it to <arg>:key. Raises a ValueError exception if
+        <arg>:key would move the node away from the head, and a KeyError
+        exception if <arg>:node has been removed from the heap.
         '''
-        if node is self._root and self._size == 1:
-            self._root = None
-            self._insert_parent = None
-            self._back = None
-        else:
-            node.key, self._back.key = self._back.key, node.key
-            if self._back is self._back.parent.left:
-                self._back.parent.left = None
-            else:
-                self._back.parent.right = None
-            self._back.p.n = None
-            self._back = self._back.p
-            self._float_down(node)                       
-            if self._insert_parent is not self._root and self._insert_parent.p.right is None:
-                self._insert_parent = self._insert_parent.p
+        self._check_handle(node)
+        if self._compare(node.key, key):
+            raise ValueError('<arg>:key must not move the node away from the head of the heap')
+        node.key = key
+        if node is not self._root:
+            self._cut(node)
+            self._root = self._link(self._root, node)
+            
+    def delete(self, node):
+        '''
+        Deletes the key of the handle <arg>:node from the heap instance in
+        amortized O(log n). <arg>:node must be a handle returned by push on
+        this heap instance. If <arg>:node has already been popped or
+        deleted, raises a KeyError exception.
+        '''
+        self._check_handle(node)
+        if node is self._root:
+            self.pop()
+            return
+        self._cut(node)
+        subtree = self._merge_pairs(node.child)
+        node.child = None
+        if subtree is not None:
+            self._root = self._link(self._root, subtree)
         self._size -= 1
         
-    def delete(self, key):
+    def meld(self, other_heap):
         '''
-        Deletes <arg>:key from the heap instance. If the heap does not contain
-        <arg>:key, raises a KeyError exception.
+        Moves every key of <arg>:other_heap into the heap instance in O(1)
+        and empties <arg>:other_heap. Node handles from <arg>:other_heap
+        remain valid for the heap instance. Raises a TypeError exception if
+        the heaps are not of the same type.
         '''
-        node = self._root
-        while node is not None:
-            if node.key == key:
-                break
-            node = node.n
-        if node is None:
-            raise KeyError(str(key))
+        if type(other_heap) is not type(self):
+            raise TypeError('cannot meld {:s} into {:s}'.format(
+                type(other_heap).__name__, type(self).__name__))
+        if other_heap is self or other_heap._root is None:
+            return
+        if self._root is None:
+            self._root = other_heap._root
         else:
-            self._delete(node)
-
+            self._root = self._link(self._root, other_heap._root)
+        self._size += other_heap._size
+        other_heap.clear()
+        
     def clear(self):
         '''
         Empties the heap instance.
         '''
         self._root = None
-        self._insert_parent = None
-        self._back = None
         self._size = 0
-                
-class MaxTreeHeap(MinTreeHeap):
+        
+class MaxPairingHeap(MinPairingHeap):
     '''
-    Tree-based maximum heap. Derived class of MinTreeHeap.
+    Pairing-based maximum heap. Derived class of MinPairingHeap. Its
+    decrease_key moves keys towards the maximum, i.e. increases them.
     '''
     def _compare(self, key1, key2):
         '''
@@ -356,4 +1747,132 @@ class MaxTreeHeap(MinTreeHeap):
         '''
         return key1 > key2
 
-            
\ No newline at end of file
+class TopK(object):
+    '''
+    Bounded selection of the k largest (or smallest) items of a stream. Keeps
+    at most k entries in an array heap whose head is the weakest kept item,
+    so each candidate costs one comparison against the head and, if it is
+    kept, a single sift. Memory is O(k) regardless of the stream length.
+    '''
+    def __init__(self, k, key = None, largest = True):
+        '''
+        Constructor Arguments:
+            k : int
+                Number of items to keep.
+                
+            key : callable or None (default: None)
+                Function computing the comparison key of an item. Computed
+                once per pushed item.
+                
+            largest : bool (default: True)
+                Keep the k largest items if True, the k smallest otherwise.
+        '''
+        if k < 0:
+            raise ValueError('<arg>:k must be a non-negative integer')
+        self._k = int(k)
+        self._key = key
+        self._largest = largest
+        self._heap = MinArrayHeap() if largest else MaxArrayHeap()
+        self._count = 0
+        
+    def __str__(self):
+        return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
+        
+    def __repr__(self):
+        return self.__str__()
+        
+    def __len__(self):
+        return len(self._heap)
+        
+    def __iter__(self):
+        for item in self.results():
+            yield item
+        
+    def push(self, item):
+        '''
+        Offers <arg>:item to the selection. The entries are stored as
+        (key, count, item) tuples so that items with equal keys are never
+        compared directly.
+        '''
+        k = self._key(item) if self._key is not None else item
+        heap = self._heap
+        keylist = heap._keylist
+        self._count += 1
+        if len(keylist) < self._k:
+            heap.push((k, self._count, item))
+        elif keylist and (keylist[0][0] < k if self._largest else k < keylist[0][0]):
+            heap.replace((k, self._count, item))
+            
+    def push_multiple(self, items):
+        '''
+        Offers every item in the iterable <arg>:items to the selection.
+        '''
+        for item in items:
+            self.push(item)
+            
+    def peek(self):
+        '''
+        Returns the weakest kept item, i.e. the one that the next better
+        candidate would replace. Raises an EmptyError exception if no item
+        is kept.
+        '''
+        return self._heap.peek()[2]
+        
+    def results(self):
+        '''
+        Returns a list of the kept items, best first. Items with equal keys
+        are listed in order of arrival.
+        '''
+        entries = sorted(self._heap._keylist, key = lambda entry: entry[1])
+        entries.sort(key = lambda entry: entry[0], reverse = self._largest)
+        return [entry[2] for entry in entries]
+        
+    def clear(self):
+        '''
+        Empties the selection.
+        '''
+        self._heap.clear()
+        self._count = 0
+        
+def merge_sorted(*iterables, key = None, reverse = False):
+    '''
+    Lazily merges the sorted iterables <arg>:iterables into a single sorted
+    stream. Holds one entry per input iterable in an array heap and advances
+    it with a single-sift replace, so memory is O(N) in the number of
+    iterables regardless of their lengths. Equal items are yielded in the
+    order of the iterables they came from.
+    
+    Arguments:
+        key : callable or None (default: None)
+            Function computing the comparison key of an item.
+            
+        reverse : bool (default: False)
+            If True, the iterables must be sorted in descending order and the
+            merged stream is descending.
+    '''
+    heap = MaxArrayHeap() if reverse else MinArrayHeap()
+    direction = -1 if reverse else 1
+    entries = list()
+    for index, iterable in enumerate(iterables):
+        iterator = iter(iterable)
+        for value in iterator:
+            k = key(value) if key is not None else value
+            entries.append((k, direction * index, value, iterator))
+            break
+    heap.push_multiple(entries)
+    del entries
+    keylist = heap._keylist
+    while len(keylist) > 1:
+        k, order, value, iterator = keylist[0]
+        yield value
+        for value in iterator:
+            heap.replace((key(value) if key is not None else value, order,
+                          value, iterator))
+            break
+        else:
+            heap.pop()
+    if keylist:
+        k, order, value, iterator = keylist[0]
+        yield value
+        for value in iterator:
+            yield value
@@ -1,5 +1,7 @@
 # work in progress
 
+from itertools import islice
+
 class EmptyError(Exception):
     '''
     Exception raised when pop operations are called on an empty list.
@@ -29,22 +31,96 @@ class SingleLinkedList(object):
             yield link._value
             link = link._next
             
+    def __reversed__(self):
+        values = list(self)
+        values.reverse()
+        return iter(values)
+            
     def __len__(self):
         return self._size
         
+    def __getstate__(self):
+        '''
+        Returns the values of the list for pickling, so that pickling does
+        not recurse through the links.
+        '''
+        return {'values' : list(self)}
+        
+    def __setstate__(self, state):
+        self.__init__()
+        self.extend(state['values'])
+        
+    def __contains__(self, value):
+        if self._size == 0:
+            return False
+        link = self._root
+        while link is not None:
+            if link._value == value:
+                return True
+            link = link._next
+        return False
+        
     def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._slice(key)
         if self._size == 0:
             raise EmptyError("cannot index an empty linked list")
-        if key == -1 or key == self._size - 1:
+        index = key + self._size if key < 0 else key
+        if index < 0 or index >= self._size:
+            raise IndexError("{:s}".format(str(key)))
+        if index == self._size - 1:
             return self._end._value
+        return self._link_at(index)._value
+        
+    def _link_at(self, index):
+        '''
+        Returns the link at non-negative position <arg>:index. The index is
+        assumed to be in range.
+        '''
+        link = self._root
+        for _ in range(index):
+            link = link._next
+        return link
+        
+    def _slice(self, key):
+        '''
+        Returns a new linked list of the same type containing the values
+        selected by the slice object <arg>:key.
+        '''
+        start, stop, step = key.indices(self._size)
+        if step > 0:
+            values = islice(self, start, max(start, stop), step)
         else:
-            for index, value in enumerate(self):
-                if index == key:
-                    return value
-        raise IndexError("{:s}".format(str(key)))
+            last = self._size - 1
+            values = islice(reversed(self), last - start,
+                            max(last - start, last - stop), -step)
+        new_list = type(self)()
+        new_list.extend(values)
+        return new_list
                             
     def _create_new_link(self, value, next = None):
         return SingleLink(value, next)
+        
+    def _build_chain(self, value_list):
+        '''
+        Links the values in the iterable <arg>:value_list into a detached
+        chain of new links made by _create_new_link, so derived classes that
+        override it get their own links from extend and slicing too. Returns
+        a (head, tail, count) tuple, where head and tail are None if
+        <arg>:value_list is empty.
+        '''
+        head = tail = None
+        count = 0
+        create = self._create_new_link
+        for value in value_list:
+            link = create(value)
+            if tail is None:
+                head = link
+            else:
+                tail._next = link
+            tail = link
+            count += 1
+        return head, tail, count
                 
     def append(self, value):
         new_link = self._create_new_link(value)
@@ -56,8 +132,22 @@ class SingleLinkedList(object):
         self._size += 1
         
     def extend(self, value_list):
-        for value in value_list:
-            self.append(value)
+        head, tail, count = self._build_chain(value_list)
+        if head is None:
+            return
+        if self._root is None:
+            self._root = head
+        else:
+            self._link_after_end(head)
+        self._end = tail
+        self._size += count
+        
+    def _link_after_end(self, head):
+        '''
+        Attaches the detached chain starting at <arg>:head after the current
+        end link. The list is assumed to be non-empty.
+        '''
+        self._end._next = head
         
     def prepend(self, value):
         new_link = self._create_new_link(value, self._root)
@@ -67,8 +157,22 @@ class SingleLinkedList(object):
         self._size += 1
             
     def front_extend(self, value_list):
-        for value in reversed(value_list):
-            self.prepend(value)
+        head, tail, count = self._build_chain(value_list)
+        if head is None:
+            return
+        if self._root is None:
+            self._end = tail
+        else:
+            self._link_before_root(tail)
+        self._root = head
+        self._size += count
+        
+    def _link_before_root(self, tail):
+        '''
+        Attaches the detached chain ending at <arg>:tail before the current
+        root link. The list is assumed to be non-empty.
+        '''
+        tail._next = self._root
             
     def popfront(self):
         if self._root is None:
@@ -87,6 +191,21 @@ class SingleLinkedList(object):
             if x == value:
                 return index
         raise ValueError("{:s} is not in list".format(str(value)))
+        
+    def reverse(self):
+        '''
+        Reverses the order of the list in place by relinking, without
+        creating new links.
+        '''
+        previous = None
+        link = self._root
+        self._end = link
+        while link is not None:
+            next_link = link._next
+            link._next = previous
+            previous = link
+            link = next_link
+        self._root = previous
             
 class DoubleLink(SingleLink):
     def __init__(self, value, next = None, previous = None):
@@ -97,9 +216,61 @@ class DoubleLinkedList(SingleLinkedList):
     def __init__(self):
         super(DoubleLinkedList, self).__init__()
         
+    def __reversed__(self):
+        link = self._end
+        while link is not None:
+            yield link._value
+            link = link._previous
+        
+    def _link_at(self, index):
+        '''
+        Returns the link at non-negative position <arg>:index, walking from
+        whichever end of the list is closer. The index is assumed to be in
+        range.
+        '''
+        if index <= self._size >> 1:
+            return super(DoubleLinkedList, self)._link_at(index)
+        link = self._end
+        for _ in range(self._size - 1 - index):
+            link = link._previous
+        return link
+        
     def _create_new_link(self, value, next = None, previous = None):
         return DoubleLink(value, next, previous)
         
+    def _build_chain(self, value_list):
+        head = tail = None
+        count = 0
+        create = self._create_new_link
+        for value in value_list:
+            link = create(value, None, tail)
+            if tail is None:
+                head = link
+            else:
+                tail._next = link
+            tail = link
+            count += 1
+        return head, tail, count
+        
+    def _link_after_end(self, head):
+        self._end._next = head
+        head._previous = self._end
+        
+    def _link_before_root(self, tail):
+        tail._next = self._root
+        self._root._previous = tail
+        
+    def reverse(self):
+        '''
+        Reverses the order of the list in place by swapping the next and
+        previous pointers of every link.
+        '''
+        link = self._root
+        while link is not None:
+            link._next, link._previous = link._previous, link._next
+            link = link._previous
+        self._root, self._end = self._end, self._root
+        
     def append(self, value):
         link = self._end
         super(DoubleLinkedList, self).append(value)
@@ -169,4 +340,310 @@ class DoubleLinkedList(SingleLinkedList):
                 return
             link = link._next
         raise ValueError("{:s} is not in list".format(str(value)))
-        
\ No newline at end of file
+                
+class Deque(object):
+    '''
+    Array-backed double ended queue. Values are stored in a circular buffer
+    whose capacity is always a power of two, giving amortized O(1) appends
+    and pops at both ends and O(1) indexed access without allocating a link
+    per value. Provides the methods of DoubleLinkedList, including insert
+    and remove, which move the values on the shorter side of the position
+    and so take O(min(i, n - i)) time.
+    '''
+    def __init__(self, value_list = None, maxlen = None, capacity = 8):
+        '''
+        Constructor Arguments
+        ---------------------
+        value_list: iterable (optional)
+            Values used to initially populate the deque.
+            
+        maxlen: int or None (default: None)
+            Maximum length of the deque. When a bounded deque is full,
+            appending a value discards a value from the front and prepending
+            a value discards a value from the back.
+            
+        capacity: int (default: 8)
+            Initial capacity of the underlying array. Rounded up to a power
+            of two.
+        '''
+        if maxlen is not None and maxlen < 0:
+            raise ValueError("<arg>:maxlen must be a non-negative integer")
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._array = [None] * size
+        self._mask = size - 1
+        self._head = 0
+        self._size = 0
+        self._maxlen = maxlen
+        if value_list is not None:
+            self.extend(value_list)
+        
+    def __str__(self):
+        return list(self).__str__()
+        
+    def __repr__(self):
+        return list(self).__repr__()
+        
+    def __iter__(self):
+        array = self._array
+        mask = self._mask
+        head = self._head
+        for i in range(self._size):
+            yield array[(head + i) & mask]
+            
+    def __reversed__(self):
+        array = self._array
+        mask = self._mask
+        head = self._head
+        for i in range(self._size - 1, -1, -1):
+            yield array[(head + i) & mask]
+            
+    def __len__(self):
+        return self._size
+        
+    def __contains__(self, value):
+        for x in self:
+            if x == value:
+                return True
+        return False
+        
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._size)
+            if step > 0:
+                values = self._read(start, max(stop - start, 0))[::step]
+            else:
+                values = self._read(stop + 1, max(start - stop, 0))[::-1][::-step]
+            return Deque(values, maxlen = self._maxlen)
+        if self._size == 0:
+            raise EmptyError("cannot index an empty deque")
+        index = key + self._size if key < 0 else key
+        if index < 0 or index >= self._size:
+            raise IndexError("{:s}".format(str(key)))
+        return self._array[(self._head + index) & self._mask]
+        
+    def __setitem__(self, key, value):
+        index = key + self._size if key < 0 else key
+        if index < 0 or index >= self._size:
+            raise IndexError("{:s}".format(str(key)))
+        self._array[(self._head + index) & self._mask] = value
+        
+    def max_length(self):
+        '''
+        Returns the maximum length of the deque if specified. If the length
+        is not limited, returns -1.
+        '''
+        return -1 if self._maxlen is None else self._maxlen
+        
+    def _read(self, offset, count):
+        '''
+        Returns a list of the <arg>:count values starting at position
+        <arg>:offset, copied with at most two slices of the circular buffer.
+        '''
+        array = self._array
+        start = (self._head + offset) & self._mask
+        end = start + count
+        if end <= len(array):
+            return array[start:end]
+        return array[start:] + array[:end - len(array)]
+        
+    def _write(self, offset, values):
+        '''
+        Stores the list <arg>:values at the positions starting at
+        <arg>:offset, with at most two slice assignments into the circular
+        buffer, which must already hold that many slots.
+        '''
+        array = self._array
+        start = (self._head + offset) & self._mask
+        split = len(array) - start
+        if len(values) <= split:
+            array[start:start + len(values)] = values
+        else:
+            array[start:] = values[:split]
+            array[:len(values) - split] = values[split:]
+            
+    def _reserve(self, size):
+        '''
+        Grows the underlying array, with a single copy, to the smallest
+        power of two holding <arg>:size values.
+        '''
+        capacity = len(self._array)
+        if size > capacity:
+            while capacity < size:
+                capacity <<= 1
+            self._resize(capacity)
+            
+    def _resize(self, capacity):
+        '''
+        Copies the values into a new underlying array of size <arg>:capacity,
+        which must be a power of two no smaller than the current size. The
+        head of the deque is moved to index zero.
+        '''
+        array = self._read(0, self._size)
+        array.extend([None] * (capacity - self._size))
+        self._array = array
+        self._mask = capacity - 1
+        self._head = 0
+        
+    def _shrink(self):
+        '''
+        Halves the underlying array when it is at most a quarter full.
+        '''
+        capacity = len(self._array)
+        if capacity > 8 and self._size <= capacity >> 2:
+            self._resize(capacity >> 1)
+        
+    def append(self, value):
+        if self._size == self._maxlen:
+            if self._maxlen == 0:
+                return
+            self.popfront()
+        elif self._size == len(self._array):
+            self._resize(len(self._array) << 1)
+        self._array[(self._head + self._size) & self._mask] = value
+        self._size += 1
+        
+    def extend(self, value_list):
+        '''
+        Appends the values of the iterable <arg>:value_list. The array is
+        grown once to fit them and they are copied in with slice
+        assignments. A bounded deque keeps the last maxlen values.
+        '''
+        values = list(value_list)
+        if self._maxlen is not None:
+            values = values[max(len(values) - self._maxlen, 0):]
+            overflow = self._size + len(values) - self._maxlen
+            if overflow > 0:
+                self._write(0, [None] * overflow)
+                self._head = (self._head + overflow) & self._mask
+                self._size -= overflow
+        self._reserve(self._size + len(values))
+        self._write(self._size, values)
+        self._size += len(values)
+        
+    def prepend(self, value):
+        if self._size == self._maxlen:
+            if self._maxlen == 0:
+                return
+            self.popback()
+        elif self._size == len(self._array):
+            self._resize(len(self._array) << 1)
+        self._head = (self._head - 1) & self._mask
+        self._array[self._head] = value
+        self._size += 1
+        
+    def front_extend(self, value_list):
+        '''
+        Inserts the values of the iterable <arg>:value_list, in order, at the
+        front of the deque, growing the array once and copying them in with
+        slice assignments. A bounded deque keeps the first maxlen values.
+        '''
+        values = list(value_list)
+        if self._maxlen is not None:
+            del values[self._maxlen:]
+            overflow = self._size + len(values) - self._maxlen
+            if overflow > 0:
+                self._size -= overflow
+                self._write(self._size, [None] * overflow)
+        self._reserve(self._size + len(values))
+        self._head = (self._head - len(values)) & self._mask
+        self._write(0, values)
+        self._size += len(values)
+            
+    def popfront(self):
+        if self._size == 0:
+            raise EmptyError("<method>:popfront called on empty deque")
+        value = self._array[self._head]
+        self._array[self._head] = None
+        self._head = (self._head + 1) & self._mask
+        self._size -= 1
+        self._shrink()
+        return value
+        
+    def popback(self):
+        if self._size == 0:
+            raise EmptyError("<method>:popback called on empty deque")
+        index = (self._head + self._size - 1) & self._mask
+        value = self._array[index]
+        self._array[index] = None
+        self._size -= 1
+        self._shrink()
+        return value
+        
+    def index(self, value):
+        for index, x in enumerate(self):
+            if x == value:
+                return index
+        raise ValueError("{:s} is not in deque".format(str(value)))
+        
+    def insert(self, index, value):
+        '''
+        Inserts <arg>:value before position <arg>:index, appending it if
+        <arg>:index is past the end. Negative indices count from the end.
+        Raises an IndexError exception if a bounded deque is full, since
+        there is no end to discard a value from.
+        '''
+        size = self._size
+        if size == self._maxlen:
+            raise IndexError("<method>:insert called on full deque")
+        if index < 0:
+            index = max(index + size, 0)
+        index = min(index, size)
+        if size == len(self._array):
+            self._resize(len(self._array) << 1)
+        array = self._array
+        mask = self._mask
+        head = self._head
+        if index < size >> 1:
+            # shift the values before the position one slot to the front
+            head = (head - 1) & mask
+            for i in range(index):
+                array[(head + i) & mask] = array[(head + i + 1) & mask]
+            self._head = head
+        else:
+            for i in range(size, index, -1):
+                array[(head + i) & mask] = array[(head + i - 1) & mask]
+        array[(head + index) & mask] = value
+        self._size += 1
+        
+    def remove(self, value):
+        '''
+        Removes the first occurrence of <arg>:value. Raises a ValueError
+        exception if <arg>:value is not in the deque.
+        '''
+        index = self.index(value)
+        array = self._array
+        mask = self._mask
+        head = self._head
+        if index < self._size >> 1:
+            for i in range(index, 0, -1):
+                array[(head + i) & mask] = array[(head + i - 1) & mask]
+            array[head] = None
+            self._head = (head + 1) & mask
+        else:
+            for i in range(index, self._size - 1):
+                array[(head + i) & mask] = array[(head + i + 1) & mask]
+            array[(head + self._size - 1) & mask] = None
+        self._size -= 1
+        self._shrink()
+        
+    def reverse(self):
+        '''
+        Reverses the order of the deque in place.
+        '''
+        values = self._read(0, self._size)
+        values.reverse()
+        self._array[:len(values)] = values
+        for i in range(len(values), len(self._array)):
+            self._array[i] = None
+        self._head = 0
+        
+    def clear(self):
+        '''
+        Removes all values from the deque.
+        '''
+        self._array = [None] * 8
+        self._mask = 7
+        self._head = 0
+        self._size = 0
@@ -16,17 +16,22 @@ class FullError(Exception):
 class Stack(object):
     '''
     Class Stack implements stack functionality using an underlying instance
-    of a DoubleLinkedList.
+    of a DoubleLinkedList, or of another container providing the append,
+    popback, __len__ and __reversed__ methods (e.g. Deque).
     '''
-    def __init__(self, maxsize = None):
+    def __init__(self, maxsize = None, container = DoubleLinkedList):
         '''
         Constructor Arguments
         ---------------------
         maxsize: int
             Maximum capacity of the stack instance.
+            
+        container: class (default: DoubleLinkedList)
+            Class of the underlying container. Deque avoids allocating a
+            link per pushed value.
         '''
         self._maxsize = maxsize
-        self._stack = DoubleLinkedList()
+        self._stack = container()
         
     def __str__(self):
         return list(self).__str__()
@@ -0,0 +1,305 @@
+class EmptyError(Exception):
+    '''
+    Exception raised when pop or peek operations are called on an empty
+    timing wheel.
+    '''
+    pass
+
+class TimerHandle(object):
+    '''
+    Handle for a timer scheduled in a TimingWheel. Returned by push and
+    accepted by cancel.
+    '''
+    __slots__ = ('deadline', 'item', '_tick', '_order', '_level', '_bucket')
+    
+    def __init__(self, deadline, item, tick, order):
+        self.deadline = deadline
+        self.item = item
+        self._tick = tick
+        self._order = order
+        self._level = None
+        self._bucket = None
+    
+    def active(self):
+        '''
+        Returns True if the timer is still scheduled, False if it has fired,
+        been popped or been cancelled.
+        '''
+        return self._bucket is not None
+
+class TimingWheel(object):
+    '''
+    Hierarchical timing wheel for timers. Deadlines are bucketed into ticks
+    of width <arg>:resolution. Level l of the wheel has 2**wheel_bits slots,
+    each spanning 2**(wheel_bits * l) ticks, and timers beyond the top level
+    wait in an overflow bucket, while timers pushed with a deadline before
+    the current tick wait in a due bucket. Scheduling and cancelling are O(1); timers
+    cascade to lower levels as the wheel advances. Exposes the push, pop and
+    peek methods of the heaps so it can replace them in timer code.
+    '''
+    def __init__(self, resolution = 1.0, wheel_bits = 6, levels = 4, start = 0):
+        '''
+        Constructor Arguments
+        ---------------------
+        resolution: number (default: 1.0)
+            Width of a tick in the units of the deadlines.
+        
+        wheel_bits: int (default: 6)
+            Base two logarithm of the number of slots per level.
+        
+        levels: int (default: 4)
+            Number of levels. Timers more than 2**(wheel_bits * levels) ticks
+            ahead are kept in an overflow bucket.
+        
+        start: number (default: 0)
+            Initial time of the wheel.
+        '''
+        if wheel_bits < 1 or levels < 1:
+            raise ValueError('<arg>:wheel_bits and <arg>:levels must be positive')
+        self._resolution = resolution
+        self._bits = int(wheel_bits)
+        self._mask = (1 << self._bits) - 1
+        self._levels = int(levels)
+        self._wheels = [[set() for i in range(self._mask + 1)]
+                        for l in range(self._levels)]
+        self._overflow = set()
+        self._due = set()
+        self._counts = [0] * (self._levels + 2)
+        self._current = self._tick(start)
+        self._size = 0
+        self._order = 0
+    
+    def __str__(self):
+        return '<{:s} at {:s}>'.format(type(self).__name__, hex(id(self)))
+    
+    def __repr__(self):
+        return self.__str__()
+    
+    def __len__(self):
+        return self._size
+    
+    def __contains__(self, handle):
+        return isinstance(handle, TimerHandle) and handle._bucket is not None
+    
+    def _tick(self, deadline):
+        '''
+        Returns the tick containing time <arg>:deadline.
+        '''
+        return int(deadline // self._resolution)
+    
+    def _place(self, handle):
+        '''
+        Puts <arg>:handle in the slot of the lowest level at which its tick
+        agrees with the current tick on every higher digit, or in the due
+        bucket if its tick has already passed.
+        '''
+        tick = handle._tick
+        bits = self._bits
+        diff = tick ^ self._current
+        level = 0
+        while level < self._levels and diff >> (bits * (level + 1)):
+            level += 1
+        if tick < self._current:
+            level = self._levels + 1
+            bucket = self._due
+        elif level == self._levels:
+            bucket = self._overflow
+        else:
+            bucket = self._wheels[level][(tick >> (bits * level)) & self._mask]
+        bucket.add(handle)
+        handle._level = level
+        handle._bucket = bucket
+        self._counts[level] += 1
+    
+    def _unplace(self, handle):
+        '''
+        Removes <arg>:handle from its slot.
+        '''
+        handle._bucket.discard(handle)
+        handle._bucket = None
+        self._counts[handle._level] -= 1
+    
+    def _cascade(self, tick):
+        '''
+        Redistributes the timers of every slot whose span starts at
+        <arg>:tick into lower levels, starting from the overflow bucket.
+        '''
+        bits = self._bits
+        if self._counts[self._levels] and not tick & ((1 << (bits * self._levels)) - 1):
+            handles = list(self._overflow)
+            for handle in handles:
+                self._unplace(handle)
+                self._place(handle)
+        for level in range(self._levels - 1, 0, -1):
+            if tick & ((1 << (bits * level)) - 1):
+                continue
+            bucket = self._wheels[level][(tick >> (bits * level)) & self._mask]
+            if bucket:
+                handles = list(bucket)
+                for handle in handles:
+                    self._unplace(handle)
+                    self._place(handle)
+    
+    def _move(self, tick):
+        '''
+        Makes <arg>:tick the current tick and cascades the slots whose span
+        starts there, so that the lowest occupied level always holds the
+        earliest timers.
+        '''
+        self._current = tick
+        self._cascade(tick)
+    
+    def _next_tick(self, target):
+        '''
+        Returns the first tick no later than <arg>:target at which the wheel
+        has work to do, or <arg>:target + 1 if there is none. Ticks below
+        the span of the lowest occupied level are skipped.
+        '''
+        current = self._current
+        for level in range(self._levels + 1):
+            if self._counts[level]:
+                break
+        else:
+            return target + 1
+        span = (1 << (self._bits * level)) - 1
+        if current & span:
+            current = (current | span) + 1
+        return min(current, target + 1)
+    
+    def push(self, deadline, item = None):
+        '''
+        Schedules <arg>:item to expire at time <arg>:deadline in O(1) and
+        returns the TimerHandle of the new timer. Timers whose tick has
+        already passed expire at the next call to advance.
+        '''
+        self._order += 1
+        handle = TimerHandle(deadline, item, self._tick(deadline), self._order)
+        self._place(handle)
+        self._size += 1
+        return handle
+    
+    def cancel(self, handle):
+        '''
+        Cancels the timer <arg>:handle in O(1). If the timer is not scheduled
+        in the wheel, raises a KeyError exception.
+        '''
+        if handle._bucket is None or not self._owns(handle):
+            raise KeyError(str(handle.item))
+        self._unplace(handle)
+        self._size -= 1
+    
+    def delete(self, handle):
+        '''
+        Same as cancel. Provided for compatibility with the heap classes.
+        '''
+        self.cancel(handle)
+    
+    def _owns(self, handle):
+        '''
+        Returns True if the slot of <arg>:handle belongs to the wheel
+        instance.
+        '''
+        if handle._level == self._levels + 1:
+            return handle._bucket is self._due
+        if handle._level == self._levels:
+            return handle._bucket is self._overflow
+        index = (handle._tick >> (self._bits * handle._level)) & self._mask
+        return handle._bucket is self._wheels[handle._level][index]
+    
+    def _first(self):
+        '''
+        Returns the handle of the timer with the earliest deadline without
+        removing it. Only the lowest occupied level is searched, from the
+        current slot onwards, since its timers precede all others.
+        '''
+        if self._size == 0:
+            raise EmptyError('cannot call method peek() on empty timing wheel')
+        if self._due:
+            return min(self._due, key = self._sort_key)
+        bits = self._bits
+        for level in range(self._levels):
+            if not self._counts[level]:
+                continue
+            wheel = self._wheels[level]
+            start = (self._current >> (bits * level)) & self._mask
+            for index in range(start, self._mask + 1):
+                if wheel[index]:
+                    return min(wheel[index], key = self._sort_key)
+        return min(self._overflow, key = self._sort_key)
+    
+    @staticmethod
+    def _sort_key(handle):
+        return handle.deadline, handle._order
+    
+    def peek(self):
+        '''
+        Returns the (deadline, item) pair of the timer with the earliest
+        deadline without removing it. Raises an EmptyError exception if the
+        wheel is empty.
+        '''
+        handle = self._first()
+        return handle.deadline, handle.item
+    
+    def pop(self):
+        '''
+        Removes and returns the (deadline, item) pair of the timer with the
+        earliest deadline, whether or not it has expired. Raises an
+        EmptyError exception if the wheel is empty.
+        '''
+        if self._size == 0:
+            raise EmptyError('cannot call method pop() on empty timing wheel')
+        handle = self._first()
+        self._unplace(handle)
+        self._size -= 1
+        return handle.deadline, handle.item
+    
+    def advance(self, now):
+        '''
+        Moves the wheel forward to time <arg>:now, yielding the
+        (deadline, item) pair of every timer whose tick has been reached,
+        ordered by deadline. Ticks in which no timer can expire are skipped.
+        Timers are removed from the wheel as they are yielded, so a
+        partially consumed advance leaves the remaining timers scheduled,
+        and timers pushed for an expired deadline while iterating are
+        yielded by the same advance.
+        '''
+        target = self._tick(now)
+        while True:
+            while self._due:
+                for handle in sorted(self._due, key = self._sort_key):
+                    if handle._bucket is self._due:
+                        self._unplace(handle)
+                        self._size -= 1
+                        yield handle.deadline, handle.item
+            if self._current > target:
+                break
+            tick = self._next_tick(target)
+            if tick > target:
+                self._move(tick)
+                break
+            if tick != self._current:
+                self._move(tick)
+            bucket = self._wheels[0][tick & self._mask]
+            while bucket:
+                for handle in sorted(bucket, key = self._sort_key):
+                    if handle._bucket is bucket:
+                        self._unplace(handle)
+                        self._size -= 1
+                        yield handle.deadline, handle.item
+            self._move(tick + 1)
+    
+    def clear(self):
+        '''
+        Cancels every timer in the wheel.
+        '''
+        for wheel in self._wheels:
+            for bucket in wheel:
+                for handle in bucket:
+                    handle._bucket = None
+                bucket.clear()
+        for bucket in (self._overflow, self._due):
+            for handle in bucket:
+                handle._bucket = None
+            bucket.clear()
+        self._counts = [0] * (self._levels + 2)
+        self._size = 0
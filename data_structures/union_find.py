@@ -1,3 +1,6 @@
+from array import array
+from .frozen import FrozenContainer
+
 class UnionFind(object):
     '''
     UnionFind implemented using weighted-quick-unionfind method.
@@ -7,6 +10,19 @@ class UnionFind(object):
         self.id = list(range(n))
         self.size = [1] * n
         
+    def __getstate__(self):
+        '''
+        Returns the state of the instance with the id and size lists stored
+        as typed arrays for compact pickling.
+        '''
+        return {'count' : self.count, 'id' : array('q', self.id),
+                'size' : array('q', self.size)}
+                
+    def __setstate__(self, state):
+        self.count = state['count']
+        self.id = state['id'].tolist()
+        self.size = state['size'].tolist()
+        
     def union(self, node1, node2):
         node1 = self.find(node1)
         node2 = self.find(node2)
@@ -29,4 +45,55 @@ class UnionFind(object):
         return self.find(node1) == self.find(node2)
         
     def cluster_count(self):
-        return self.count
\ No newline at end of file
+        return self.count
+        
+    def freeze(self):
+        '''
+        Returns a FrozenUnionFind of the current clusters.
+        '''
+        return FrozenUnionFind(self)
+        
+class FrozenUnionFind(FrozenContainer):
+    '''
+    Read-only UnionFind whose id array maps every node directly to the root
+    of its cluster, so find is a single array lookup. Kept in a flat buffer
+    that can be written to a file and mapped back into memory. See
+    FrozenContainer.
+    '''
+    _kind = b'UNFD'
+    
+    def __init__(self, union_find):
+        '''
+        Constructor Arguments
+        ---------------------
+        union_find: UnionFind
+            Structure whose clusters are copied. Roots are resolved on a
+            copy of its id list, compressing paths in the copy only, so
+            <arg>:union_find is left unchanged.
+        '''
+        roots = array('q', union_find.id)
+        for node in range(len(roots)):
+            root = node
+            while roots[root] != root:
+                root = roots[root]
+            while roots[node] != root:
+                roots[node], node = root, roots[node]
+        self._attach([memoryview(array('q', [union_find.count])),
+                      memoryview(roots),
+                      memoryview(array('q', union_find.size))])
+                      
+    def _sections(self):
+        return [self._count, self.id, self.size]
+        
+    def _attach(self, sections):
+        self._count, self.id, self.size = sections
+        self.count = self._count[0]
+        
+    def find(self, node):
+        return self.id[node]
+        
+    def connected(self, node1, node2):
+        return self.id[node1] == self.id[node2]
+        
+    def cluster_count(self):
+        return self.count
@@ -0,0 +1,126 @@
+import asyncio
+import random
+import unittest
+from data_structures import AsyncHeapQueue, AsyncStack
+from data_structures.async_queue import AsyncContainer, EmptyError, FullError
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+class AsyncHeapQueueTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.keys = [rng.randint(0, 1000) for i in range(200)]
+    
+    def test_nowait(self):
+        for largest, ordered in ((False, sorted(self.keys)),
+                                 (True, sorted(self.keys, reverse = True))):
+            queue = AsyncHeapQueue(largest = largest)
+            for key in self.keys:
+                queue.put_nowait(key)
+            self.assertEqual(len(self.keys), queue.qsize())
+            self.assertEqual(ordered[0], queue.peek())
+            self.assertEqual(ordered, [queue.get_nowait() for key in self.keys])
+            self.assertTrue(queue.empty())
+            self.assertRaises(EmptyError, queue.get_nowait)
+            self.assertRaises(EmptyError, queue.peek)
+        
+        queue = AsyncHeapQueue(maxsize = 2, key = lambda item: item[0])
+        queue.put_nowait((1, 'a'))
+        queue.put_nowait((1, 'b'))
+        self.assertTrue(queue.full())
+        self.assertRaises(FullError, queue.put_nowait, (0, 'c'))
+        self.assertEqual([(1, 'a'), (1, 'b')], [queue.get_nowait(), queue.get_nowait()])
+        self.assertRaises(ValueError, AsyncHeapQueue, 0)
+        
+        class Incomplete(AsyncContainer):
+            def __len__(self):
+                return 0
+            def _put(self, item):
+                pass
+        self.assertRaises(TypeError, Incomplete)
+    
+    def test_producers_and_consumers(self):
+        async def produce(queue, keys):
+            for key in keys:
+                await queue.put(key)
+        
+        async def consume(queue, count, results):
+            for i in range(count):
+                results.append(await queue.get())
+        
+        async def main():
+            queue = AsyncHeapQueue(maxsize = 5)
+            results = list()
+            await asyncio.gather(consume(queue, 100, results), consume(queue, 100, results),
+                                 produce(queue, self.keys[:100]), produce(queue, self.keys[100:]))
+            self.assertTrue(queue.empty())
+            return results
+        
+        self.assertEqual(sorted(self.keys), sorted(run(main())))
+    
+    def test_get_many(self):
+        async def main():
+            queue = AsyncHeapQueue(maxsize = 50)
+            self.assertEqual([], await queue.get_many(10, timeout = 0.01))
+            for key in self.keys[:50]:
+                queue.put_nowait(key)
+            blocked = asyncio.ensure_future(queue.put(-1))
+            await asyncio.sleep(0)
+            self.assertFalse(blocked.done())
+            first = await queue.get_many(10)
+            self.assertEqual(sorted(self.keys[:50])[:10], first)
+            await blocked
+            rest = await queue.get_many(100, timeout = 1)
+            self.assertEqual([-1] + sorted(self.keys[:50])[10:], rest)
+            
+            waiting = asyncio.ensure_future(queue.get_many(3, timeout = 5))
+            await asyncio.sleep(0)
+            for key in (3, 1, 2, 0):
+                queue.put_nowait(key)
+            self.assertEqual([0, 1, 2], await waiting)
+            self.assertEqual(3, queue.get_nowait())
+        
+        run(main())
+    
+    def test_cancelled_getter(self):
+        async def main():
+            queue = AsyncHeapQueue()
+            cancelled = asyncio.ensure_future(queue.get())
+            waiting = asyncio.ensure_future(queue.get())
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            queue.put_nowait(7)
+            self.assertEqual(7, await waiting)
+            self.assertTrue(cancelled.cancelled())
+            self.assertEqual(0, len(queue._getters))
+        
+        run(main())
+
+class AsyncStackTest(unittest.TestCase):
+    def test_stack(self):
+        async def main():
+            stack = AsyncStack(maxsize = 3)
+            for value in 'abc':
+                await stack.put(value)
+            self.assertRaises(FullError, stack.put_nowait, 'd')
+            blocked = asyncio.ensure_future(stack.put('d'))
+            await asyncio.sleep(0)
+            self.assertEqual('c', await stack.get())
+            await blocked
+            self.assertEqual(['d', 'b'], await stack.get_many(2))
+            self.assertEqual('a', stack.get_nowait())
+            self.assertRaises(EmptyError, stack.get_nowait)
+            getter = asyncio.ensure_future(stack.get())
+            await asyncio.sleep(0)
+            stack.put_nowait('e')
+            self.assertEqual('e', await getter)
+        
+        run(main())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import random
+import unittest
+from data_structures import BPlusTree
+from data_structures import binary_tree
+from data_structures.b_tree import EmptyError, InternalNode
+
+class BPlusTreeTest(unittest.TestCase):
+    def check_tree(self, tree):
+        fanout = tree._fanout
+        def check(node, lo, hi, depth, is_root):
+            if type(node) is InternalNode:
+                self.assertEqual(len(node.keys) + 1, len(node.children))
+                self.assertLessEqual(len(node.children), fanout)
+                if not is_root:
+                    self.assertGreaterEqual(len(node.children), fanout // 2)
+                bounds = [lo] + node.keys + [hi]
+                depths = set(check(child, bounds[i], bounds[i + 1], depth + 1,
+                                   False) for i, child in enumerate(node.children))
+                self.assertEqual(len(depths), 1, "leaves at different depths")
+                return depths.pop()
+            self.assertLessEqual(len(node.keys), fanout)
+            if not is_root:
+                self.assertGreaterEqual(len(node.keys), fanout // 2)
+            for key in node.keys:
+                self.assertTrue(lo is None or not key < lo, "separator error")
+                self.assertTrue(hi is None or key < hi, "separator error")
+            return depth
+        check(tree._root, None, None, 0, True)
+        self.assertEqual(list(tree), sorted(set(tree)))
+        self.assertEqual(len(list(tree)), len(tree))
+        
+    def test_insert_and_delete(self):
+        rng = random.Random(0)
+        for fanout in (4, 5, 16):
+            keys = rng.sample(range(5000), 1500)
+            tree = BPlusTree(keys, fanout = fanout)
+            tree.insert(keys[0])
+            self.check_tree(tree)
+            for key in keys[:1200]:
+                tree.delete(key)
+            self.check_tree(tree)
+            expected = sorted(keys[1200:])
+            self.assertEqual(list(tree), expected, "delete error")
+            self.assertEqual(list(reversed(tree)), expected[::-1])
+            self.assertRaises(KeyError, tree.delete, keys[0])
+            self.assertFalse(tree.has_key(keys[0]))
+            self.assertIn(expected[5], tree)
+            for key in expected:
+                tree.delete(key)
+            self.assertEqual(len(tree), 0)
+            self.assertEqual(tree.height(), 0)
+            self.assertEqual(tree.minimum(), None)
+            
+    def test_from_sorted_and_queries(self):
+        rng = random.Random(1)
+        keys = sorted(rng.sample(range(0, 10000, 2), 2000))
+        tree = BPlusTree.from_sorted(keys, fanout = 8)
+        self.check_tree(tree)
+        self.assertLessEqual(tree.height(), 5)
+        self.assertEqual((tree.minimum(), tree.maximum()), (keys[0], keys[-1]))
+        for probe in range(-3, 10003, 37):
+            below = [k for k in keys if k <= probe]
+            above = [k for k in keys if k > probe]
+            self.assertEqual(tree.floor(probe), below[-1] if below else None)
+            self.assertEqual(tree.higher(probe), above[0] if above else None)
+        self.assertEqual(tree.successor(keys[10]), keys[11])
+        self.assertEqual(tree.predecessor(keys[10]), keys[9])
+        self.assertRaises(KeyError, tree.successor, keys[-1])
+        self.assertEqual(tree.lub_key(keys[3] + 1), keys[4])
+        self.assertEqual(tree.glb_key(keys[3] + 1), keys[3])
+        self.assertRaises(ValueError, tree.lub_key, keys[-1] + 1)
+        lo, hi = keys[100], keys[900]
+        self.assertEqual(list(tree.irange(lo, hi)), keys[100:901])
+        self.assertEqual(list(tree.irange(lo, hi, (False, False))), keys[101:900])
+        self.assertEqual(list(tree.irange(lo, hi, reverse = True)),
+                         keys[100:901][::-1])
+        self.assertEqual(list(tree.irange(lo + 1, reverse = True,
+                                          inclusive = (False, True))),
+                         keys[101:][::-1])
+        self.assertEqual(list(tree.irange(hi, lo)), [])
+        self.assertRaises(ValueError, BPlusTree.from_sorted, [3, 1])
+        self.assertRaises(EmptyError, BPlusTree().lub_key, 0)
+        self.assertIs(EmptyError, binary_tree.EmptyError)
+        
+    def test_empty_ranges_at_leaf_edges(self):
+        keys = list(range(0, 20, 2))
+        tree = BPlusTree.from_sorted(keys, fanout = 4)
+        for key in range(-1, 21):
+            for inclusive in ((True, True), (True, False), (False, True), (False, False)):
+                expected = [key] if key in keys and inclusive == (True, True) else []
+                for reverse in (False, True):
+                    self.assertEqual(list(tree.irange(key, key, inclusive, reverse)),
+                                     expected, "irange({:d}, {:d}, {:s}, {:s})".format(
+                                         key, key, str(inclusive), str(reverse)))
+            for reverse in (False, True):
+                self.assertEqual(list(tree.irange(key + 1, key, reverse = reverse)), [])
+        self.assertEqual(list(tree.irange(6, 6, (False, False))), [])
+        self.assertEqual(list(tree.irange(8, 8, (False, False), reverse = True)), [])
+        
+if __name__ == "__main__":
+    unittest.main()
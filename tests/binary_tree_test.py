@@ -0,0 +1,395 @@
+import random
+import unittest
+from data_structures import BinaryTree, RedBlackTree, OrderStatisticTree
+from data_structures import SplayTree, Treap
+from data_structures import SortedDict, ArrayRedBlackTree, PersistentRedBlackTree
+from data_structures.binary_tree import EmptyError
+
+class TreeTestCase(unittest.TestCase):
+    def black_height(self, node):
+        if node is None:
+            return 1
+        left = self.black_height(node.left)
+        right = self.black_height(node.right)
+        self.assertEqual(left, right, "black height error")
+        if node.red:
+            for child in (node.left, node.right):
+                self.assertTrue(child is None or not child.red,
+                                "red node with red child")
+        return left + (not node.red)
+        
+class BinaryTreeTest(TreeTestCase):
+    tree_types = (BinaryTree, RedBlackTree, SplayTree, Treap)
+    
+    def test_from_sorted(self):
+        for n in (0, 1, 2, 3, 7, 8, 100, 1023):
+            keys = list(range(n))
+            for tree_type in self.tree_types:
+                tree = tree_type.from_sorted(keys + keys[-1:])
+                self.assertEqual(list(tree), keys, "from_sorted error")
+                self.assertEqual(len(tree), n, "from_sorted __len__ error")
+                self.assertEqual(tree.height(), n.bit_length(), "balance error")
+                if tree_type is RedBlackTree and n:
+                    self.assertEqual(tree.root.color, 'b')
+                    self.black_height(tree.root)
+                    tree.insert(n)
+                    tree.insert(-1)
+                    self.black_height(tree.root)
+                    self.assertEqual(list(tree), list(range(-1, n + 1)))
+        self.assertRaises(ValueError, BinaryTree.from_sorted, [2, 1])
+        
+    def test_constructor_and_clear(self):
+        rng = random.Random(0)
+        keys = rng.sample(range(1000), 200)
+        for tree_type in self.tree_types:
+            tree = tree_type(sorted(keys))
+            self.assertLessEqual(tree.height(), 8, "sorted constructor balance")
+            tree = tree_type(keys)
+            self.assertEqual(list(tree), sorted(keys), "constructor error")
+            tree.clear()
+            self.assertEqual(len(tree), 0, "clear error")
+            self.assertEqual(list(tree), [])
+            tree.insert(1)
+            self.assertEqual(list(tree), [1])
+            
+    def test_iteration_and_delete(self):
+        rng = random.Random(4)
+        keys = rng.sample(range(10000), 300)
+        for tree_type in self.tree_types:
+            tree = tree_type(keys)
+            for key in keys[:200]:
+                tree.delete(key)
+            expected = sorted(keys[200:])
+            self.assertEqual(list(tree), expected, "__iter__ error")
+            self.assertEqual(list(reversed(tree)), expected[::-1],
+                             "__reversed__ error")
+            self.assertEqual(tree.successor(expected[3]), expected[4])
+            self.assertEqual(tree.predecessor(expected[3]), expected[2])
+            self.assertRaises(KeyError, tree.successor, keys[0])
+            self.assertEqual(list(reversed(tree_type())), [])
+            
+    def test_bounds_and_ranges(self):
+        rng = random.Random(3)
+        keys = sorted(rng.sample(range(0, 1000, 2), 150))
+        for tree_type in self.tree_types:
+            tree = tree_type(rng.sample(keys, len(keys)))
+            for probe in range(-3, 1003, 7):
+                below = [k for k in keys if k <= probe]
+                above = [k for k in keys if k >= probe]
+                self.assertEqual(tree.floor(probe), below[-1] if below else None)
+                self.assertEqual(tree.ceiling(probe), above[0] if above else None)
+                below = [k for k in keys if k < probe]
+                above = [k for k in keys if k > probe]
+                self.assertEqual(tree.lower(probe), below[-1] if below else None)
+                self.assertEqual(tree.higher(probe), above[0] if above else None)
+            self.assertEqual(tree.lub_key(keys[0] - 1), keys[0], "lub_key error")
+            self.assertEqual(tree.glb_key(keys[1] + 1), keys[1], "glb_key error")
+            self.assertRaises(ValueError, tree.lub_key, keys[-1] + 1)
+            self.assertRaises(ValueError, tree.glb_key, keys[0] - 1)
+            lo, hi = keys[10], keys[50]
+            self.assertEqual(list(tree.irange(lo, hi)), keys[10:51])
+            self.assertEqual(list(tree.irange(lo, hi, (False, False))), keys[11:50])
+            self.assertEqual(list(tree.irange(lo + 1, hi - 1, reverse = True)),
+                             keys[11:50][::-1])
+            self.assertEqual(list(tree.irange(hi = lo, inclusive = (True, False))),
+                             keys[:10])
+            self.assertEqual(list(tree.irange(lo = hi, reverse = True)),
+                             keys[50:][::-1])
+            self.assertEqual(list(tree.islice(5, 20)), keys[5:20])
+            self.assertEqual(list(tree.islice(-5, None, reverse = True)),
+                             keys[::-1][-5:])
+            self.assertEqual(list(tree.islice(20, 5)), [])
+            
+    def test_stats_and_validate(self):
+        rng = random.Random(11)
+        keys = rng.sample(range(1000), 300)
+        for tree_type in self.tree_types + (OrderStatisticTree,):
+            tree = tree_type(keys)
+            tree.delete_multiple(keys[:100])
+            tree.has_key(keys[150])
+            self.assertTrue(tree.validate())
+            stats = tree.stats()
+            self.assertEqual(stats['size'], 200)
+            self.assertEqual(sum(stats['depths']), 200)
+            self.assertEqual(stats['depths'][0], 1)
+            self.assertEqual(stats['height'], len(stats['depths']))
+            self.assertEqual(tree.height(), stats['height'])
+            if issubclass(tree_type, RedBlackTree):
+                self.assertEqual(stats['black_height'], self.black_height(tree.root) - 1)
+            else:
+                self.assertIsNone(stats['black_height'])
+            node = tree.root
+            node.key, node.left.key = node.left.key, node.key
+            self.assertRaises(ValueError, tree.validate)
+        tree = RedBlackTree(range(50))
+        tree.root.left.red = not tree.root.left.red
+        self.assertRaises(ValueError, tree.validate)
+        tree = BinaryTree()
+        tree.insert_multiple(range(100))
+        self.assertEqual(tree.height(), 100)
+        tree.delete(99)
+        self.assertEqual(tree.height(), 99)
+        self.assertEqual(BinaryTree().stats()['depths'], [])
+        
+class SelfAdjustingTreeTest(TreeTestCase):
+    def check_heap_order(self, node):
+        for child in (node.left, node.right):
+            if child is not None:
+                self.assertIs(child.parent, node)
+                self.assertLess(child.priority, node.priority, "heap order error")
+                self.check_heap_order(child)
+                
+    def test_splay_tree(self):
+        rng = random.Random(10)
+        tree = SplayTree()
+        tree.insert_multiple(range(2000))
+        self.assertEqual(tree.root.key, 1999, "insert splay error")
+        for key in rng.sample(range(2000), 50):
+            self.assertTrue(tree.has_key(key))
+            self.assertEqual(tree.root.key, key, "search splay error")
+        self.assertFalse(5000 in tree)
+        tree.delete_multiple(range(0, 2000, 2))
+        self.assertEqual(list(tree), list(range(1, 2000, 2)))
+        
+    def test_treap(self):
+        tree = Treap(seed = 0)
+        tree.insert_multiple(range(2000))
+        self.check_heap_order(tree.root)
+        self.assertLess(tree.height(), 60, "treap balance error")
+        tree.delete_multiple(range(0, 2000, 3))
+        self.check_heap_order(tree.root)
+        self.check_heap_order(Treap.from_sorted(range(500)).root)
+        lower, upper = tree.split(1000)
+        self.assertEqual(list(lower), [k for k in range(1000) if k % 3])
+        self.assertEqual(list(upper), [k for k in range(1000, 2000) if k % 3])
+        self.assertEqual(len(lower) + len(upper), 1333)
+        self.assertEqual(len(tree), 0)
+        upper.insert(5000)
+        joined = Treap.join(lower, upper)
+        self.check_heap_order(joined.root)
+        self.assertEqual(len(joined), 1334)
+        self.assertEqual(list(joined)[-2:], [1999, 5000])
+        self.assertRaises(ValueError, Treap.join, Treap([3]), Treap([1]))
+        
+class RedBlackTreeTest(TreeTestCase):
+    def check_counts(self, node):
+        if node is None:
+            return 0
+        count = 1 + self.check_counts(node.left) + self.check_counts(node.right)
+        self.assertEqual(node.count, count, "subtree count error")
+        return count
+        
+    def test_delete_invariants(self):
+        rng = random.Random(1)
+        for tree_type in (RedBlackTree, OrderStatisticTree):
+            keys = rng.sample(range(10000), 500)
+            tree = tree_type(keys)
+            for key in keys[:400]:
+                tree.delete(key)
+                if key % 10 == 0:
+                    self.black_height(tree.root)
+            self.assertRaises(KeyError, tree.delete, keys[0])
+            self.assertEqual(list(tree), sorted(keys[400:]), "delete error")
+            self.assertEqual(len(tree), 100)
+            
+    def test_order_statistics(self):
+        rng = random.Random(2)
+        keys = rng.sample(range(0, 10000, 2), 400)
+        tree = OrderStatisticTree(keys[:200])
+        tree.insert_multiple(keys[200:])
+        for key in keys[:150]:
+            tree.delete(key)
+        self.check_counts(tree.root)
+        expected = sorted(keys[150:])
+        for i in range(0, len(expected), 13):
+            self.assertEqual(tree.select(i), expected[i], "select error")
+            self.assertEqual(tree[-i - 1], expected[-i - 1], "__getitem__ error")
+            self.assertEqual(tree.rank(expected[i]), i, "rank error")
+            self.assertEqual(tree.rank(expected[i] + 1), i + 1, "rank error")
+        self.assertEqual(tree.count_range(1000, 5001),
+                         len([k for k in expected if 1000 <= k < 5001]))
+        self.assertEqual(tree.count_range(10, 10), 0)
+        self.assertRaises(IndexError, tree.__getitem__, len(expected))
+        self.check_counts(OrderStatisticTree.from_sorted(range(100)).root)
+        
+    def test_set_operations(self):
+        rng = random.Random(7)
+        for tree_type in (RedBlackTree, OrderStatisticTree):
+            for n, m in ((500, 20), (20, 500), (300, 300), (0, 50), (50, 0)):
+                a = set(rng.sample(range(2000), n))
+                b = set(rng.sample(range(2000), m))
+                for method, expected in (('union', a | b),
+                                         ('intersection', a & b),
+                                         ('difference', a - b)):
+                    tree, other = tree_type(a), tree_type(b)
+                    getattr(tree, method)(other)
+                    self.assertEqual(list(tree), sorted(expected), method + " error")
+                    self.assertEqual(len(tree), len(expected), method + " size error")
+                    self.assertEqual(list(other), sorted(b), method + " changed other")
+                    self.assertEqual(len(other), len(b))
+                    self.black_height(tree.root)
+                    self.black_height(other.root)
+                    nodes = lambda t: set(map(id, t._irange_nodes(None, None, (True, True), False)))
+                    self.assertFalse(nodes(tree) & nodes(other), method + " shares nodes")
+                    if tree_type is OrderStatisticTree:
+                        self.check_counts(tree.root)
+        self.assertRaises(TypeError, RedBlackTree().union, OrderStatisticTree())
+        
+    def test_split_and_join(self):
+        rng = random.Random(8)
+        keys = rng.sample(range(5000), 400)
+        for tree_type in (RedBlackTree, OrderStatisticTree):
+            tree = tree_type(keys)
+            lower, upper = tree.split(2500)
+            self.assertEqual(len(tree), 0)
+            self.assertEqual(list(lower), sorted(k for k in keys if k < 2500))
+            self.assertEqual(list(upper), sorted(k for k in keys if k >= 2500))
+            self.assertEqual(len(lower) + len(upper), 400)
+            for part in (lower, upper):
+                self.black_height(part.root)
+            lower.insert(-1)
+            upper.delete(upper.minimum())
+            joined = tree_type.join(lower, upper)
+            self.black_height(joined.root)
+            self.assertEqual(len(joined), 400)
+            self.assertEqual(list(joined)[0], -1)
+            self.assertEqual((len(lower), len(upper)), (0, 0), "join leaves both trees empty")
+            self.assertEqual((list(lower), list(upper)), ([], []))
+            if tree_type is OrderStatisticTree:
+                self.check_counts(joined.root)
+            self.assertRaises(ValueError, tree_type.join, tree_type([5]), tree_type([1]))
+            
+    def test_compact_nodes(self):
+        tree = RedBlackTree(range(10))
+        self.assertFalse(hasattr(tree.root, '__dict__'), "slots error")
+        self.assertIs(tree.root.red, False)
+        self.assertEqual(tree.root.color, 'b')
+        
+    def array_black_height(self, tree, node):
+        if node == 0:
+            return 1
+        left = self.array_black_height(tree, tree._left[node])
+        right = self.array_black_height(tree, tree._right[node])
+        self.assertEqual(left, right, "black height error")
+        if tree._red[node]:
+            for child in (tree._left[node], tree._right[node]):
+                self.assertFalse(tree._red[child], "red node with red child")
+        return left + (not tree._red[node])
+        
+    def test_array_tree(self):
+        rng = random.Random(6)
+        keys = rng.sample(range(10000), 600)
+        tree = ArrayRedBlackTree(keys[:300])
+        tree.insert_multiple(keys[300:])
+        tree.insert(keys[0])
+        self.assertEqual(len(tree), 600)
+        for key in keys[:450]:
+            tree.delete(key)
+            if key % 10 == 0:
+                self.array_black_height(tree, tree.root)
+        self.assertFalse(tree._red[0], "sentinel color error")
+        self.assertRaises(KeyError, tree.delete, keys[0])
+        expected = sorted(keys[450:])
+        self.assertEqual(list(tree), expected, "delete error")
+        self.assertEqual(list(reversed(tree)), expected[::-1])
+        size = len(tree._keys)
+        tree.insert_multiple(keys[:100])
+        self.assertEqual(len(tree._keys), size, "free slot reuse error")
+        self.array_black_height(tree, tree.root)
+        expected = sorted(keys[:100] + keys[450:])
+        self.assertEqual(list(tree), expected)
+        self.assertEqual((tree.minimum(), tree.maximum()), (expected[0], expected[-1]))
+        self.assertEqual(tree.successor(expected[3]), expected[4])
+        self.assertEqual(tree.predecessor(expected[0]), None)
+        self.assertEqual(tree.floor(expected[5] + 0.5), expected[5])
+        self.assertEqual(tree.ceiling(expected[5] + 0.5), expected[6])
+        self.assertTrue(expected[7] in tree and tree.has_key(expected[7]))
+        self.assertLessEqual(tree.height(), 2 * len(expected).bit_length())
+        tree.clear()
+        self.assertTrue(tree.empty())
+        self.assertEqual(tree.minimum(), None)
+        
+class SortedDictTest(TreeTestCase):
+    def test_mapping_operations(self):
+        rng = random.Random(5)
+        expected = dict((rng.randint(0, 500), rng.random()) for i in range(200))
+        sdict = SortedDict(expected)
+        for key in list(expected)[::4]:
+            expected[key] = -1
+            sdict[key] = -1
+        for key in list(expected)[1::5]:
+            del expected[key]
+            del sdict[key]
+        self.black_height(sdict.root)
+        self.assertEqual(len(sdict), len(expected))
+        self.assertEqual(list(sdict.items()), sorted(expected.items()))
+        other = SortedDict(((key, 'other') for key in range(0, 600, 50)))
+        merged = SortedDict(sdict.items())
+        merged.union(other)
+        self.black_height(merged.root)
+        union = dict(expected)
+        union.update(dict.fromkeys(range(0, 600, 50), 'other'))
+        self.assertEqual(list(merged.items()), sorted(union.items()))
+        self.assertEqual(list(sdict.values()),
+                         [expected[key] for key in sorted(expected)])
+        for key in range(-1, 502, 3):
+            self.assertEqual(key in sdict, key in expected)
+            self.assertEqual(sdict.get(key), expected.get(key))
+        self.assertRaises(KeyError, sdict.__getitem__, 501)
+        self.assertEqual(sdict.setdefault(501, 'x'), 'x')
+        self.assertEqual(sdict.setdefault(501, 'y'), 'x')
+        self.assertEqual(sdict.pop(501), 'x')
+        self.assertEqual(sdict.pop(501, None), None)
+        items = sorted(expected.items())
+        self.assertEqual(list(sdict.irange_items(100, 200)),
+                         [item for item in items if 100 <= item[0] <= 200])
+        self.assertEqual(sdict.pop_min(), items[0])
+        self.assertEqual(sdict.pop_max(), items[-1])
+        self.assertEqual(list(sdict.items()), items[1:-1])
+        sdict.clear()
+        self.assertRaises(EmptyError, sdict.pop_min)
+        
+if __name__ == "__main__":
+    unittest.main()
+            
+class PersistentTreeTest(TreeTestCase):
+    def test_versions(self):
+        rng = random.Random(9)
+        keys = rng.sample(range(5000), 300)
+        tree = PersistentRedBlackTree(keys[:200])
+        snapshot = tree.snapshot()
+        expected = sorted(keys[:200])
+        for key in keys[200:]:
+            tree = tree.insert(key)
+        for key in keys[:150]:
+            tree = tree.delete(key)
+        self.black_height(tree.root)
+        self.assertEqual(list(tree), sorted(keys[150:]), "version error")
+        self.assertEqual(len(tree), 150)
+        self.assertEqual(list(snapshot), expected, "snapshot modified")
+        self.assertEqual(list(reversed(snapshot)), expected[::-1])
+        self.black_height(snapshot.root)
+        self.assertIs(tree.insert(keys[-1]), tree)
+        self.assertRaises(KeyError, tree.delete, keys[0])
+        self.assertTrue(keys[-1] in tree and keys[0] not in tree)
+        self.assertEqual(tree.delete_multiple(list(tree)).root, None)
+        self.assertEqual(snapshot.floor(expected[3] + 0.5), expected[3])
+        self.assertEqual(snapshot.ceiling(expected[3] + 0.5), expected[4])
+        self.assertEqual((snapshot.minimum(), snapshot.maximum()),
+                         (expected[0], expected[-1]))
+        
+    def test_structure_sharing(self):
+        tree = PersistentRedBlackTree(range(1000))
+        version = tree.insert(1000)
+        shared = [0]
+        def count(old, new):
+            if old is None or new is None:
+                return
+            if old is new:
+                shared[0] += 1
+                return
+            count(old.left, new.left)
+            count(old.right, new.right)
+        count(tree.root, version.root)
+        self.assertGreater(shared[0], 0)
+        self.assertLessEqual(version.height(), 2 * (1001).bit_length())
@@ -0,0 +1,219 @@
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+from data_structures import BinaryTree, RedBlackTree, Treap, OrderStatisticTree
+from data_structures import SortedDict, ArrayRedBlackTree, PersistentRedBlackTree
+from data_structures import BPlusTree, MinTreeHeap, MaxTreeHeap, MinPairingHeap
+from data_structures import SingleLinkedList, DoubleLinkedList
+from data_structures import BloomFilter, UnionFind, Hashmap
+from data_structures import FrozenSortedKeys, FrozenBloomFilter
+from data_structures import FrozenUnionFind, FrozenHashmap
+from data_structures.frozen import FrozenContainer
+
+class PickleTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.keys = [rng.randint(0, 10000) for i in range(2000)]
+
+    def roundtrip(self, obj):
+        return pickle.loads(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+    def test_trees(self):
+        expected = sorted(set(self.keys))
+        for tree_type in (BinaryTree, RedBlackTree, Treap, OrderStatisticTree,
+                          ArrayRedBlackTree, BPlusTree):
+            tree = self.roundtrip(tree_type(self.keys))
+            self.assertIs(type(tree), tree_type)
+            self.assertEqual(expected, list(tree), "pickled tree keys")
+            self.assertEqual(len(expected), len(tree), "pickled tree size")
+            tree.insert(-1)
+            tree.delete(expected[0])
+            self.assertEqual([-1] + expected[1:], list(tree), "pickled tree updates")
+            self.assertEqual([], list(self.roundtrip(tree_type())), "empty tree")
+
+        rank = self.roundtrip(OrderStatisticTree(self.keys))
+        self.assertTrue(rank.validate())
+        self.assertEqual(64, self.roundtrip(BPlusTree(self.keys, fanout = 64))._fanout)
+
+        persistent = PersistentRedBlackTree(self.keys)
+        self.assertEqual(expected, list(self.roundtrip(persistent)))
+        self.assertEqual([-1] + expected, list(self.roundtrip(persistent).insert(-1)))
+
+    def test_deep_structures(self):
+        # a degenerate tree and a long list are deeper than the recursion limit
+        chain = BinaryTree()
+        for key in range(3000):
+            chain.insert(key)
+        self.assertEqual(3000, chain.height())
+        copy = self.roundtrip(chain)
+        self.assertEqual(list(range(3000)), list(copy))
+        self.assertLessEqual(copy.height(), 12)
+
+        for list_type in (SingleLinkedList, DoubleLinkedList):
+            linked = list_type()
+            linked.extend(range(100000))
+            copy = self.roundtrip(linked)
+            self.assertEqual(100000, len(copy))
+            self.assertEqual(list(range(100000)), list(copy))
+            self.assertEqual([], list(self.roundtrip(list_type())))
+
+    def test_sorted_dict(self):
+        mapping = SortedDict()
+        for key in self.keys:
+            mapping[key] = str(key)
+        copy = self.roundtrip(mapping)
+        self.assertEqual(list(mapping.items()), list(copy.items()))
+
+    def test_heaps(self):
+        for heap_type, ordered in ((MinTreeHeap, sorted(self.keys)),
+                                   (MaxTreeHeap, sorted(self.keys, reverse = True)),
+                                   (MinPairingHeap, sorted(self.keys))):
+            heap = heap_type()
+            heap.push_multiple(self.keys)
+            copy = self.roundtrip(heap)
+            self.assertIs(type(copy), heap_type)
+            self.assertEqual(ordered, [copy.pop() for i in range(len(self.keys))])
+            self.assertEqual(0, len(self.roundtrip(heap_type())))
+
+    def test_bloom_filter_union_find_and_hashmap(self):
+        bloom = BloomFilter(4096, hashvector_length = 3, seed = 1)
+        for key in self.keys:
+            bloom.insert(key)
+        copy = self.roundtrip(bloom)
+        self.assertEqual(bloom.num_inserts(), copy.num_inserts())
+        self.assertEqual(bloom.bit_density(), copy.bit_density())
+        for key in range(10000):
+            self.assertEqual(bloom.has_hashvector(key), copy.has_hashvector(key))
+
+        uf = UnionFind(500)
+        for i in range(0, 498, 3):
+            uf.union(i, i + 2)
+        copy = self.roundtrip(uf)
+        self.assertEqual(uf.cluster_count(), copy.cluster_count())
+        for i in range(500):
+            self.assertEqual(uf.find(i), copy.find(i))
+
+        hashmap = Hashmap(buckets = 16)
+        for key in self.keys:
+            hashmap[key] = key * 2
+        copy = self.roundtrip(hashmap)
+        self.assertEqual(len(hashmap), len(copy))
+        self.assertEqual(sorted(hashmap.iteritems()), sorted(copy.iteritems()))
+
+class FrozenTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.keys = [rng.randint(0, 10000) for i in range(2000)]
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def reload(self, frozen, frozen_type):
+        '''
+        Yields copies of <arg>:frozen loaded from bytes, from a mapped file
+        and through pickle.
+        '''
+        path = os.path.join(self.directory, 'frozen.bin')
+        frozen.dump(path)
+        yield frozen_type.from_buffer(frozen.to_bytes())
+        yield frozen_type.load(path)
+        yield pickle.loads(pickle.dumps(frozen))
+
+    def test_sorted_keys(self):
+        expected = sorted(set(self.keys))
+        for tree in (RedBlackTree(self.keys), ArrayRedBlackTree(self.keys),
+                     BPlusTree(self.keys), PersistentRedBlackTree(self.keys)):
+            for frozen in self.reload(tree.freeze(), FrozenSortedKeys):
+                self.assertEqual(expected, list(frozen))
+                self.assertEqual(expected[::-1], list(reversed(frozen)))
+                for key in (-1, 0, 17, 5000, 10001):
+                    self.assertEqual(tree.floor(key), frozen.floor(key))
+                    self.assertEqual(tree.ceiling(key), frozen.ceiling(key))
+                    self.assertEqual(key in tree, key in frozen)
+                self.assertEqual(sum(1 for key in expected if 100 <= key < 900),
+                                 frozen.count_range(100, 900))
+
+        tree = BPlusTree(self.keys)
+        frozen = tree.freeze()
+        for key in (-1, 0, 17, 5000, 10001):
+            self.assertEqual(tree.lower(key), frozen.lower(key))
+            self.assertEqual(tree.higher(key), frozen.higher(key))
+        self.assertEqual(list(tree.irange(100, 900, (True, False), True)),
+                         list(frozen.irange(100, 900, (True, False), True)))
+
+        frozen = FrozenSortedKeys([3.5, 1.0, 3.5, 2.0], 'd')
+        self.assertEqual([1.0, 2.0, 3.5], list(frozen))
+        self.assertTrue(FrozenSortedKeys().empty())
+        self.assertIsNone(FrozenSortedKeys().minimum())
+        self.assertRaises(ValueError, FrozenBloomFilter.from_buffer, frozen.to_bytes())
+        self.assertRaises(ValueError, FrozenSortedKeys.from_buffer, b'not frozen')
+        self.assertRaises(TypeError, RedBlackTree(['b', 'a']).freeze)
+        self.assertRaises(TypeError, FrozenSortedKeys, [1.5, 2.5])
+        self.assertRaises(ValueError, FrozenSortedKeys, ['a'], 'u')
+
+        class Incomplete(FrozenContainer):
+            _kind = b'NONE'
+            def _sections(self):
+                return []
+        self.assertRaises(TypeError, Incomplete)
+        self.assertRaises(TypeError, Incomplete.from_buffer, frozen.to_bytes())
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(4096, hashvector_length = 3, seed = 1)
+        for key in self.keys:
+            bloom.insert(key)
+        for frozen in self.reload(bloom.freeze(), FrozenBloomFilter):
+            self.assertEqual(bloom.num_inserts(), frozen.num_inserts())
+            self.assertEqual(bloom.bit_density(), frozen.bit_density())
+            for key in range(10000):
+                self.assertEqual(bloom.has_hashvector(key), frozen.has_hashvector(key))
+
+    def test_union_find(self):
+        uf = UnionFind(500)
+        for i in range(0, 498, 3):
+            uf.union(i, i + 2)
+        for frozen in self.reload(uf.freeze(), FrozenUnionFind):
+            self.assertEqual(uf.cluster_count(), frozen.cluster_count())
+            for i in range(0, 500, 7):
+                self.assertEqual(uf.connected(i, i + 2 if i < 498 else 0),
+                                 frozen.connected(i, i + 2 if i < 498 else 0))
+
+        class CompressingUnionFind(UnionFind):
+            def find(self, node):
+                root = super().find(node)
+                while self.id[node] != root:
+                    self.id[node], node = root, self.id[node]
+                return root
+
+        uf = CompressingUnionFind(64)
+        for step in (1, 2, 4, 8, 16):
+            for i in range(0, 64, 2 * step):
+                uf.union(i, i + step)
+        ids = list(uf.id)
+        frozen = uf.freeze()
+        self.assertEqual(ids, uf.id, "freezing changed the source")
+        self.assertEqual([uf.find(i) for i in range(64)], list(frozen.id))
+
+    def test_hashmap(self):
+        hashmap = Hashmap(buckets = 16)
+        for key in self.keys:
+            hashmap[key] = [key]
+        hashmap['name'] = 'value'
+        hashmap[(1, 'a')] = None
+        for frozen in self.reload(hashmap.freeze(), FrozenHashmap):
+            self.assertEqual(len(hashmap), len(frozen))
+            self.assertEqual(sorted(map(str, hashmap.iteritems())),
+                             sorted(map(str, frozen.iteritems())))
+            self.assertEqual('value', frozen['name'])
+            self.assertIn((1, 'a'), frozen)
+            self.assertIsNone(frozen[(1, 'a')])
+            self.assertEqual([self.keys[0]], frozen[self.keys[0]])
+            self.assertRaises(KeyError, frozen.__getitem__, -1)
+            self.assertEqual('default', frozen.get(-1, 'default'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+import random
+import unittest
+from data_structures import MinArrayHeap, MaxArrayHeap
+from data_structures import KeyedMinHeap, KeyedMaxHeap
+from data_structures import IndexedMinHeap, IndexedMaxHeap
+from data_structures import DAryMinHeap, DAryMaxHeap
+from data_structures import MinPairingHeap, MaxPairingHeap
+from data_structures import MinTreeHeap, MaxTreeHeap
+from data_structures import TopK, merge_sorted
+from data_structures.heap import EmptyError
+
+class ArrayHeapTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.keys = [rng.randint(0, 1000) for i in range(500)]
+        
+    def drain(self, heap):
+        return [heap.pop() for i in range(len(heap))]
+        
+    def test_from_iterable(self):
+        heap = MinArrayHeap.from_iterable(iter(self.keys))
+        self.assertIsInstance(heap, MinArrayHeap)
+        self.assertEqual(self.drain(heap), sorted(self.keys), "min heapify error")
+        heap = MaxArrayHeap.from_iterable(self.keys)
+        self.assertEqual(self.drain(heap), sorted(self.keys, reverse = True),
+                         "max heapify error")
+                         
+    def test_push_multiple_and_merge(self):
+        heap = MinArrayHeap()
+        heap.push_multiple(self.keys[:400])
+        heap.push_multiple(self.keys[400:410])
+        other = MinArrayHeap.from_iterable(self.keys[410:])
+        heap.merge(other)
+        self.assertEqual(len(other), 90, "merge modified other heap")
+        self.assertEqual(len(heap), 500, "merge __len__ error")
+        self.assertEqual(self.drain(heap), sorted(self.keys), "merge error")
+        
+    def test_pushpop_replace_and_delete(self):
+        for heap_type, reverse in ((MinArrayHeap, False), (MaxArrayHeap, True)):
+            heap = heap_type.from_iterable(self.keys[:100])
+            expected = sorted(self.keys[:100], reverse = reverse)
+            for key in self.keys[100:200]:
+                value = heap.pushpop(key)
+                expected = sorted(expected + [key], reverse = reverse)
+                self.assertEqual(value, expected.pop(0), "pushpop error")
+            for key in self.keys[200:300]:
+                value = heap.replace(key)
+                self.assertEqual(value, expected.pop(0), "replace error")
+                expected = sorted(expected + [key], reverse = reverse)
+            for key in self.keys[100:150]:
+                if key in expected:
+                    heap.delete(key)
+                    expected.remove(key)
+            self.assertRaises(KeyError, heap.delete, -1)
+            self.assertEqual(self.drain(heap), expected, "delete error")
+            self.assertRaises(EmptyError, heap.replace, 0)
+            
+    def test_ordering_methods_defined_together(self):
+        def derive(base, **methods):
+            return type('Derived', (base,), methods)
+        
+        reverse = lambda self, key1, key2: key1 > key2
+        for base in (MinArrayHeap, KeyedMinHeap, IndexedMinHeap, DAryMinHeap):
+            self.assertRaises(TypeError, derive, base, _compare = reverse)
+        self.assertRaises(TypeError, derive, MaxArrayHeap, _float_up = MinArrayHeap._float_up)
+        heap = derive(MaxArrayHeap).from_iterable(self.keys)
+        self.assertEqual(sorted(self.keys, reverse = True), self.drain(heap))
+            
+class KeyedHeapTest(unittest.TestCase):
+    def test_key_and_stability(self):
+        rng = random.Random(7)
+        records = [{'id': i, 'score': rng.randint(0, 20)} for i in range(300)]
+        score = lambda record: record['score']
+        for heap_type, reverse in ((KeyedMinHeap, False), (KeyedMaxHeap, True)):
+            heap = heap_type.from_iterable(records[:200], key = score,
+                                           stable = True)
+            for record in records[200:]:
+                heap.push(record)
+            popped = [heap.pop() for i in range(len(heap))]
+            self.assertEqual(popped, sorted(records, key = score,
+                                            reverse = reverse),
+                             "stable pop order error")
+            
+            heap = heap_type(key = score)
+            heap.push_multiple(records)
+            for record in records[::3]:
+                heap.delete(record)
+            value = heap.pushpop(records[0])
+            self.assertIn(value, records)
+            popped = [score(heap.pop()) for i in range(len(heap))]
+            self.assertEqual(popped, sorted(popped, reverse = reverse))
+            self.assertEqual(len(heap._priorities), 0)
+            
+class DAryHeapTest(unittest.TestCase):
+    def test_heap_operations(self):
+        rng = random.Random(2)
+        keys = [rng.randint(0, 1000) for i in range(400)]
+        for arity in (2, 3, 4, 8):
+            for heap_type, reverse in ((DAryMinHeap, False), (DAryMaxHeap, True)):
+                heap = heap_type.from_iterable(keys[:200], arity = arity)
+                for key in keys[200:300]:
+                    heap.push(key)
+                heap.push_multiple(keys[300:])
+                expected = sorted(keys, reverse = reverse)
+                self.assertEqual(heap.peek(), expected[0], "peek error")
+                self.assertEqual(heap.pushpop(expected[-1]), expected[0])
+                expected = sorted(expected[1:] + expected[-1:], reverse = reverse)
+                for key in keys[:50]:
+                    heap.delete(key)
+                    expected.remove(key)
+                popped = [heap.pop() for i in range(len(heap))]
+                self.assertEqual(popped, expected, "d-ary pop order error")
+        self.assertRaises(ValueError, DAryMinHeap, 1)
+        
+class IndexedHeapTest(unittest.TestCase):
+    def check_positions(self, heap):
+        for index, (item, priority) in enumerate(heap):
+            self.assertEqual(heap._position[item], index, "position map error")
+        self.assertEqual(len(heap._position), len(heap))
+        
+    def test_update_priority_and_delete(self):
+        rng = random.Random(1)
+        for heap_type, sign in ((IndexedMinHeap, 1), (IndexedMaxHeap, -1)):
+            priorities = dict((i, rng.random()) for i in range(300))
+            heap = heap_type.from_iterable(priorities.items())
+            for item in range(0, 300, 3):
+                priorities[item] = rng.random()
+                heap.update_priority(item, priorities[item])
+            for item in range(1, 300, 7):
+                heap.delete(item)
+                del priorities[item]
+                self.assertNotIn(item, heap, "__contains__ error after delete")
+            self.check_positions(heap)
+            self.assertRaises(KeyError, heap.delete, 1)
+            self.assertRaises(ValueError, heap.push, 0, 0.5)
+            self.assertEqual(heap.priority(3), priorities[3], "priority error")
+            expected = sorted(priorities.items(), key = lambda x: sign * x[1])
+            popped = [heap.pop() for i in range(len(heap))]
+            self.assertEqual(popped, expected, "pop order error")
+            
+    def test_pushpop_and_replace(self):
+        heap = IndexedMinHeap.from_iterable([('a', 3), ('b', 1), ('c', 2)])
+        self.assertEqual(heap.pushpop('d', 0), ('d', 0), "pushpop error")
+        self.assertEqual(heap.pushpop('d', 5), ('b', 1), "pushpop error")
+        self.assertEqual(heap.replace('e', 0), ('c', 2), "replace error")
+        self.check_positions(heap)
+        self.assertEqual(heap.peek(), ('e', 0))
+        self.assertNotIn('c', heap)
+        
+    def test_push_multiple_rejects_duplicates(self):
+        for heap_type in (IndexedMinHeap, IndexedMaxHeap):
+            heap = heap_type()
+            self.assertRaises(ValueError, heap.push_multiple, [('a', 5), ('b', 1), ('a', 0)])
+            self.assertEqual(len(heap), 0, "partial batch pushed")
+            heap.push_multiple([('a', 5), ('b', 1)])
+            for batch in ([('c', 3), ('b', 2)], [('c', 3), ('d', 4), ('c', 0)]):
+                self.assertRaises(ValueError, heap.push_multiple, batch)
+                self.assertEqual(len(heap), 2, "partial batch pushed")
+                self.check_positions(heap)
+            self.assertRaises(ValueError, heap_type.from_iterable, [('x', 1), ('x', 2)])
+            expected = [('b', 1), ('a', 5)] if heap_type is IndexedMinHeap else [('a', 5), ('b', 1)]
+            self.assertEqual([heap.pop(), heap.pop()], expected, "pop order error")
+            
+class TreeHeapTest(unittest.TestCase):
+    def check_tree(self, heap):
+        nodes = list(heap._nodes())
+        self.assertEqual(len(nodes), len(heap), "node count error")
+        for position, node in enumerate(nodes, 1):
+            self.assertIs(heap._node_at(position), node, "shape error")
+            for child in (node.left, node.right):
+                if child is not None:
+                    self.assertIs(child.parent, node, "parent link error")
+                    self.assertFalse(heap._compare(child.key, node.key),
+                                     "heap invariant error")
+                                     
+    def test_handles_and_delete(self):
+        rng = random.Random(4)
+        for heap_type, reverse in ((MinTreeHeap, False), (MaxTreeHeap, True)):
+            heap = heap_type()
+            keys = [rng.randint(0, 1000) for i in range(300)]
+            handles = [heap.push(key) for key in keys]
+            self.check_tree(heap)
+            for node in handles[::4]:
+                heap.delete(node)
+            self.assertRaises(KeyError, heap.delete, handles[0])
+            expected = sorted((key for i, key in enumerate(keys) if i % 4),
+                              reverse = reverse)
+            heap.delete_key(expected[-1])
+            expected.pop()
+            self.check_tree(heap)
+            self.assertRaises(TypeError, heap.delete, expected[0])
+            self.assertRaises(KeyError, heap.delete_key, -1)
+            self.assertEqual(heap.pushpop(expected[0]), expected[0])
+            popped = [heap.pop() for i in range(len(heap))]
+            self.assertEqual(popped, expected, "pop order error")
+            self.assertRaises(EmptyError, heap.pop)
+            
+class PairingHeapTest(unittest.TestCase):
+    def test_handles_and_meld(self):
+        rng = random.Random(3)
+        for heap_type, sign in ((MinPairingHeap, 1), (MaxPairingHeap, -1)):
+            heap1, heap2 = heap_type(), heap_type()
+            handles = [heap1.push(rng.randint(0, 1000)) for i in range(200)]
+            handles += [heap2.push(rng.randint(0, 1000)) for i in range(200)]
+            heap1.meld(heap2)
+            self.assertEqual(len(heap1), 400, "meld __len__ error")
+            self.assertEqual(len(heap2), 0, "meld did not empty other heap")
+            heap1.pop()
+            live = [node for node in handles if node.prev is not None
+                    or node is heap1._root]
+            for node in live[::5]:
+                heap1.decrease_key(node, node.key - sign * 500)
+            for node in live[1::7]:
+                heap1.delete(node)
+            expected = sorted((node.key for i, node in enumerate(live)
+                               if i % 7 != 1), key = lambda x: sign * x)
+            self.assertEqual(sorted(heap1, key = lambda x: sign * x), expected,
+                             "__iter__ error")
+            popped = [heap1.pop() for i in range(len(heap1))]
+            self.assertEqual(popped, expected, "pop order error")
+            self.assertRaises(EmptyError, heap1.pop)
+        self.assertRaises(TypeError, MinPairingHeap().meld, MaxPairingHeap())
+        
+    def test_stale_handles(self):
+        for heap_type in (MinPairingHeap, MaxPairingHeap):
+            heap = heap_type()
+            handles = [heap.push(key) for key in (5, 1, 9, 3)]
+            head = heap._root
+            heap.pop()
+            deleted = [node for node in handles if node.prev is not None][0]
+            heap.delete(deleted)
+            for node in (head, deleted):
+                self.assertRaises(KeyError, heap.delete, node)
+                self.assertRaises(KeyError, heap.decrease_key, node, node.key)
+            self.assertEqual(len(heap), 2, "stale handle changed the heap")
+            self.assertRaises(KeyError, heap.delete, heap_type().push(0))
+            
+class HeapUtilitiesTest(unittest.TestCase):
+    def test_top_k(self):
+        rng = random.Random(5)
+        records = [{'id': i, 'score': rng.randint(0, 50)} for i in range(1000)]
+        score = lambda record: record['score']
+        top = TopK(10, key = score)
+        top.push_multiple(iter(records))
+        self.assertEqual(len(top), 10)
+        self.assertEqual(top.results(), sorted(records, key = score,
+                                               reverse = True)[:10])
+        bottom = TopK(10, key = score, largest = False)
+        bottom.push_multiple(records)
+        self.assertEqual(list(bottom), sorted(records, key = score)[:10])
+        self.assertEqual(bottom.peek(), list(bottom)[-1])
+        self.assertEqual(TopK(0).results(), [])
+        
+    def test_merge_sorted(self):
+        rng = random.Random(6)
+        shards = [sorted(rng.randint(0, 100) for i in range(rng.randint(0, 50)))
+                  for j in range(8)]
+        merged = merge_sorted(*(iter(shard) for shard in shards))
+        self.assertEqual(list(merged), sorted(sum(shards, [])))
+        pairs = [[(x, j) for x in shard] for j, shard in enumerate(shards)]
+        merged = list(merge_sorted(*pairs, key = lambda pair: pair[0]))
+        self.assertEqual(merged, sorted(sum(pairs, []), key = lambda p: p[0]))
+        descending = [shard[::-1] for shard in shards]
+        merged = list(merge_sorted(*descending, reverse = True))
+        self.assertEqual(merged, sorted(sum(shards, []), reverse = True))
+        self.assertEqual(list(merge_sorted()), [])
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import random
+import unittest
+from data_structures.linked_list import EmptyError, DoubleLink
+from data_structures import SingleLinkedList, DoubleLinkedList, Deque, Stack
+
+class LinkedListTest(unittest.TestCase):
+    list_types = (SingleLinkedList, DoubleLinkedList)
+    
+    def test_extend_and_front_extend(self):
+        for list_type in self.list_types:
+            alist = list_type()
+            alist.extend(x for x in range(3))
+            alist.extend([])
+            alist.front_extend(x for x in range(-3, 0))
+            self.assertEqual(list(alist), list(range(-3, 3)), "extend error")
+            self.assertEqual(len(alist), 6, "extend __len__ error")
+            self.assertEqual(alist[-1], 2, "extend end link error")
+            alist.append(3)
+            alist.prepend(-4)
+            self.assertEqual(list(alist), list(range(-4, 4)), "append error")
+            
+    def test_reversed_and_reverse(self):
+        for list_type in self.list_types:
+            alist = list_type()
+            alist.extend(range(5))
+            self.assertEqual(list(reversed(alist)), [4, 3, 2, 1, 0],
+                             "__reversed__ error")
+            alist.reverse()
+            self.assertEqual(list(alist), [4, 3, 2, 1, 0], "reverse error")
+            alist.append(-1)
+            self.assertEqual(alist.popfront(), 4, "reverse root error")
+            self.assertEqual(list(reversed(alist)), [-1, 0, 1, 2, 3],
+                             "reverse end error")
+            
+    def test_indexing_and_slicing(self):
+        values = list(range(10))
+        for list_type in self.list_types:
+            alist = list_type()
+            alist.extend(values)
+            for i in range(-10, 10):
+                self.assertEqual(alist[i], values[i], "indexing error")
+            self.assertRaises(IndexError, alist.__getitem__, 10)
+            self.assertRaises(IndexError, alist.__getitem__, -11)
+            for key in (slice(2, 7), slice(None, None, -1), slice(8, 1, -3),
+                        slice(1, None, 2), slice(5, 2), slice(-3, None)):
+                sliced = alist[key]
+                self.assertIsInstance(sliced, list_type)
+                self.assertEqual(list(sliced), values[key], "slicing error")
+                self.assertEqual(len(sliced), len(values[key]))
+                
+    def test_contains(self):
+        for list_type in self.list_types:
+            alist = list_type()
+            self.assertNotIn(0, alist)
+            alist.extend(range(3))
+            self.assertIn(2, alist)
+            self.assertNotIn(3, alist)
+            
+    def test_stack_iteration(self):
+        stack = Stack()
+        for i in range(5):
+            stack.push(i)
+        self.assertEqual(list(stack), [4, 3, 2, 1, 0], "Stack __iter__ error")
+        
+        stack = Stack(container = Deque)
+        for i in range(5):
+            stack.push(i)
+        self.assertEqual(list(stack), [4, 3, 2, 1, 0], "Deque Stack error")
+        self.assertEqual(stack.pop(), 4, "Deque Stack pop error")
+        
+    def test_custom_links(self):
+        class CountedLink(DoubleLink):
+            pass
+            
+        class CountedList(DoubleLinkedList):
+            def _create_new_link(self, value, next = None, previous = None):
+                return CountedLink(value, next, previous)
+                
+        linked = CountedList()
+        linked.append(0)
+        linked.extend(range(1, 5))
+        linked.front_extend([-2, -1])
+        for copy in (linked, linked[1:5], linked[::-2]):
+            link = copy._root
+            while link is not None:
+                self.assertIs(type(link), CountedLink, "link factory bypassed")
+                link = link._next
+        self.assertEqual(list(linked), list(range(-2, 5)))
+        self.assertEqual(list(reversed(linked)), list(range(4, -3, -1)))
+        
+class DequeTest(unittest.TestCase):
+    def test_ends_and_indexing(self):
+        deque = Deque()
+        expected = list()
+        for i in range(100):
+            if i % 3:
+                deque.append(i)
+                expected.append(i)
+            else:
+                deque.prepend(i)
+                expected.insert(0, i)
+        self.assertEqual(list(deque), expected, "append/prepend error")
+        self.assertEqual(list(reversed(deque)), expected[::-1])
+        for i in range(-100, 100, 7):
+            self.assertEqual(deque[i], expected[i], "indexing error")
+        self.assertEqual(list(deque[5:50:3]), expected[5:50:3], "slicing error")
+        for i in range(60):
+            if i % 2:
+                self.assertEqual(deque.popfront(), expected.pop(0))
+            else:
+                self.assertEqual(deque.popback(), expected.pop())
+        self.assertEqual(list(deque), expected, "pop error after shrinking")
+        deque.front_extend(x for x in range(3))
+        self.assertEqual(list(deque)[:4], [0, 1, 2, expected[0]])
+        deque.clear()
+        self.assertRaises(EmptyError, deque.popfront)
+        self.assertRaises(EmptyError, deque.popback)
+        
+    def test_maxlen_overwrite(self):
+        deque = Deque(range(3), maxlen = 3)
+        deque.append(3)
+        self.assertEqual(list(deque), [1, 2, 3], "append overwrite error")
+        deque.prepend(0)
+        self.assertEqual(list(deque), [0, 1, 2], "prepend overwrite error")
+        deque.extend(range(10))
+        self.assertEqual(list(deque), [7, 8, 9], "extend overwrite error")
+        self.assertEqual(deque.max_length(), 3)
+        self.assertRaises(IndexError, deque.insert, 1, 0)
+        deque.front_extend(range(10))
+        self.assertEqual(list(deque), [0, 1, 2], "front_extend overwrite error")
+        
+    def test_bulk_extend_and_slicing(self):
+        rng = random.Random(1)
+        for maxlen in (None, 0, 5, 20):
+            deque = Deque(maxlen = maxlen, capacity = 1)
+            expected = list()
+            for i in range(200):
+                values = [rng.randint(0, 99) for j in range(rng.randint(0, 12))]
+                if i % 3 == 0:
+                    deque.front_extend(values)
+                    expected = values + expected
+                    if maxlen is not None:
+                        expected = expected[:maxlen]
+                else:
+                    deque.extend(values if i % 3 == 1 else iter(values))
+                    expected.extend(values)
+                    if maxlen is not None:
+                        expected = expected[max(len(expected) - maxlen, 0):]
+                if i % 4 == 0 and expected:
+                    self.assertEqual(deque.popfront(), expected.pop(0))
+                self.assertEqual(list(deque), expected, "bulk extend error")
+                start, stop = rng.randint(-25, 25), rng.randint(-25, 25)
+                for step in (1, 2, -1, -3):
+                    self.assertEqual(list(deque[start:stop:step]),
+                                     expected[start:stop:step], "slicing error")
+            deque.extend(deque)
+            expected.extend(expected)
+            if maxlen is not None:
+                expected = expected[max(len(expected) - maxlen, 0):]
+            self.assertEqual(list(deque), expected, "self extend error")
+            
+    def test_insert_and_remove(self):
+        rng = random.Random(0)
+        deque = Deque()
+        expected = list()
+        for i in range(300):
+            index = rng.randint(-len(expected) - 2, len(expected) + 2)
+            deque.insert(index, i)
+            expected.insert(index, i)
+            self.assertEqual(list(deque), expected, "insert error")
+        for i in range(250):
+            value = rng.choice(expected)
+            deque.remove(value)
+            expected.remove(value)
+            self.assertEqual(list(deque), expected, "remove error")
+        self.assertRaises(ValueError, deque.remove, -1)
+        
+        # wrapped buffer
+        deque = Deque(range(6), capacity = 8)
+        for i in range(4):
+            deque.append(deque.popfront())
+        deque.insert(1, 'a')
+        deque.insert(5, 'b')
+        deque.remove(4)
+        self.assertEqual(list(deque), ['a', 5, 0, 1, 'b', 2, 3], "wrapped buffer error")
+            
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import multiprocessing
+import pickle
+import random
+import unittest
+from data_structures import SharedMinArrayHeap, SharedMaxArrayHeap
+from data_structures import BloomFilter, UnionFind, Hashmap
+from data_structures import FrozenBloomFilter, FrozenUnionFind, FrozenHashmap
+from data_structures.frozen import shared_memory
+from data_structures.heap import EmptyError, FullError
+
+def lookup(args):
+    hashmap, bloom, uf, key = args
+    return hashmap.get(key), bloom.has_hashvector(key), uf.find(key)
+
+def pop_all(heap):
+    return [heap.pop() for i in range(len(heap))]
+
+@unittest.skipIf(shared_memory is None, 'multiprocessing.shared_memory not available')
+class SharedHeapTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.keys = [rng.randint(0, 1000) for i in range(500)]
+        
+    def test_min_max_heaps(self):
+        for heap_type, ordered in ((SharedMinArrayHeap, sorted(self.keys)),
+                                   (SharedMaxArrayHeap, sorted(self.keys, reverse = True))):
+            heap = heap_type(len(self.keys))
+            heap.push_multiple(self.keys[:10])
+            for key in self.keys[10:]:
+                heap.push(key)
+            self.assertEqual(len(self.keys), len(heap))
+            self.assertEqual(ordered[0], heap.peek())
+            self.assertRaises(FullError, heap.push, 0)
+            self.assertEqual(ordered, pop_all(heap))
+            self.assertRaises(EmptyError, heap.pop)
+            heap.close()
+            heap.unlink()
+            
+        heap = SharedMinArrayHeap.from_iterable([2.5, 0.5, 1.5], 'd', capacity = 8)
+        self.assertEqual(8, heap.capacity())
+        self.assertEqual(0.5, heap.pushpop(1.0))
+        self.assertEqual(1.0, heap.replace(3.0))
+        heap.delete(2.5)
+        self.assertRaises(KeyError, heap.delete, 7.0)
+        self.assertEqual([1.5, 3.0], pop_all(heap))
+        heap.close()
+        heap.unlink()
+        
+    def test_attach(self):
+        heap = SharedMinArrayHeap(len(self.keys))
+        other = SharedMinArrayHeap.attach(heap.name)
+        copy = pickle.loads(pickle.dumps(heap))
+        self.assertLess(len(pickle.dumps(heap)), 200)
+        heap.push_multiple(self.keys)
+        self.assertEqual(len(self.keys), len(other))
+        self.assertEqual(min(self.keys), other.pop())
+        self.assertEqual(len(self.keys) - 1, len(copy))
+        copy.clear()
+        self.assertEqual(0, len(heap))
+        for h in (copy, other, heap):
+            h.close()
+        heap.unlink()
+        
+@unittest.skipIf(shared_memory is None, 'multiprocessing.shared_memory not available')
+class SharedFrozenTest(unittest.TestCase):
+    def setUp(self):
+        self.hashmap = Hashmap(buckets = 16)
+        self.bloom = BloomFilter(2048, seed = 0)
+        self.uf = UnionFind(100)
+        for key in range(0, 100, 2):
+            self.hashmap[key] = str(key)
+            self.bloom.insert(key)
+            self.uf.union(key, (key * 7) % 100)
+        self.shared = [self.hashmap.freeze().share(), self.bloom.freeze().share(),
+                       self.uf.freeze().share()]
+                       
+    def tearDown(self):
+        for container in self.shared:
+            container.close()
+            container.unlink()
+            
+    def expected(self, key):
+        return (self.hashmap[key] if key in self.hashmap else None), self.bloom.has_hashvector(key), self.uf.find(key)
+        
+    def test_attach(self):
+        hashmap, bloom, uf = self.shared
+        attached = (FrozenHashmap.attach(hashmap.name), FrozenBloomFilter.attach(bloom.name),
+                    FrozenUnionFind.attach(uf.name))
+        for container in attached:
+            self.assertLess(len(pickle.dumps(container)), 200)
+        for key in range(100):
+            self.assertEqual(self.expected(key), lookup(attached + (key,)))
+            self.assertEqual(self.expected(key), lookup(tuple(self.shared) + (key,)))
+        for container in attached:
+            container.close()
+        self.assertIsNone(self.hashmap.freeze().name)
+        self.assertRaises(ValueError, self.hashmap.freeze().unlink)
+        
+    @unittest.skipIf('fork' not in multiprocessing.get_all_start_methods(), 'fork not available')
+    def test_pool(self):
+        with multiprocessing.get_context('fork').Pool(2) as pool:
+            results = pool.map(lookup, [tuple(self.shared) + (key,) for key in range(100)])
+        self.assertEqual([self.expected(key) for key in range(100)], results)
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import random
+import unittest
+from data_structures import TimingWheel
+from data_structures.timing_wheel import EmptyError
+
+class TimingWheelTest(unittest.TestCase):
+    def test_advance_order_and_cancel(self):
+        rng = random.Random(0)
+        wheel = TimingWheel(resolution = 0.5, wheel_bits = 2, levels = 3)
+        deadlines = [rng.uniform(0, 200) for i in range(500)]
+        handles = [wheel.push(deadline, i) for i, deadline in enumerate(deadlines)]
+        for handle in handles[::3]:
+            wheel.cancel(handle)
+        self.assertRaises(KeyError, wheel.cancel, handles[0])
+        self.assertFalse(handles[0].active())
+        self.assertIn(handles[1], wheel)
+        expected = sorted((deadline, i) for i, deadline in enumerate(deadlines)
+                          if i % 3)
+        self.assertEqual(len(wheel), len(expected))
+        self.assertEqual(wheel.peek(), expected[0], "peek error")
+        fired = list()
+        now = 0
+        while now < 210:
+            now += rng.uniform(0, 20)
+            batch = list(wheel.advance(now))
+            for deadline, i in batch:
+                self.assertLess(deadline // 0.5, now // 0.5 + 1, "early expiry")
+            fired.extend(batch)
+        self.assertEqual(fired, expected, "advance order error")
+        self.assertEqual(len(wheel), 0)
+        self.assertRaises(EmptyError, wheel.pop)
+        
+    def test_pop_and_late_push(self):
+        wheel = TimingWheel(wheel_bits = 2, levels = 2)
+        for deadline in (100, 5, 37, 5.5, 16):
+            wheel.push(deadline, deadline)
+        self.assertEqual(wheel.pop(), (5, 5), "overflow pop error")
+        self.assertEqual(list(wheel.advance(20)), [(5.5, 5.5), (16, 16)])
+        wheel.push(3, 'late')
+        self.assertEqual(wheel.peek(), (3, 'late'), "past deadline peek error")
+        self.assertEqual(list(wheel.advance(20)), [(3, 'late')])
+        self.assertEqual([wheel.pop(), wheel.pop()], [(37, 37), (100, 100)])
+        
+    def test_peek_after_advance_to_boundary(self):
+        wheel = TimingWheel(wheel_bits = 1, levels = 2)
+        wheel.push(25, 0)
+        self.assertEqual(list(wheel.advance(23)), [])
+        wheel.push(53, 2)
+        wheel.push(27, 3)
+        self.assertEqual(wheel.peek(), (25, 0), "un-cascaded timer skipped")
+        
+        # mix advance, push, peek and pop against a sorted list
+        rng = random.Random(1)
+        for wheel_bits, levels in ((1, 2), (2, 2), (1, 3)):
+            wheel = TimingWheel(wheel_bits = wheel_bits, levels = levels)
+            pending = list()
+            now = 0
+            for step in range(2000):
+                action = rng.random()
+                if action < 0.5:
+                    deadline = now + rng.randint(-3, 80)
+                    wheel.push(deadline, step)
+                    pending.append((deadline, step))
+                elif action < 0.7 and pending:
+                    pending.sort()
+                    self.assertEqual(wheel.peek()[0], pending[0][0], "peek error")
+                    self.assertEqual(wheel.pop()[0], pending.pop(0)[0], "pop error")
+                else:
+                    now += rng.randint(0, 9)
+                    fired = [deadline for deadline, item in wheel.advance(now)]
+                    pending.sort()
+                    expected = [deadline for deadline, item in pending if deadline <= now]
+                    pending = [entry for entry in pending if entry[0] > now]
+                    self.assertEqual(fired, expected, "advance error")
+                self.assertEqual(len(wheel), len(pending))
+                
+if __name__ == "__main__":
+    unittest.main()